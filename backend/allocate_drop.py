@@ -0,0 +1,27 @@
+# allocate_drop.py
+# Çekiliş tipi bir drop'un stoğunu waitlist'e tek transaction'da dağıtır.
+# Kullanım (backend klasöründen):  python allocate_drop.py <drop_id>
+import asyncio
+import sys
+
+from app import crud
+from app.database import SessionLocal, engine
+
+
+async def main(drop_id: int) -> int:
+    async with SessionLocal() as db:
+        report = await crud.allocate_drop(db, drop_id)
+    await engine.dispose()
+
+    if report == "DROP_NOT_FOUND":
+        print(f"Drop bulunamadı: {drop_id}")
+        return 1
+    print(report.model_dump_json(indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Kullanım: python allocate_drop.py <drop_id>")
+        sys.exit(2)
+    sys.exit(asyncio.run(main(int(sys.argv[1]))))
@@ -0,0 +1,91 @@
+"""
+Doğrulanmış token önbelleği (verified-user cache).
+
+Access token'lar `user_id` ve `is_admin` claim'lerini taşır; bu yüzden
+korumalı endpoint'ler kullanıcıyı her istekte DB'den okumak zorunda değildir.
+İmzası doğrulanmış bir token'ın çözümlenmiş hali burada TTL ile tutulur;
+aynı token ile gelen sonraki istekler JWT'yi tekrar çözmez bile.
+
+Açık geçersiz kılma: `invalidate_user(user_id)` o kullanıcıya ait önbellek
+kayıtlarını siler ve o andan önce üretilmiş token'ları "DB ile yeniden
+doğrulanmalı" olarak işaretler. `PATCH /admin/users/{user_id}` ile yetki
+değiştiğinde çağrılır. İşaretler token ömrü (`ACCESS_TOKEN_EXPIRE_MINUTES`)
+kadar tutulur; daha eski token'lar zaten süresi dolduğu için reddedilir.
+Önbellek süreç başınadır: diğer worker'lar eski token'ı en fazla
+`AUTH_CACHE_TTL_SECONDS` boyunca önbellekten kabul etmeye devam eder.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import settings
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Korumalı endpoint'lerin ihtiyaç duyduğu kullanıcı bilgisi (ORM nesnesi değil)."""
+    id: int
+    email: str
+    is_admin: bool
+
+
+class VerifiedTokenCache:
+    def __init__(self, ttl_seconds: int, max_entries: int, token_lifetime_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self._lock = threading.Lock()
+        # token -> (kullanıcı, son geçerlilik zamanı)
+        self._entries = OrderedDict()
+        # user_id -> geçersiz kılma zamanı (epoch saniye)
+        self._invalidated_at = {}
+
+    def get(self, token: str) -> Optional[AuthenticatedUser]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            with self._lock:
+                self._entries.pop(token, None)
+            return None
+        return user
+
+    def put(self, token: str, user: AuthenticatedUser, token_exp: float) -> None:
+        expires_at = min(token_exp, time.time() + self.ttl_seconds)
+        with self._lock:
+            self._entries[token] = (user, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def needs_db_check(self, user_id: int, issued_at: float) -> bool:
+        """Token, kullanıcı geçersiz kılınmadan önce üretildiyse claim'lerine güvenilmez."""
+        invalidated_at = self._invalidated_at.get(user_id)
+        return invalidated_at is not None and issued_at <= invalidated_at
+
+    def invalidate_user(self, user_id: int) -> None:
+        now = time.time()
+        with self._lock:
+            # Token ömründen eski işaretler artık hiçbir geçerli token'ı etkilemez
+            horizon = now - self.token_lifetime_seconds
+            for stale in [uid for uid, at in self._invalidated_at.items() if at < horizon]:
+                del self._invalidated_at[stale]
+            self._invalidated_at[user_id] = now
+            for token in [t for t, (user, _) in self._entries.items() if user.id == user_id]:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._invalidated_at.clear()
+
+
+token_cache = VerifiedTokenCache(
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+    max_entries=settings.auth_cache_max_entries,
+    token_lifetime_seconds=settings.access_token_expire_minutes * 60,
+)
@@ -0,0 +1,110 @@
+"""
+Serileştirilmiş HTTP yanıtları için süreç içi önbellek.
+
+Girdiler (ETag, gövde baytları) olarak tutulur; böylece tekrar gelen istek
+ya doğrudan aynı baytları alır ya da `If-None-Match` eşleşirse 304 alır.
+Aynı anahtar için eşzamanlı ıskalamalarda (miss) yanıt yalnızca bir kez
+üretilir (single-flight); diğer istekler onun sonucunu bekler.
+
+Önbellek veri değiştiğinde açıkça `invalidate()` ile temizlenir; TTL yalnızca
+zamana bağlı sonuçlar (örn. "aktif" filtresi) için bir emniyet sınırıdır.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from .config import settings
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._version = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        response, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return response
+
+    async def get_or_build(
+        self, key: Hashable, builder: Callable[[], Awaitable[CachedResponse]]
+    ) -> CachedResponse:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        version = self._version
+        try:
+            response = await builder()
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # bekleyen yoksa "never retrieved" uyarısını engelle
+            raise
+        finally:
+            current = self._in_flight.get(key) is future
+            if current:
+                self._in_flight.pop(key, None)
+
+        # Üretim sırasında invalidate() / discard() çağrıldıysa eski sonuç saklanmaz
+        if current and version == self._version:
+            self._entries[key] = (response, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(response)
+        return response
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._entries.clear()
+        # Devam eden üretimlerin sonucu sonraki isteklere verilmesin
+        self._in_flight.clear()
+
+    def discard(self, key: Hashable) -> None:
+        """Tek anahtarı temizler (örn. yalnızca bir kullanıcının verisi değiştiğinde)."""
+        self._entries.pop(key, None)
+        self._in_flight.pop(key, None)
+
+
+drop_list_cache = ResponseCache(ttl_seconds=settings.drop_list_cache_ttl_seconds)
+# GET /me/drops: kullanıcı başına; join/leave/claim o kullanıcının kaydını siler
+user_drops_cache = ResponseCache(
+    ttl_seconds=settings.user_drops_cache_ttl_seconds,
+    max_entries=settings.user_drops_cache_max_entries,
+)
@@ -0,0 +1,240 @@
+"""
+Claim kodu Bloom filtresi: var olmayan kodları DB'ye gitmeden reddeder.
+
+Kısa claim kodları drop_id'yi taşıdığı için (bkz. `app/claim_codes.py`) her
+drop'un kendi filtresi vardır. Filtrede olmayan kod kesinlikle yoktur; filtrede
+olan kod (~%1 yanlış pozitif) DB'de aranır.
+
+- Açılışta `rebuild` tüm `claims` tablosunu tek sorguda akıtarak filtreleri kurar.
+- `crud.create_claim` ve toplu dağıtım yolları yeni kodları `add` ile ekler.
+- Filtre dolunca iki kat kapasiteli yeni bir katman eklenir (scalable Bloom):
+  yanlış pozitif oranı sınırlı kalır; filtreye eklenmiş kod hiç kaybolmaz.
+
+Çoklu worker: başka bir worker'ın (veya `allocate_drop.py`'nin) oluşturduğu
+claim bu sürecin filtresinde yoktur. Filtrede bulunmayan kodda drop'un filtresi
+en fazla `refresh_interval` saniyede bir DB'den artımlı tazelenir ve kod tekrar
+kontrol edilir:
+
+- Artımlı okuma son görülen claim id'sinden sonrasını ve son `overlap_seconds`
+  içinde oluşturulan satırları alır. PostgreSQL'de id commit'ten önce verildiği
+  için sıra dışı commit edilen claim yalnızca id'ye bakılarak atlanırdı.
+- En fazla `resync_interval` saniyede bir drop'un tüm kodları yeniden okunur
+  (pencereden uzun süren transaction'lar için güvenlik ağı).
+- Son tazeleme başka yazıcıların yeni claim'lerini gördüyse, drop'un claim'leri
+  hâlâ değişiyor sayılır ve `overlap_seconds` boyunca filtre kaçırması DB'ye
+  bırakılır (404 yalnızca DB'den döner).
+
+Tek worker'da filtre eksiksizdir; bunların hiçbiri sorgu üretmez.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List
+
+from sqlalchemy import func, or_, select
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+
+ERROR_RATE = 0.01
+INITIAL_CAPACITY = 1024
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> range:
+        # Çift özetleme (Kirsch-Mitzenmacher): tek blake2b'den k konum.
+        # h1 + i*h2 aritmetik dizisi `range` ile üretilir, mod sonra alınır.
+        value = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=16).digest(), "big")
+        h2 = (value & 0xFFFFFFFFFFFFFFFF) | 1
+        h1 = value >> 64
+        return range(h1, h1 + self.hashes * h2, h2)
+
+    def add(self, item: str) -> None:
+        bits, size = self._bits, self.size
+        for position in self._positions(item):
+            position %= size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits, size = self._bits, self.size
+        for position in self._positions(item):
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class ScalableBloomFilter:
+    """Dolan katmanın yerine iki kat kapasiteli yeni katman ekler; eski katmanlar korunur."""
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY, error_rate: float = ERROR_RATE):
+        self.error_rate = error_rate
+        self._layers: List[BloomFilter] = [BloomFilter(capacity, error_rate)]
+
+    def add(self, item: str) -> None:
+        layer = self._layers[-1]
+        if layer.count >= layer.capacity:
+            # Katmanların toplam yanlış pozitif oranı yakınsasın diye her yeni katman daha sıkı
+            layer = BloomFilter(layer.capacity * 2, self.error_rate / 2 ** len(self._layers))
+            self._layers.append(layer)
+        layer.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in layer for layer in self._layers)
+
+    def __len__(self):
+        return sum(layer.count for layer in self._layers)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(layer._bits) for layer in self._layers)
+
+
+class ClaimCodeFilter:
+    def __init__(
+        self,
+        session_factory,
+        refresh_interval: float = 1.0,
+        resync_interval: float = 60.0,
+        overlap_seconds: float = 30.0,
+        enabled: bool = True,
+    ):
+        self._session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.resync_interval = resync_interval
+        self.overlap_seconds = overlap_seconds
+        self.enabled = enabled
+        self.ready = False
+        self._filters: Dict[int, ScalableBloomFilter] = {}
+        self._last_claim_id: Dict[int, int] = {}
+        self._read_since: Dict[int, datetime] = {}  # son okumanın başladığı an (UTC, artımlı pencere için)
+        self._refreshed_at: Dict[int, float] = {}
+        self._resynced_at: Dict[int, float] = {}
+        self._changed_at: Dict[int, float] = {}  # başka yazıcının claim'i en son ne zaman görüldü
+        self._refresh_locks: Dict[int, asyncio.Lock] = {}
+
+    def _filter(self, drop_id: int) -> ScalableBloomFilter:
+        bloom = self._filters.get(drop_id)
+        if bloom is None:
+            bloom = self._filters[drop_id] = ScalableBloomFilter()
+        return bloom
+
+    def add(self, drop_id: int, code: str) -> None:
+        self._filter(drop_id).add(code)
+
+    def add_many(self, drop_id: int, codes: Iterable[str]) -> None:
+        bloom = self._filter(drop_id)
+        for code in codes:
+            bloom.add(code)
+
+    def forget_drop(self, drop_id: int) -> None:
+        self._filters.pop(drop_id, None)
+        self._last_claim_id.pop(drop_id, None)
+        self._read_since.pop(drop_id, None)
+        self._refreshed_at.pop(drop_id, None)
+        self._resynced_at.pop(drop_id, None)
+        self._changed_at.pop(drop_id, None)
+
+    async def rebuild(self) -> None:
+        """Tüm filtreleri `claims` tablosundan yeniden kurar (açılışta)."""
+        filters: Dict[int, ScalableBloomFilter] = {}
+        last_ids: Dict[int, int] = {}
+        started = datetime.now(timezone.utc)
+        async with self._session_factory() as db:
+            counts = dict((await db.execute(
+                select(models.Claim.drop_id, func.count()).group_by(models.Claim.drop_id)
+            )).all())
+            for drop_id, count in counts.items():
+                filters[drop_id] = ScalableBloomFilter(max(INITIAL_CAPACITY, count * 2))
+            rows = await db.stream(select(models.Claim.drop_id, models.Claim.id, models.Claim.code))
+            async for partition in rows.partitions(10_000):
+                for drop_id, claim_id, code in partition:
+                    filters[drop_id].add(code)
+                    if claim_id > last_ids.get(drop_id, 0):
+                        last_ids[drop_id] = claim_id
+        now = time.monotonic()
+        self._filters, self._last_claim_id = filters, last_ids
+        self._read_since = {drop_id: started for drop_id in filters}
+        self._refreshed_at = {drop_id: now for drop_id in filters}
+        self._resynced_at = dict(self._refreshed_at)
+        self._changed_at = {}
+        self.ready = True
+
+    def _is_stale(self, drop_id: int, now: float) -> bool:
+        return (now - self._refreshed_at.get(drop_id, 0) >= self.refresh_interval
+                or now - self._resynced_at.get(drop_id, 0) >= self.resync_interval)
+
+    async def _refresh(self, drop_id: int) -> None:
+        lock = self._refresh_locks.setdefault(drop_id, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            if not self._is_stale(drop_id, now):
+                return  # bekleyen başka istek az önce tazeledi
+            full = now - self._resynced_at.get(drop_id, 0) >= self.resync_interval
+            last_id = self._last_claim_id.get(drop_id, 0)
+            since = self._read_since.get(drop_id)
+            started = datetime.now(timezone.utc)
+
+            query = select(models.Claim.id, models.Claim.code).where(models.Claim.drop_id == drop_id)
+            if not full:
+                newer = models.Claim.id > last_id
+                if since is not None:
+                    # Sıra dışı commit edilmiş (id'si last_id'den küçük) claim'ler de okunur
+                    newer = or_(newer, models.Claim.created_at >= since - timedelta(seconds=self.overlap_seconds))
+                query = query.where(newer)
+            async with self._session_factory() as db:
+                rows = (await db.execute(query)).all()
+
+            # Claim'ler tek tek silinmediği için tam okuma da mevcut filtreye eklenir;
+            # okuma sırasında `add` ile gelen yerel kodlar kaybolmaz
+            bloom = self._filter(drop_id)
+            unseen = False
+            for claim_id, code in rows:
+                if code not in bloom:
+                    bloom.add(code)
+                    unseen = True
+                last_id = max(last_id, claim_id)
+            self._last_claim_id[drop_id] = last_id
+            self._read_since[drop_id] = started
+            now = time.monotonic()
+            self._refreshed_at[drop_id] = now
+            if full:
+                self._resynced_at[drop_id] = now
+            if unseen:
+                self._changed_at[drop_id] = now
+
+    async def might_exist(self, drop_id: int, code: str) -> bool:
+        """False ise kod kesinlikle yoktur; True ise DB'de aranmalıdır."""
+        if not self.enabled or not self.ready:
+            return True
+        bloom = self._filters.get(drop_id)
+        if bloom is not None and code in bloom:
+            return True
+        if self._is_stale(drop_id, time.monotonic()):
+            await self._refresh(drop_id)
+            if code in self._filter(drop_id):
+                return True
+        # Başka yazıcılar bu drop'a hâlâ claim ekliyorsa henüz görünmeyen commit olabilir
+        changed_at = self._changed_at.get(drop_id)
+        return changed_at is not None and time.monotonic() - changed_at < self.overlap_seconds
+
+
+claim_filter = ClaimCodeFilter(
+    SessionLocal,
+    refresh_interval=settings.claim_filter_refresh_ms / 1000,
+    resync_interval=settings.claim_filter_resync_seconds,
+    overlap_seconds=settings.claim_filter_overlap_seconds,
+    enabled=settings.claim_filter_enabled,
+)
@@ -0,0 +1,213 @@
+"""
+Uygulama ayarları. Tüm değerler ortam değişkenlerinden (veya `.env`
+dosyasından) import anında bir kez okunur; varsayılanlar yerel geliştirme
+içindir. Diğer modüller `os.getenv` yerine `settings`'i kullanır.
+
+Import anında yapılan tek dosya sistemi işi `.env` okumasıdır: engine ve
+süreç içi yapılar (`database.engine`, önbellekler, filtreler) import anında bu
+ayarlarla kurulduğu için `.env` lifespan'e ertelenemez.
+"""
+
+import os
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    # --- Kimlik doğrulama (JWT); SECRET_KEY boşsa uygulama açılışta durur ---
+    secret_key: str = ""
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+
+    # --- Veritabanı ---
+    database_url: str = "sqlite:///./dropspot.db"
+    db_echo: bool = False
+    # Açılışta şema oluşturma / eksik sütun ve indeks ekleme. Şemayı önceden
+    # hazırlayan (`python -m app.startup`) çok worker'lı kurulumlarda 0.
+    schema_migrate: bool = True
+
+    # Bağlantı havuzu (QueuePool)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Açılışta önceden açılan bağlantı sayısı (en fazla db_pool_size, 0 = kapalı)
+    db_pool_warm: int = 2
+
+    # PostgreSQL: tek bir ifadenin en fazla süresi (ms, 0 = sınırsız)
+    db_statement_timeout_ms: int = 5000
+
+    # SQLite pragmaları
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_foreign_keys: bool = True
+
+    # --- Stok kapısı ---
+    stock_gate_backend: str = "memory"
+    stock_gate_path: str = "./stock_gate.db"
+
+    # --- Hız sınırı (claim/join): saniyede jeton ve kova boyutu, 0 = kapalı ---
+    rate_limit_backend: str = "memory"
+    rate_limit_path: str = "./rate_limit.db"
+    rate_limit_max_keys: int = 100_000
+    rate_limit_shards: int = 16
+    rate_limit_user_per_second: int = 2
+    rate_limit_user_burst: int = 5
+    rate_limit_ip_per_second: int = 20
+    rate_limit_ip_burst: int = 50
+    rate_limit_drop_per_second: int = 500
+    rate_limit_drop_burst: int = 1000
+
+    # --- Waitlist join alımı: "direct" (her join kendi transaction'ı) veya "buffered" (günlük + toplu yazım) ---
+    waitlist_ingest_mode: str = "direct"
+    join_journal_path: str = "./waitlist.journal"
+    join_flush_interval_ms: int = 5
+    join_journal_fsync: bool = True
+
+    # --- Claim modu: "race" (ilk gelen) veya "fair" (waitlist önceliği, toplu dağıtım) ---
+    claim_mode: str = "race"
+    fair_claim_batch_ms: int = 50
+
+    # --- Claim kodları (boşsa SECRET_KEY kullanılır) ---
+    claim_code_secret: str = ""
+    # Var olmayan kodları DB'siz reddeden Bloom filtresi; diğer worker'ların claim'leri için tazeleme aralığı
+    claim_filter_enabled: bool = True
+    claim_filter_refresh_ms: int = 1000
+    # Sıra dışı commit edilen claim'ler için: artımlı okumanın geriye bakış penceresi ve drop'un baştan okunması
+    claim_filter_overlap_seconds: int = 30
+    claim_filter_resync_seconds: int = 60
+
+    # --- Kimlik doğrulama önbelleği ---
+    auth_cache_ttl_seconds: int = 300
+    auth_cache_max_entries: int = 100_000
+
+    # --- Drop listesi önbelleği (GET /drops) ---
+    drop_list_cache_ttl_seconds: float = 5.0
+
+    # GET /drops ve claim yanıtları sütun tuple'larından orjson ile kodlanır (app/serialization.py)
+    fast_serialization: bool = False
+
+    # --- Kullanıcı paneli önbelleği (GET /me/drops) ---
+    user_drops_cache_ttl_seconds: float = 5.0
+    user_drops_cache_max_entries: int = 10_000
+
+    # --- Waitlist sıra indeksi (GET /drops/{id}/waitlist/position) ---
+    # Diğer worker'ların join'leri için artımlı tazeleme; leave'leri için drop'un baştan yüklenmesi
+    waitlist_index_refresh_ms: int = 1000
+    waitlist_index_resync_seconds: int = 60
+
+    # --- Claim penceresi zamanlayıcısı ---
+    # Açılıştan kaç sn önce stok kapısı ısıtılır; diğer worker'ların pencere değişiklikleri için okuma aralığı
+    window_prewarm_seconds: float = 2.0
+    window_resync_seconds: int = 10
+    # Kapalı pencere 403'ü bundan eski sınırlarla verilmez (drop'un sınırları DB'den yeniden okunur)
+    window_recheck_ms: int = 1000
+
+    # --- Idempotency-Key (claim/join/leave): ilk yanıt bellekte ve DB'de saklanıp tekrarlarda aynen döner ---
+    idempotency_cache_ttl_seconds: int = 300
+    idempotency_cache_max_entries: int = 100_000
+    idempotency_key_ttl_seconds: int = 86_400
+    # Yanıtı yazılmamış (işleniyor) kayıt bu kadar sn sonra terk edilmiş sayılır (çöken worker)
+    idempotency_lock_seconds: int = 60
+
+    # --- Canlı drop olayları (GET /drops/{id}/events) ---
+    event_coalesce_ms: int = 100
+    event_max_queue: int = 16
+    event_keepalive_seconds: int = 15
+
+    # --- İstek metrikleri (GET /metrics) ve Server-Timing başlığı ---
+    request_metrics: bool = True
+    server_timing: bool = False
+
+    # --- Parola hash'leme ---
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_queue: int = 64
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()  # ortamda zaten tanımlı değişkenleri ezmez
+        return cls(
+            secret_key=os.getenv("SECRET_KEY", cls.secret_key),
+            algorithm=os.getenv("ALGORITHM", cls.algorithm),
+            access_token_expire_minutes=_env_int("ACCESS_TOKEN_EXPIRE_MINUTES", cls.access_token_expire_minutes),
+            database_url=os.getenv("DATABASE_URL", cls.database_url),
+            db_echo=_env_bool("DB_ECHO", cls.db_echo),
+            schema_migrate=_env_bool("SCHEMA_MIGRATE", cls.schema_migrate),
+            db_pool_size=_env_int("DB_POOL_SIZE", cls.db_pool_size),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", cls.db_max_overflow),
+            db_pool_timeout=_env_int("DB_POOL_TIMEOUT", cls.db_pool_timeout),
+            db_pool_recycle=_env_int("DB_POOL_RECYCLE", cls.db_pool_recycle),
+            db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", cls.db_pool_pre_ping),
+            db_pool_warm=_env_int("DB_POOL_WARM", cls.db_pool_warm),
+            db_statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", cls.db_statement_timeout_ms),
+            sqlite_journal_mode=os.getenv("SQLITE_JOURNAL_MODE", cls.sqlite_journal_mode),
+            sqlite_synchronous=os.getenv("SQLITE_SYNCHRONOUS", cls.sqlite_synchronous),
+            sqlite_busy_timeout_ms=_env_int("SQLITE_BUSY_TIMEOUT_MS", cls.sqlite_busy_timeout_ms),
+            sqlite_foreign_keys=_env_bool("SQLITE_FOREIGN_KEYS", cls.sqlite_foreign_keys),
+            stock_gate_backend=os.getenv("STOCK_GATE_BACKEND", cls.stock_gate_backend),
+            stock_gate_path=os.getenv("STOCK_GATE_PATH", cls.stock_gate_path),
+            rate_limit_backend=os.getenv("RATE_LIMIT_BACKEND", cls.rate_limit_backend),
+            rate_limit_path=os.getenv("RATE_LIMIT_PATH", cls.rate_limit_path),
+            rate_limit_max_keys=_env_int("RATE_LIMIT_MAX_KEYS", cls.rate_limit_max_keys),
+            rate_limit_shards=_env_int("RATE_LIMIT_SHARDS", cls.rate_limit_shards),
+            rate_limit_user_per_second=_env_int("RATE_LIMIT_USER_PER_SECOND", cls.rate_limit_user_per_second),
+            rate_limit_user_burst=_env_int("RATE_LIMIT_USER_BURST", cls.rate_limit_user_burst),
+            rate_limit_ip_per_second=_env_int("RATE_LIMIT_IP_PER_SECOND", cls.rate_limit_ip_per_second),
+            rate_limit_ip_burst=_env_int("RATE_LIMIT_IP_BURST", cls.rate_limit_ip_burst),
+            rate_limit_drop_per_second=_env_int("RATE_LIMIT_DROP_PER_SECOND", cls.rate_limit_drop_per_second),
+            rate_limit_drop_burst=_env_int("RATE_LIMIT_DROP_BURST", cls.rate_limit_drop_burst),
+            waitlist_ingest_mode=os.getenv("WAITLIST_INGEST_MODE", cls.waitlist_ingest_mode),
+            join_journal_path=os.getenv("JOIN_JOURNAL_PATH", cls.join_journal_path),
+            join_flush_interval_ms=_env_int("JOIN_FLUSH_INTERVAL_MS", cls.join_flush_interval_ms),
+            join_journal_fsync=_env_bool("JOIN_JOURNAL_FSYNC", cls.join_journal_fsync),
+            claim_mode=os.getenv("CLAIM_MODE", cls.claim_mode),
+            fair_claim_batch_ms=_env_int("FAIR_CLAIM_BATCH_MS", cls.fair_claim_batch_ms),
+            claim_code_secret=os.getenv("CLAIM_CODE_SECRET", cls.claim_code_secret),
+            claim_filter_enabled=_env_bool("CLAIM_FILTER_ENABLED", cls.claim_filter_enabled),
+            claim_filter_refresh_ms=_env_int("CLAIM_FILTER_REFRESH_MS", cls.claim_filter_refresh_ms),
+            claim_filter_overlap_seconds=_env_int("CLAIM_FILTER_OVERLAP_SECONDS", cls.claim_filter_overlap_seconds),
+            claim_filter_resync_seconds=_env_int("CLAIM_FILTER_RESYNC_SECONDS", cls.claim_filter_resync_seconds),
+            auth_cache_ttl_seconds=_env_int("AUTH_CACHE_TTL_SECONDS", cls.auth_cache_ttl_seconds),
+            auth_cache_max_entries=_env_int("AUTH_CACHE_MAX_ENTRIES", cls.auth_cache_max_entries),
+            drop_list_cache_ttl_seconds=float(os.getenv("DROP_LIST_CACHE_TTL_SECONDS", cls.drop_list_cache_ttl_seconds)),
+            fast_serialization=_env_bool("FAST_SERIALIZATION", cls.fast_serialization),
+            user_drops_cache_ttl_seconds=float(os.getenv("USER_DROPS_CACHE_TTL_SECONDS", cls.user_drops_cache_ttl_seconds)),
+            user_drops_cache_max_entries=_env_int("USER_DROPS_CACHE_MAX_ENTRIES", cls.user_drops_cache_max_entries),
+            waitlist_index_refresh_ms=_env_int("WAITLIST_INDEX_REFRESH_MS", cls.waitlist_index_refresh_ms),
+            waitlist_index_resync_seconds=_env_int("WAITLIST_INDEX_RESYNC_SECONDS", cls.waitlist_index_resync_seconds),
+            window_prewarm_seconds=float(os.getenv("WINDOW_PREWARM_SECONDS", cls.window_prewarm_seconds)),
+            window_resync_seconds=_env_int("WINDOW_RESYNC_SECONDS", cls.window_resync_seconds),
+            window_recheck_ms=_env_int("WINDOW_RECHECK_MS", cls.window_recheck_ms),
+            idempotency_cache_ttl_seconds=_env_int("IDEMPOTENCY_CACHE_TTL_SECONDS", cls.idempotency_cache_ttl_seconds),
+            idempotency_cache_max_entries=_env_int("IDEMPOTENCY_CACHE_MAX_ENTRIES", cls.idempotency_cache_max_entries),
+            idempotency_key_ttl_seconds=_env_int("IDEMPOTENCY_KEY_TTL_SECONDS", cls.idempotency_key_ttl_seconds),
+            idempotency_lock_seconds=_env_int("IDEMPOTENCY_LOCK_SECONDS", cls.idempotency_lock_seconds),
+            event_coalesce_ms=_env_int("EVENT_COALESCE_MS", cls.event_coalesce_ms),
+            event_max_queue=_env_int("EVENT_MAX_QUEUE", cls.event_max_queue),
+            event_keepalive_seconds=_env_int("EVENT_KEEPALIVE_SECONDS", cls.event_keepalive_seconds),
+            request_metrics=_env_bool("REQUEST_METRICS", cls.request_metrics),
+            server_timing=_env_bool("SERVER_TIMING", cls.server_timing),
+            bcrypt_rounds=_env_int("BCRYPT_ROUNDS", cls.bcrypt_rounds),
+            password_hash_workers=_env_int("PASSWORD_HASH_WORKERS", cls.password_hash_workers),
+            password_hash_max_queue=_env_int("PASSWORD_HASH_MAX_QUEUE", cls.password_hash_max_queue),
+        )
+
+
+settings = Settings.from_env()
@@ -1,100 +1,428 @@
-from sqlalchemy.orm import Session
-from . import models, schemas, security
+from sqlalchemy import and_, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import instrumentation, models, priority, schemas, serialization
+from .claim_codes import claim_codec
+from .claim_filter import claim_filter
+from .events import event_hub
+from .hashing import password_hasher
+from .stock_gate import stock_gate
+from .waitlist_index import waitlist_index
+from .window_scheduler import window_scheduler
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime, timezone
-import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import base64
+import time
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = security.get_password_hash(user.password)
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    # bcrypt CPU'ya bağlı: sınırlı hash havuzunda çalışır (dolu ise HashingOverloaded)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = models.User(email=user.email, password_hash=hashed_password)
     if user.email == "admin@test.com":
         db_user.is_admin = True
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def get_drop(db: Session, drop_id: int):
-    return db.query(models.Drop).filter(models.Drop.id == drop_id).first()
+async def set_user_admin(db: AsyncSession, user_id: int, is_admin: bool):
+    db_user = await get_user(db, user_id)
+    if not db_user:
+        return None
+    db_user.is_admin = is_admin
+    await db.commit()
+    return db_user
+
+async def get_drop(db: AsyncSession, drop_id: int):
+    return await db.get(models.Drop, drop_id)
+
+async def get_drops(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(select(models.Drop).offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def list_drops(
+    db: AsyncSession,
+    window_status: Optional[schemas.DropWindowStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    as_rows: bool = False,
+):
+    """
+    Drop'ları (claim_window_start, id) sırasıyla keyset (cursor) sayfalama ile listeler.
+    OFFSET yerine "son görülen satırdan sonrası" sorgulanır; sayfa derinliği maliyeti artırmaz.
+    `as_rows=True` ise ORM nesnesi yerine `serialization.DROP_FIELDS` sırasıyla sütun satırları döner.
+
+    Dönüş: (drops, next_cursor) veya geçersiz cursor için "INVALID_CURSOR".
+    """
+    if as_rows:
+        query = select(*(getattr(models.Drop, field) for field in serialization.DROP_FIELDS))
+    else:
+        query = select(models.Drop)
+
+    now = datetime.now(timezone.utc)
+    if window_status == schemas.DropWindowStatus.active:
+        query = query.where(models.Drop.claim_window_start <= now, models.Drop.claim_window_end >= now)
+    elif window_status == schemas.DropWindowStatus.upcoming:
+        query = query.where(models.Drop.claim_window_start > now)
+    elif window_status == schemas.DropWindowStatus.ended:
+        query = query.where(models.Drop.claim_window_end < now)
+
+    if cursor:
+        try:
+            after_start, after_id = _decode_drop_cursor(cursor)
+        except ValueError:
+            return "INVALID_CURSOR"
+        query = query.where(
+            tuple_(models.Drop.claim_window_start, models.Drop.id) > tuple_(after_start, after_id)
+        )
+
+    query = query.order_by(models.Drop.claim_window_start, models.Drop.id).limit(limit + 1)
+    result = await db.execute(query)
+    drops = result.all() if as_rows else result.scalars().all()
+
+    next_cursor = None
+    if len(drops) > limit:
+        drops = drops[:limit]
+        next_cursor = _encode_drop_cursor(drops[-1])
+    return drops, next_cursor
+
+
+async def get_user_drop_states(db: AsyncSession, user_id: int):
+    """
+    Kullanıcı paneli (GET /me/drops): tüm drop'lar ve kullanıcının her birindeki
+    durumu tek sorguda okunur; ilişkiler (`User.claims` vb.) hiç yüklenmez.
+
+        drops LEFT JOIN waitlist (bu kullanıcı) LEFT JOIN claims (bu kullanıcı)
+
+    Sıra, yalnızca katılınan drop'larda çalışan ilişkili bir alt sorguyla
+    (kendinden önce katılanların sayısı + 1) hesaplanır.
+    Dönüş: (Drop, waitlist_id, claim_code, waitlist_position) satırları.
+    """
+    entry = aliased(models.Waitlist)
+    earlier = aliased(models.Waitlist)
+    position = (
+        select(func.count())
+        .where(earlier.drop_id == models.Drop.id, earlier.id <= entry.id)
+        .correlate(models.Drop, entry)
+        .scalar_subquery()
+    )
+    query = (
+        select(models.Drop, entry.id, models.Claim.code, position)
+        .outerjoin(entry, and_(entry.drop_id == models.Drop.id, entry.user_id == user_id))
+        .outerjoin(models.Claim, and_(models.Claim.drop_id == models.Drop.id, models.Claim.user_id == user_id))
+        .order_by(models.Drop.claim_window_start, models.Drop.id)
+    )
+    return (await db.execute(query)).all()
 
-def get_drops(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Drop).offset(skip).limit(limit).all()
 
-def create_drop(db: Session, drop: schemas.DropCreate):
+def _encode_drop_cursor(db_drop: models.Drop) -> str:
+    raw = f"{db_drop.claim_window_start.isoformat()}|{db_drop.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_drop_cursor(cursor: str):
+    # Bozuk girdide tüm adımlar ValueError (veya alt sınıfı) fırlatır
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    start, drop_id = raw.rsplit("|", 1)
+    return datetime.fromisoformat(start), int(drop_id)
+
+async def create_drop(db: AsyncSession, drop: schemas.DropCreate):
     db_drop = models.Drop(**drop.dict())
     db.add(db_drop)
-    db.commit()
-    db.refresh(db_drop)
+    await db.commit()
+    await db.refresh(db_drop)
+    stock_gate.seed(db_drop.id, db_drop.stock)
+    window_scheduler.track(db_drop.id, db_drop.claim_window_start, db_drop.claim_window_end)
     return db_drop
 
-def update_drop(db: Session, drop_id: int, drop_update: schemas.DropUpdate):
-    db_drop = get_drop(db, drop_id)
+async def update_drop(db: AsyncSession, drop_id: int, drop_update: schemas.DropUpdate):
+    db_drop = await get_drop(db, drop_id)
     if not db_drop:
         return None
     update_data = drop_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_drop, key, value)
-    db.commit()
-    db.refresh(db_drop)
+    await db.commit()
+    stock_gate.invalidate(drop_id) #commit'ten sonra: yeni stok görünür olmalı
+    await db.refresh(db_drop)
+    window_scheduler.track(drop_id, db_drop.claim_window_start, db_drop.claim_window_end)
+    event_hub.publish(drop_id, **drop_event_state(db_drop))
     return db_drop
 
-def delete_drop(db: Session, drop_id: int):
-    db_drop = get_drop(db, drop_id)
+async def delete_drop(db: AsyncSession, drop_id: int):
+    db_drop = await get_drop(db, drop_id)
     if not db_drop:
         return None
-    db.delete(db_drop)
-    db.commit()
+    await db.delete(db_drop)
+    await db.commit()
+    stock_gate.invalidate(drop_id)
+    window_scheduler.forget(drop_id)
+    event_hub.publish(drop_id, deleted=True)
     return db_drop
 
 
+async def create_drops(db: AsyncSession, drops: list):
+    """
+    Toplu drop ekleme (POST /admin/drops/bulk): tek transaction, çok satırlı
+    `INSERT ... VALUES (...), (...) RETURNING id`. Dönüş: girdi sırasıyla yeni id'ler.
+    Önbellek temizliği çağırana bırakılır (parti başına bir kez).
+    """
+    rows = [drop.model_dump() for drop in drops]
+    if db.bind.dialect.name == "sqlite":
+        # sort_by_parameter_order SQLite'ta satır satır INSERT'e düşer. SQLite'ta
+        # tek INSERT'in rowid'leri VALUES sırasıyla artar; sıralı id listesi
+        # girdi sırasına karşılık gelir.
+        drop_ids = sorted((await db.scalars(insert(models.Drop).returning(models.Drop.id), rows)).all())
+    else:
+        # PostgreSQL: sequence değerlerinin VALUES sırasıyla verilmesi garanti
+        # değil; SQLAlchemy sırayı parametrelerle eşleştirerek korur
+        drop_ids = list((await db.scalars(
+            insert(models.Drop).returning(models.Drop.id, sort_by_parameter_order=True), rows
+        )).all())
+    await db.commit()
+    for drop_id, row in zip(drop_ids, rows):
+        stock_gate.seed(drop_id, row["stock"])
+        window_scheduler.track(drop_id, row["claim_window_start"], row["claim_window_end"])
+    return drop_ids
 
-def join_waitlist(db: Session, user_id: int, drop_id: int):
+async def update_drops(db: AsyncSession, updates: list):
+    """
+    Toplu drop güncelleme (PATCH /admin/drops/bulk): var olan id'ler tek sorguda
+    bulunur, güncellemeler ORM'in birincil anahtarla toplu UPDATE'i ile
+    (aynı alan kümesine sahip satırlar tek executemany) tek transaction'da yazılır.
+    Dönüş: (güncellenen id'ler, bulunamayan id'ler).
+    """
+    drop_ids = {update_row.id for update_row in updates}
+    existing = set((await db.scalars(select(models.Drop.id).where(models.Drop.id.in_(drop_ids)))).all())
+    params = [
+        {"id": update_row.id, **update_row.model_dump(exclude_unset=True, exclude={"id"})}
+        for update_row in updates if update_row.id in existing
+    ]
+    if params:
+        await db.execute(update(models.Drop), params)
+    await db.commit()
+
+    # Kalan stok ve yeni pencere sınırları için güncel hal tek sorguda okunur
+    for db_drop in (await db.scalars(select(models.Drop).where(models.Drop.id.in_(existing)))).all():
+        stock_gate.invalidate(db_drop.id)
+        window_scheduler.track(db_drop.id, db_drop.claim_window_start, db_drop.claim_window_end)
+        event_hub.publish(db_drop.id, **drop_event_state(db_drop))
+    return existing, drop_ids - existing
+
+
+def drop_event_state(db_drop: models.Drop) -> dict:
+    """Canlı olay akışında gönderilen drop durumu (stok ve pencere)."""
+    return {
+        "stock": db_drop.stock,
+        "window": models.window_status(db_drop.claim_window_start, db_drop.claim_window_end),
+        "claim_window_start": db_drop.claim_window_start.isoformat(),
+        "claim_window_end": db_drop.claim_window_end.isoformat(),
+    }
+
+
+
+def _insert_ignoring_conflicts(db: AsyncSession, table):
+    """
+    `INSERT ... ON CONFLICT DO NOTHING` (SQLite / PostgreSQL).
+    Çakışan satırlar sessizce atlanır; RETURNING yalnızca eklenenleri döndürür.
+    """
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(table)
+
+
+async def join_waitlist(db: AsyncSession, user_id: int, drop_id: int):
     """
     Kullanıcıyı bir drop'un bekleme listesine ekler.
-    Idempotent: Zaten varsa, hata vermez, mevcut kaydı döndürür.
+    Idempotent: Zaten varsa hata vermez, "ALREADY_IN_WAITLIST" döner.
+
+    Tek ifade: `INSERT ... ON CONFLICT (user_id, drop_id) DO NOTHING RETURNING id`.
+    Drop'un varlığı foreign key ile kontrol edilir (ayrı okuma yok).
     """
-    
-    db_drop = get_drop(db, drop_id)
-    if not db_drop:
+    try:
+        inserted_id = await db.scalar(
+            _insert_ignoring_conflicts(db, models.Waitlist)
+            .values(user_id=user_id, drop_id=drop_id)
+            .on_conflict_do_nothing(index_elements=["user_id", "drop_id"])
+            .returning(models.Waitlist.id)
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback() #FK: drop yok
         return "DROP_NOT_FOUND"
 
-    existing_entry = db.query(models.Waitlist).filter(
-        models.Waitlist.user_id == user_id,
-        models.Waitlist.drop_id == drop_id
-    ).first()
-    
-    if existing_entry:
+    if inserted_id is None:
         return "ALREADY_IN_WAITLIST"
+    waitlist_index.add(drop_id, user_id, inserted_id)
+    return "SUCCESS"
+
+
+async def join_waitlists(db: AsyncSession, user_id: int, drop_ids: list):
+    """
+    Kullanıcıyı birden fazla drop'un bekleme listesine tek ifadeyle ekler:
+    `INSERT INTO waitlist SELECT ... FROM drops WHERE id IN (...) ON CONFLICT DO NOTHING`.
+    Var olmayan drop'lar SELECT'te elenir; yalnızca eklenmeyenler varsa
+    nedenini ayırmak için drops tablosu ikinci kez okunur.
+    """
+    drop_ids = list(dict.fromkeys(drop_ids))
+    inserted = (await db.execute(
+        _insert_ignoring_conflicts(db, models.Waitlist)
+        .from_select(
+            ["user_id", "drop_id"],
+            select(literal(user_id), models.Drop.id).where(models.Drop.id.in_(drop_ids)),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "drop_id"])
+        .returning(models.Waitlist.drop_id, models.Waitlist.id)
+    )).all()
+    await db.commit()
+    waitlist_index.add_many((drop_id, user_id, waitlist_id) for drop_id, waitlist_id in inserted)
+    joined = {drop_id for drop_id, _ in inserted}
+
+    existing = set(drop_ids)
+    if len(joined) < len(drop_ids):
+        existing = set((await db.scalars(
+            select(models.Drop.id).where(models.Drop.id.in_(drop_ids))
+        )).all())
+
+    return schemas.BatchJoinResult(
+        joined=[drop_id for drop_id in drop_ids if drop_id in joined],
+        already_in_waitlist=[drop_id for drop_id in drop_ids if drop_id in existing and drop_id not in joined],
+        not_found=[drop_id for drop_id in drop_ids if drop_id not in existing],
+    )
+
+
+async def insert_waitlist_entries(db: AsyncSession, pairs: list, chunk_size: int = 5000):
+    """
+    (user_id, drop_id) çiftlerini tek transaction'da toplu ekler (tamponlu join modu).
+    Silinmiş drop'lara ait çiftler atlanır; zaten kayıtlı olanlar ON CONFLICT ile yok sayılır.
+    Dönüş: eklenen satır sayısı.
+    """
+    drop_ids = {drop_id for _, drop_id in pairs}
+    existing = set((await db.scalars(select(models.Drop.id).where(models.Drop.id.in_(drop_ids)))).all())
+    rows = [{"user_id": user_id, "drop_id": drop_id} for user_id, drop_id in pairs if drop_id in existing]
 
-    db_waitlist_entry = models.Waitlist(user_id=user_id, drop_id=drop_id)
-    db.add(db_waitlist_entry)
-    db.commit()
-    db.refresh(db_waitlist_entry)
-    return db_waitlist_entry
+    inserted = []
+    for start in range(0, len(rows), chunk_size):
+        inserted.extend((await db.execute(
+            _insert_ignoring_conflicts(db, models.Waitlist)
+            .values(rows[start:start + chunk_size])
+            .on_conflict_do_nothing(index_elements=["user_id", "drop_id"])
+            .returning(models.Waitlist.drop_id, models.Waitlist.user_id, models.Waitlist.id)
+        )).all())
+    await db.commit()
+    waitlist_index.add_many(inserted)
+    return len(inserted)
 
 
-def leave_waitlist(db: Session, user_id: int, drop_id: int):
+async def leave_waitlist(db: AsyncSession, user_id: int, drop_id: int):
     """
     Kullanıcıyı bekleme listesinden kaldırır.
-    Idempotent: Kayıt yoksa hata vermez, başarılı döner.
+    Idempotent: Kayıt yoksa hata vermez, "NOT_IN_WAITLIST" döner.
+    Tek ifade: `DELETE ... RETURNING id`.
     """
-    existing_entry = db.query(models.Waitlist).filter(
-        models.Waitlist.user_id == user_id,
-        models.Waitlist.drop_id == drop_id
-    ).first()
-    
-    if not existing_entry:
+    deleted_id = await db.scalar(
+        delete(models.Waitlist)
+        .where(
+            models.Waitlist.user_id == user_id,
+            models.Waitlist.drop_id == drop_id,
+        )
+        .returning(models.Waitlist.id)
+    )
+    await db.commit()
+
+    if deleted_id is None:
         return "NOT_IN_WAITLIST"
-        
-    db.delete(existing_entry)
-    db.commit()
+    waitlist_index.remove(drop_id, user_id)
     return "SUCCESS"
 
 
-def create_claim(db: Session, user_id: int, drop_id: int):
+async def reserve_idempotency_key(
+    db: AsyncSession, user_id: int, key: str, fingerprint: str, ttl_seconds: int, lock_seconds: int
+):
+    """
+    Idempotency-Key'i bu istek için ayırır (`INSERT ... ON CONFLICT DO NOTHING`).
+    Dönüş: "RESERVED" (istek çalıştırılmalı), "IN_PROGRESS" (başka worker işliyor),
+    "KEY_MISMATCH" (anahtar başka bir istekte kullanılmış) veya saklanmış
+    `models.IdempotencyKey` satırı (yanıt tekrar oynatılır).
+    Süresi dolmuş kayıt silinir; `lock_seconds`'tan eski yarım kayıt devralınır.
+    """
+    now = datetime.now(timezone.utc)
+    owned = (models.IdempotencyKey.user_id == user_id, models.IdempotencyKey.key == key)
+    await db.execute(delete(models.IdempotencyKey).where(
+        *owned, models.IdempotencyKey.created_at < now - timedelta(seconds=ttl_seconds)
+    ))
+    reserved_id = await db.scalar(
+        _insert_ignoring_conflicts(db, models.IdempotencyKey)
+        .values(user_id=user_id, key=key, fingerprint=fingerprint, created_at=now)
+        .on_conflict_do_nothing(index_elements=["user_id", "key"])
+        .returning(models.IdempotencyKey.id)
+    )
+    if reserved_id is not None:
+        await db.commit()
+        return "RESERVED"
+
+    stored = await db.scalar(select(models.IdempotencyKey).where(*owned))
+    if stored is None or stored.fingerprint != fingerprint:
+        await db.commit()
+        return "IN_PROGRESS" if stored is None else "KEY_MISMATCH"
+    if stored.status_code is not None:
+        await db.commit()
+        return stored
+
+    taken_over = await db.execute(
+        update(models.IdempotencyKey)
+        .where(
+            models.IdempotencyKey.id == stored.id,
+            models.IdempotencyKey.status_code.is_(None),
+            models.IdempotencyKey.created_at < now - timedelta(seconds=lock_seconds),
+        )
+        .values(created_at=now)
+    )
+    await db.commit()
+    return "RESERVED" if taken_over.rowcount == 1 else "IN_PROGRESS"
+
+
+async def complete_idempotency_key(
+    db: AsyncSession, user_id: int, key: str, status_code: int, headers: str, body: bytes
+):
+    """Ayrılmış anahtara ilk yanıtı yazar."""
+    await db.execute(
+        update(models.IdempotencyKey)
+        .where(models.IdempotencyKey.user_id == user_id, models.IdempotencyKey.key == key)
+        .values(status_code=status_code, headers=headers, body=body)
+    )
+    await db.commit()
+
+
+async def release_idempotency_key(db: AsyncSession, user_id: int, key: str):
+    """Saklanmayacak yanıtta (5xx, 429) ayırma kaldırılır; tekrar deneme isteği yeniden çalıştırır."""
+    await db.execute(delete(models.IdempotencyKey).where(
+        models.IdempotencyKey.user_id == user_id,
+        models.IdempotencyKey.key == key,
+        models.IdempotencyKey.status_code.is_(None),
+    ))
+    await db.commit()
+
+
+async def purge_idempotency_keys(db: AsyncSession, ttl_seconds: int) -> int:
+    """Süresi dolmuş Idempotency-Key kayıtlarını siler; silinen satır sayısını döner."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)
+    result = await db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.created_at < cutoff))
+    await db.commit()
+    return result.rowcount
+
+
+async def create_claim(db: AsyncSession, user_id: int, drop_id: int):
     """
     Bir drop için hak talebi (claim) oluşturur.
     Bu, projedeki en önemli transaction'dır.
@@ -104,38 +432,49 @@ def create_claim(db: Session, user_id: int, drop_id: int):
     2. Claim penceresi (zamanı) aktif olmalı.
     3. Kullanıcı daha önce claim yapmamış olmalı (DB Unique Constraint).
     4. Stok olmalı (stock > 0).
+
+    Stok düşümü `UPDATE ... SET stock = stock - 1 WHERE id = ? AND stock > 0`
+    ile atomik yapılır; claim insert'ü aynı kısa transaction içindedir.
+    Tükendiği bilinen drop'lar stok kapısında (stock_gate) DB'ye gitmeden reddedilir.
     """
     
-    try:
-        #drop get
-        db_drop = db.query(models.Drop).filter(models.Drop.id == drop_id).first()
-
-        if not db_drop:
-            return "DROP_NOT_FOUND"
+    if stock_gate.is_sold_out(drop_id):
+        return "OUT_OF_STOCK"
 
-        #time check
-        now = datetime.now(timezone.utc)
-        
-        start_time = db_drop.claim_window_start
-        end_time = db_drop.claim_window_end
+    gate_generation = stock_gate.generation(drop_id)
+    now = datetime.now(timezone.utc)
 
-        if start_time.tzinfo is None:
-            start_time = start_time.replace(tzinfo=timezone.utc)
-            
-        if end_time.tzinfo is None:
-            end_time = end_time.replace(tzinfo=timezone.utc)
-
-        if not (start_time <= now <= end_time):
-            return "CLAIM_WINDOW_CLOSED"
+    try:
+        #stock decrement (tek koşullu UPDATE)
+        # Stok ve pencere kontrolü veritabanında, tek bir yazma ifadesiyle yapılır.
+        # Böylece "oku -> kontrol et -> yaz" yarışı (oversell) oluşmaz ve
+        # transaction ilk ifadeden itibaren yazma kilidini alır.
+        result = await db.execute(
+            update(models.Drop)
+            .where(
+                models.Drop.id == drop_id,
+                models.Drop.stock > 0,
+                models.Drop.claim_window_start <= now,
+                models.Drop.claim_window_end >= now,
+            )
+            .values(stock=models.Drop.stock - 1)
+            .returning(models.Drop.stock, *instrumentation.lock_wait_columns(db))
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
 
-        #stock check
-        if db_drop.stock <= 0:
-            return "OUT_OF_STOCK"
+        if row is None:
+            await db.rollback()
+            reason = await _claim_failure_reason(db, drop_id, now)
+            if reason == "OUT_OF_STOCK":
+                stock_gate.seed(drop_id, 0, gate_generation)
+                event_hub.publish(drop_id, stock=0)
+            return reason
+        remaining_stock = row.stock
+        instrumentation.record_lock_wait(row)
 
-        db_drop.stock = db_drop.stock - 1
-        
-        #unique code
-        claim_code = str(uuid.uuid4())
+        #(drop, kullanıcı) çiftinden türetilir: benzersizliği UniqueConstraint garanti eder
+        claim_code = claim_codec.encode(drop_id, user_id)
         
         db_claim = models.Claim(
             user_id=user_id,
@@ -145,15 +484,316 @@ def create_claim(db: Session, user_id: int, drop_id: int):
         
         db.add(db_claim)
         
-        db.commit()
+        await db.commit()
+        stock_gate.seed(drop_id, remaining_stock, gate_generation)
+        event_hub.publish(drop_id, stock=remaining_stock)
+        claim_filter.add(drop_id, claim_code)
         
-        db.refresh(db_claim)
         return db_claim
 
     except IntegrityError:
-        db.rollback() #error
+        await db.rollback() #error (stok düşümü de geri alınır)
         return "ALREADY_CLAIMED"
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Beklenmedik hata: {e}")
-        return "INTERNAL_ERROR"
\ No newline at end of file
+        return "INTERNAL_ERROR"
+
+
+async def get_claim_by_code(db: AsyncSession, code: str):
+    result = await db.execute(select(models.Claim).where(models.Claim.code == code))
+    return result.scalars().first()
+
+
+async def get_claims_by_codes(db: AsyncSession, codes: list, chunk_size: int = 500):
+    """Kod -> Claim sözlüğü; parça başına tek `IN (...)` sorgusu (toplu doğrulama)."""
+    found = {}
+    for start in range(0, len(codes), chunk_size):
+        result = await db.scalars(
+            select(models.Claim).where(models.Claim.code.in_(codes[start:start + chunk_size]))
+        )
+        found.update((claim.code, claim) for claim in result)
+    return found
+
+
+async def redeem_claim(db: AsyncSession, code: str):
+    """
+    Claim'i teslim edildi olarak işaretler. Tek koşullu UPDATE ile atomiktir:
+    aynı kod iki tarayıcıda aynı anda okutulsa bile yalnızca biri başarılı olur.
+    """
+    redeemed = await db.scalar(
+        update(models.Claim)
+        .where(models.Claim.code == code, models.Claim.redeemed_at.is_(None))
+        .values(redeemed_at=datetime.now(timezone.utc))
+        .returning(models.Claim)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if redeemed is not None:
+        return redeemed
+    if await get_claim_by_code(db, code) is None:
+        return "CLAIM_NOT_FOUND"
+    return "ALREADY_REDEEMED"
+
+
+async def stream_claim_export(db: AsyncSession, drop_id: int, chunk_size: int = 1000):
+    """
+    Drop'un claim'lerini (code, email, user_id, created_at, redeemed_at)
+    sunucu tarafı cursor'dan `chunk_size`'lık parçalar halinde verir.
+    ORM nesnesi oluşturulmaz; bellek kullanımı satır sayısından bağımsızdır.
+    """
+    result = await db.stream(
+        select(
+            models.Claim.code, models.User.email, models.Claim.user_id,
+            models.Claim.created_at, models.Claim.redeemed_at,
+        )
+        .join(models.User, models.User.id == models.Claim.user_id)
+        .where(models.Claim.drop_id == drop_id)
+        .order_by(models.Claim.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+
+async def stream_waitlist_export(db: AsyncSession, drop_id: int, chunk_size: int = 1000):
+    """
+    Drop'un waitlist'i katılım sırasıyla: (position, email, user_id, joined_at).
+    Sıra, akış sırasında sayılır (ayrı COUNT / pencere fonksiyonu yok).
+    """
+    result = await db.stream(
+        select(models.User.email, models.Waitlist.user_id, models.Waitlist.created_at)
+        .join(models.User, models.User.id == models.Waitlist.user_id)
+        .where(models.Waitlist.drop_id == drop_id)
+        .order_by(models.Waitlist.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    position = 0
+    async for partition in result.partitions():
+        rows = []
+        for email, user_id, joined_at in partition:
+            position += 1
+            rows.append((position, email, user_id, joined_at))
+        yield rows
+
+
+async def get_waitlist_priority_inputs(db: AsyncSession, drop_id: int):
+    """
+    Drop'un waitlist kayıtları için öncelik formülünün girdilerini hesaplar.
+    Tek sorgu: drop'taki kullanıcıların tüm waitlist geçmişi (alt sorgu ile).
+    """
+    inputs, _ = await get_waitlist_priority_state(db, drop_id)
+    return inputs
+
+
+async def get_waitlist_priority_state(db: AsyncSession, drop_id: int):
+    """`get_waitlist_priority_inputs` + drop'a ilk katılım zamanı (boş listede None)."""
+    drop_members = select(models.Waitlist.user_id).where(models.Waitlist.drop_id == drop_id)
+    rows = (await db.execute(
+        select(models.Waitlist.user_id, models.Waitlist.drop_id, models.Waitlist.created_at)
+        .where(models.Waitlist.user_id.in_(drop_members))
+    )).all()
+
+    history = {}
+    joined_at = {}
+    for user_id, entry_drop_id, created_at in rows:
+        history.setdefault(user_id, []).append(created_at)
+        if entry_drop_id == drop_id:
+            joined_at[user_id] = created_at
+
+    if not joined_at:
+        return [], None
+
+    first_join = min(joined_at.values())
+    inputs = [
+        priority.priority_input(user_id, join_time, first_join, history[user_id])
+        for user_id, join_time in joined_at.items()
+    ]
+    return inputs, first_join
+
+
+async def get_user_priority_input(db: AsyncSession, drop_id: int, user_id: int, first_join: datetime):
+    """
+    Sıralama kurulduktan sonra katılan tek kullanıcının öncelik girdisi.
+    Tek sorgu: kullanıcının kendi waitlist geçmişi (`_user_drop_uc` indeksi).
+    Sonradan katılan drop'un ilk katılım zamanını (`first_join`) değiştirmez;
+    diğer kullanıcıların girdileri aynı kalır.
+
+    Kullanıcı waitlist'te değilse "NOT_IN_WAITLIST"; `first_join`'dan önce
+    katılmışsa (commit'i gecikmiş kayıt, tüm sıralama değişir) "STALE_RANKING".
+    """
+    rows = (await db.execute(
+        select(models.Waitlist.drop_id, models.Waitlist.created_at).where(models.Waitlist.user_id == user_id)
+    )).all()
+    join_time = next((created_at for entry_drop_id, created_at in rows if entry_drop_id == drop_id), None)
+    if join_time is None:
+        return "NOT_IN_WAITLIST"
+    if join_time < first_join:
+        return "STALE_RANKING"
+    return priority.priority_input(user_id, join_time, first_join, [created_at for _, created_at in rows])
+
+
+async def allocate_claims(db: AsyncSession, drop_id: int, user_ids: list, _attempts: int = 3):
+    """
+    Öncelik sırasındaki kullanıcılara mevcut stoğu TEK transaction'da dağıtır
+    (adil claim modu). Stok, koşullu UPDATE ile toplu düşülür; claim'ler tek
+    INSERT ile eklenir.
+
+    Dönüş: {user_id: Claim | "ALREADY_CLAIMED" | "OUT_OF_STOCK"
+                     | "DROP_NOT_FOUND" | "CLAIM_WINDOW_CLOSED" | "INTERNAL_ERROR"}
+    """
+    gate_generation = stock_gate.generation(drop_id)
+    now = datetime.now(timezone.utc)
+
+    try:
+        claimed = set((await db.scalars(
+            select(models.Claim.user_id).where(
+                models.Claim.drop_id == drop_id,
+                models.Claim.user_id.in_(user_ids),
+            )
+        )).all())
+        candidates = [user_id for user_id in user_ids if user_id not in claimed]
+
+        granted, remaining_stock = [], None
+        while candidates:
+            stock = await db.scalar(
+                select(models.Drop.stock).where(
+                    models.Drop.id == drop_id,
+                    models.Drop.claim_window_start <= now,
+                    models.Drop.claim_window_end >= now,
+                )
+            )
+            if stock is None:
+                await db.rollback()
+                reason = await _claim_failure_reason(db, drop_id, now)
+                return {user_id: reason for user_id in user_ids}
+
+            granted = candidates[:stock]
+            if not granted:
+                remaining_stock = 0
+                break
+
+            # Okunan stok değişmediyse düş; eşzamanlı bir claim araya girdiyse tekrar oku
+            remaining_stock = await db.scalar(
+                update(models.Drop)
+                .where(models.Drop.id == drop_id, models.Drop.stock == stock)
+                .values(stock=stock - len(granted))
+                .returning(models.Drop.stock)
+                .execution_options(synchronize_session=False)
+            )
+            if remaining_stock is not None:
+                break
+
+        claims = []
+        if granted:
+            claims = (await db.scalars(
+                insert(models.Claim).returning(models.Claim),
+                [{"user_id": user_id, "drop_id": drop_id, "code": claim_codec.encode(drop_id, user_id)} for user_id in granted],
+            )).all()
+        await db.commit()
+        claim_filter.add_many(drop_id, (claim.code for claim in claims))
+
+    except IntegrityError:
+        # Başka bir worker aynı kullanıcıya claim yazdı: önceden eleme ile tekrar dene
+        await db.rollback()
+        if _attempts > 1:
+            return await allocate_claims(db, drop_id, user_ids, _attempts - 1)
+        return {user_id: "INTERNAL_ERROR" for user_id in user_ids}
+    except Exception as e:
+        await db.rollback()
+        print(f"Beklenmedik hata: {e}")
+        return {user_id: "INTERNAL_ERROR" for user_id in user_ids}
+
+    if remaining_stock is not None:
+        stock_gate.seed(drop_id, remaining_stock, gate_generation)
+        event_hub.publish(drop_id, stock=remaining_stock)
+
+    results = {user_id: "OUT_OF_STOCK" for user_id in candidates}
+    results.update({user_id: "ALREADY_CLAIMED" for user_id in claimed})
+    results.update({claim.user_id: claim for claim in claims})
+    return results
+
+
+async def allocate_drop(db: AsyncSession, drop_id: int):
+    """
+    Drop'un tüm stoğunu waitlist'teki kullanıcılara tek transaction'da dağıtır
+    (çekiliş tipi drop'lar). Kazananlar seed'li öncelik sırasıyla seçilir.
+
+    Claim satırları tek bir executemany ile eklenir ve son stok aynı transaction'da
+    yazılır. Idempotent'tir: claim'i olan kullanıcılar atlanır, stok bittiyse
+    tekrar çalıştırma hiçbir şey eklemez.
+    """
+    started = time.perf_counter()
+    gate_generation = stock_gate.generation(drop_id)
+
+    while True:
+        stock = await db.scalar(select(models.Drop.stock).where(models.Drop.id == drop_id))
+        if stock is None:
+            return "DROP_NOT_FOUND"
+
+        claimed = set((await db.scalars(
+            select(models.Claim.user_id).where(models.Claim.drop_id == drop_id)
+        )).all())
+        if stock <= 0:
+            # Tekrar çalıştırma: sıralama hesaplamaya gerek yok
+            waitlist_size = await db.scalar(
+                select(func.count()).select_from(models.Waitlist).where(models.Waitlist.drop_id == drop_id)
+            )
+            winners = []
+            break
+
+        ranking = priority.rank_waitlist(drop_id, await get_waitlist_priority_inputs(db, drop_id))
+        waitlist_size = len(ranking)
+        winners = [user_id for user_id in ranking if user_id not in claimed][:stock]
+        if not winners:
+            break
+
+        # Okunan stok hâlâ geçerliyse yaz; araya tekil bir claim girdiyse baştan oku
+        updated = await db.scalar(
+            update(models.Drop)
+            .where(models.Drop.id == drop_id, models.Drop.stock == stock)
+            .values(stock=stock - len(winners))
+            .returning(models.Drop.id)
+            .execution_options(synchronize_session=False)
+        )
+        if updated is None:
+            await db.rollback()
+            continue
+
+        rows = [{"user_id": user_id, "drop_id": drop_id, "code": claim_codec.encode(drop_id, user_id)} for user_id in winners]
+        await db.execute(insert(models.Claim.__table__), rows)
+        await db.commit()
+        claim_filter.add_many(drop_id, (row["code"] for row in rows))
+        stock -= len(winners)
+        break
+
+    stock_gate.seed(drop_id, stock, gate_generation)
+    event_hub.publish(drop_id, stock=stock)
+
+    elapsed = time.perf_counter() - started
+    return schemas.AllocationReport(
+        drop_id=drop_id,
+        waitlist_size=waitlist_size,
+        allocated=len(winners),
+        already_claimed=len(claimed),
+        remaining_stock=stock,
+        elapsed_ms=round(elapsed * 1000, 1),
+        rows_per_second=round(len(winners) / elapsed, 1) if elapsed > 0 else 0.0,
+    )
+
+
+async def _claim_failure_reason(db: AsyncSession, drop_id: int, now: datetime):
+    """
+    Koşullu UPDATE hiçbir satırı etkilemediğinde nedenini belirler.
+    Sadece başarısız claim'lerde çalışan bir okuma sorgusudur.
+    """
+    db_drop = await get_drop(db, drop_id)
+
+    if not db_drop:
+        return "DROP_NOT_FOUND"
+
+    #time check
+    if models.window_status(db_drop.claim_window_start, db_drop.claim_window_end, now) != "active":
+        return "CLAIM_WINDOW_CLOSED"
+
+    return "OUT_OF_STOCK"
@@ -1,21 +1,134 @@
-from sqlalchemy import create_engine
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./dropspot.db"
+from .config import Settings, settings
+from .instrumentation import TimedAsyncSession
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# Senkron URL'ler async sürücülere çevrilir (aiosqlite / asyncpg)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def to_async_url(url):
+    url = make_url(url)
+    if url.get_backend_name() in ASYNC_DRIVERS and not url.get_dialect().is_async:
+        url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    return url
+
+
+def create_db_engine(url: str = None, cfg: Settings = settings):
+    """
+    Ayarlara göre async SQLAlchemy engine'i oluşturur.
+
+    - SQLite (aiosqlite): WAL journal, `synchronous`, busy timeout ve
+      foreign key pragmaları her yeni bağlantıda uygulanır. WAL ile okuyucular yazanı beklemez.
+    - PostgreSQL (asyncpg): QueuePool boyutları, pre-ping ve statement timeout.
+    """
+    url = to_async_url(url or cfg.database_url)
+
+    if url.get_backend_name() == "sqlite":
+        kwargs = {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": cfg.sqlite_busy_timeout_ms / 1000,
+            },
+        }
+        if url.database in (None, "", ":memory:"):
+            # Bellek içi DB: tüm session'lar tek bağlantıyı paylaşmalı
+            kwargs["poolclass"] = StaticPool
+        else:
+            kwargs["pool_size"] = cfg.db_pool_size
+            kwargs["max_overflow"] = cfg.db_max_overflow
+            kwargs["pool_timeout"] = cfg.db_pool_timeout
+
+        db_engine = create_async_engine(url, echo=cfg.db_echo, **kwargs)
+        _apply_sqlite_pragmas(db_engine, cfg)
+        return db_engine
+
+    connect_args = {}
+    if url.get_backend_name() == "postgresql" and cfg.db_statement_timeout_ms:
+        connect_args["server_settings"] = {"statement_timeout": str(cfg.db_statement_timeout_ms)}
+
+    return create_async_engine(
+        url,
+        echo=cfg.db_echo,
+        pool_size=cfg.db_pool_size,
+        max_overflow=cfg.db_max_overflow,
+        pool_timeout=cfg.db_pool_timeout,
+        pool_recycle=cfg.db_pool_recycle,
+        pool_pre_ping=cfg.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
+def _apply_sqlite_pragmas(db_engine, cfg: Settings):
+    @event.listens_for(db_engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={cfg.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={cfg.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(cfg.sqlite_busy_timeout_ms)}")
+        # SQLite FK'leri varsayılan olarak uygulamaz; waitlist join drop varlığını FK ile doğrular
+        cursor.execute(f"PRAGMA foreign_keys={'ON' if cfg.sqlite_foreign_keys else 'OFF'}")
+        cursor.close()
+
+
+def create_session_factory(db_engine):
+    # expire_on_commit=False: commit sonrası nesneler async bağlamda
+    # tembel yükleme (lazy load) yapmadan serileştirilebilsin.
+    # TimedAsyncSession: commit süresi istek ölçümlerine yazılır (istek dışında etkisiz)
+    return async_sessionmaker(db_engine, class_=TimedAsyncSession, autoflush=False, expire_on_commit=False)
+
+
+engine = create_db_engine()
+
+SessionLocal = create_session_factory(engine)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+
+def add_missing_columns(connection, metadata=None):
+    """
+    Eklemeli (additive) şema göçü: `create_all` var olan tablolara yeni sütun
+    eklemez. Modelde olup tabloda olmayan nullable sütunlar `ALTER TABLE ... ADD
+    COLUMN` ile eklenir (örn. `claims.redeemed_at`). Senkron bağlantı ile
+    `conn.run_sync(add_missing_columns)` şeklinde çağrılır.
+    """
+    metadata = metadata or Base.metadata
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+            )
+
+def add_missing_indexes(connection, metadata=None):
+    """
+    `create_all` var olan tablolara modele sonradan eklenen indeksleri de
+    eklemez; eksik olanlar `CREATE INDEX` ile oluşturulur (örn. `ix_waitlist_drop_id`).
+    """
+    metadata = metadata or Base.metadata
+    inspector = inspect(connection)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,134 @@
+"""
+Toplu drop içe aktarımı / güncellemesi (POST ve PATCH /admin/drops/bulk).
+
+Gövde biçimi `Content-Type` ile seçilir:
+
+- `application/json`     : drop nesnelerinden oluşan dizi (tek seferde okunur)
+- `application/x-ndjson` : satır başına bir nesne, gövde okundukça işlenir
+- `text/csv`             : başlık satırı + satırlar, gövde okundukça işlenir;
+                           boş hücre "verilmedi" sayılır
+
+Her satır `DropCreate` / `DropBulkUpdate` ile doğrulanır; geçerli satırlar
+`CHUNK_SIZE`'lık partiler halinde tek transaction'da yazılır. Hatalı satırlar
+partiyi bozmaz, sonuçta satır numarası ve hata mesajıyla raporlanır.
+"""
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Awaitable, Callable, List, Tuple, Union
+
+from pydantic import BaseModel, ValidationError
+
+from . import schemas
+
+CHUNK_SIZE = 1000
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class UploadError(ValueError):
+    """Gövde bütünüyle okunamıyor (örn. bozuk JSON dizisi)."""
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    # Tırnak içindeki yeni satırlar: çift tırnak sayısı tek ise kayıt devam ediyor
+    pending = ""
+    async for line in _lines(chunks):
+        pending += line
+        if pending.count('"') % 2 == 0:
+            if pending.strip():
+                yield next(csv.reader([pending]))
+            pending = ""
+    if pending.strip():
+        yield next(csv.reader([pending]))
+
+
+async def iter_upload_rows(content_type: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """(satır no, alanlar) üretir; satır okunamıyorsa alanlar yerine hata mesajı."""
+    content_type = content_type.split(";")[0].strip().lower()
+
+    if content_type == "text/csv":
+        header = None
+        row_no = 0
+        async for record in _csv_records(chunks):
+            if header is None:
+                header = [column.strip() for column in record]
+                continue
+            row_no += 1
+            if len(record) != len(header):
+                yield row_no, f"{len(header)} sütun bekleniyordu, {len(record)} geldi"
+                continue
+            yield row_no, {column: value for column, value in zip(header, record) if value != ""}
+        return
+
+    if content_type in NDJSON_TYPES:
+        row_no = 0
+        async for line in _lines(chunks):
+            if not line.strip():
+                continue
+            row_no += 1
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield row_no, "Geçersiz JSON satırı"
+                continue
+            yield row_no, data if isinstance(data, dict) else "Satır bir JSON nesnesi olmalı"
+        return
+
+    body = b"".join([chunk async for chunk in chunks])
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise UploadError("Geçersiz JSON")
+    if not isinstance(items, list):
+        raise UploadError("Gövde bir JSON dizisi olmalı")
+    for row_no, data in enumerate(items, start=1):
+        yield row_no, data if isinstance(data, dict) else "Satır bir JSON nesnesi olmalı"
+
+
+def _errors(exc: ValidationError) -> List[str]:
+    return [".".join(str(part) for part in error["loc"]) + ": " + error["msg"] for error in exc.errors()]
+
+
+async def process_rows(
+    rows: AsyncIterator[Tuple[int, Union[dict, str]]],
+    schema: type,
+    write_chunk: Callable[[List[Tuple[int, BaseModel]]], Awaitable[List[schemas.BulkRowResult]]],
+    chunk_size: int = CHUNK_SIZE,
+) -> schemas.BulkDropResult:
+    """Satırları doğrular, geçerlileri partiler halinde `write_chunk`'a verir."""
+    results: List[schemas.BulkRowResult] = []
+    chunk: List[Tuple[int, BaseModel]] = []
+    async for row_no, data in rows:
+        if isinstance(data, str):
+            results.append(schemas.BulkRowResult(row=row_no, status=schemas.BulkRowStatus.invalid, errors=[data]))
+            continue
+        try:
+            item = schema.model_validate(data)
+        except ValidationError as exc:
+            results.append(schemas.BulkRowResult(row=row_no, status=schemas.BulkRowStatus.invalid, errors=_errors(exc)))
+            continue
+        chunk.append((row_no, item))
+        if len(chunk) >= chunk_size:
+            results.extend(await write_chunk(chunk))
+            chunk = []
+    if chunk:
+        results.extend(await write_chunk(chunk))
+
+    results.sort(key=lambda result: result.row)
+    failed = sum(1 for result in results if result.status in (schemas.BulkRowStatus.invalid, schemas.BulkRowStatus.not_found))
+    return schemas.BulkDropResult(succeeded=len(results) - failed, failed=failed, results=results)
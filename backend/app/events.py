@@ -0,0 +1,133 @@
+"""
+Drop durum değişiklikleri için süreç içi yayın merkezi (fan-out hub).
+
+`crud.create_claim` stok düşümlerini, `crud.update_drop`/`delete_drop` drop
+değişikliklerini buraya yayınlar; `GET /drops/{id}/events` (Server-Sent Events)
+abonelere iletir. Böylece istemciler stok için `GET /drops/`'u yoklamaz.
+
+Birleştirme (coalescing): bir drop için gelen güncellemeler bekleyen tek bir
+"durum" sözlüğünde birleştirilir ve en fazla `coalesce_interval` saniyede bir
+(varsayılan 100 ms) gönderilir. Mesaj bir kez serileştirilir ve her aboneye
+aynı baytlar verilir. Mesajlar tam durum özeti olduğu için yavaş bir abonenin
+kuyruğu dolarsa en eski mesaj atılır; abone yine en güncel durumu alır.
+
+Pencere açılış/kapanış geçişleri `app/window_scheduler.py` tarafından
+sınır anlarında `window` alanıyla yayınlanır.
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, Optional, Set
+
+from .config import settings
+
+
+class Subscription:
+    def __init__(self, hub: "DropEventHub", drop_id: int, max_queue: int):
+        self.hub = hub
+        self.drop_id = drop_id
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    def deliver(self, message: bytes) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()  # en eskisini at; mesajlar tam durum özeti
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class DropEventHub:
+    def __init__(self, coalesce_interval: float = 0.1, max_queue: int = 16):
+        self.coalesce_interval = coalesce_interval
+        self.max_queue = max_queue
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._pending: Dict[int, dict] = {}
+        self._first_pending_at: Dict[int, float] = {}
+        self._flush_handles: Dict[int, asyncio.TimerHandle] = {}
+        self._last_flush: Dict[int, float] = {}
+        self._sequence = 0
+
+    def subscriber_count(self, drop_id: Optional[int] = None) -> int:
+        if drop_id is not None:
+            return len(self._subscribers.get(drop_id, ()))
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, drop_id: int) -> Subscription:
+        subscription = Subscription(self, drop_id, self.max_queue)
+        self._subscribers.setdefault(drop_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.drop_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.drop_id]
+
+    def publish(self, drop_id: int, **changes) -> None:
+        """Değişikliği bekleyen duruma ekler; gönderim birleştirme aralığına göre planlanır."""
+        if drop_id not in self._subscribers:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._pending.setdefault(drop_id, {}).update(changes)
+        self._first_pending_at.setdefault(drop_id, time.time())
+        if drop_id in self._flush_handles:
+            return
+
+        next_allowed = self._last_flush.get(drop_id, 0.0) + self.coalesce_interval
+        delay = max(0.0, next_allowed - loop.time())
+        self._flush_handles[drop_id] = loop.call_later(delay, self._flush, drop_id)
+
+    def _flush(self, drop_id: int) -> None:
+        self._flush_handles.pop(drop_id, None)
+        changes = self._pending.pop(drop_id, None)
+        published_at = self._first_pending_at.pop(drop_id, time.time())
+        subscribers = self._subscribers.get(drop_id)
+        if not changes or not subscribers:
+            return
+
+        self._last_flush[drop_id] = asyncio.get_running_loop().time()
+        self._sequence += 1
+        message = format_sse(self._sequence, {"drop_id": drop_id, "ts": published_at, **changes})
+        for subscription in list(subscribers):
+            subscription.deliver(message)
+
+
+def format_sse(event_id: int, data: dict, event: str = "drop") -> bytes:
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+async def sse_stream(subscription: Subscription, snapshot: dict, is_disconnected, keepalive: float = 15.0):
+    """
+    SSE gövdesini üretir: önce anlık durum, sonra hub mesajları.
+    Mesaj gelmeyen her `keepalive` saniyede bir yorum satırı (ping) gönderilir.
+    """
+    try:
+        yield format_sse(0, snapshot)
+        while True:
+            message = await subscription.get(timeout=keepalive)
+            if await is_disconnected():
+                break
+            yield message if message is not None else b": ping\n\n"
+    finally:
+        subscription.close()
+
+
+event_hub = DropEventHub(
+    coalesce_interval=settings.event_coalesce_ms / 1000,
+    max_queue=settings.event_max_queue,
+)
@@ -0,0 +1,67 @@
+"""
+Admin dışa aktarımları (teslimat için claim kodları, waitlist): CSV / NDJSON akışı.
+
+Satırlar `crud.stream_*_export` ile sunucu tarafı cursor'dan (`yield_per`)
+parça parça okunur, her parça kodlanıp hemen gönderilir. Bellekte hiçbir zaman
+bir parçadan fazlası tutulmaz: 100 satırlık drop ile 5 milyonluk drop aynı
+belleği kullanır.
+
+Akış, isteğin DB session'ından bağımsız kendi session'ını açar; istek
+bağımlılıkları yanıt gövdesi akarken kapanmış olabilir.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, Sequence
+
+from . import schemas
+from .database import SessionLocal
+
+CLAIM_COLUMNS = ("code", "email", "user_id", "created_at", "redeemed_at")
+WAITLIST_COLUMNS = ("position", "email", "user_id", "joined_at")
+
+MEDIA_TYPES = {
+    schemas.ExportFormat.csv: "text/csv; charset=utf-8",
+    schemas.ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_csv(columns: Sequence[str], rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def encode_ndjson(columns: Sequence[str], rows) -> bytes:
+    return "".join(
+        _dumps(dict(zip(columns, [_value(value) for value in row]))) + "\n" for row in rows
+    ).encode()
+
+
+ENCODERS = {
+    schemas.ExportFormat.csv: encode_csv,
+    schemas.ExportFormat.ndjson: encode_ndjson,
+}
+
+
+async def stream_export(
+    rows_source: Callable, drop_id: int, columns: Sequence[str],
+    export_format: schemas.ExportFormat, session_factory=SessionLocal,
+) -> AsyncIterator[bytes]:
+    """`rows_source(db, drop_id)` parçalarını seçilen biçimde bayt olarak üretir."""
+    encode = ENCODERS[export_format]
+    if export_format == schemas.ExportFormat.csv:
+        yield encode(columns, [columns])  # başlık satırı
+    async with session_factory() as db:
+        async for partition in rows_source(db, drop_id):
+            yield encode(columns, partition)
@@ -0,0 +1,107 @@
+"""
+Adil claim modu (`CLAIM_MODE=fair`).
+
+Varsayılan modda (`race`) her claim kendi transaction'ında stok için yarışır;
+en hızlı istemci kazanır. Adil modda claim istekleri drop başına bir öncelik
+kuyruğunda (heap) toplanır ve waitlist öncelik puanına göre sıralanır
+(`app/priority.py`). Her `batch_window` aralığında biriken istekler tek bir
+transaction'da `crud.allocate_claims` ile dağıtılır: stok en yüksek öncelikli
+kullanıcılara gider, gerisi OUT_OF_STOCK alır.
+
+Sıralama (puanlar) drop için ilk claim geldiğinde hesaplanır ve drop'a ilk
+katılım zamanıyla birlikte saklanır. Sıralamada olmayan kullanıcı görülürse
+yalnızca onun anahtarı, kendi waitlist geçmişinden hesaplanıp sıralamaya
+eklenir (sonradan katılan ilk katılım zamanını değiştirmez). Tam hesaplama
+yalnızca kullanıcı ilk katılımdan önce kaydolmuş görünürse (commit'i gecikmiş
+kayıt) tekrarlanır. Waitlist'te olmayan kullanıcılar reddedilir.
+"""
+
+import asyncio
+import heapq
+import itertools
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from . import crud, priority
+from .config import settings
+from .database import SessionLocal
+
+
+class FairClaimQueue:
+    def __init__(self, session_factory, batch_window: float):
+        self._session_factory = session_factory
+        self.batch_window = batch_window
+        # drop_id -> (user_id -> öncelik anahtarı, drop'a ilk katılım zamanı)
+        self._rankings: Dict[int, Tuple[dict, Optional[datetime]]] = {}
+        self._ranking_locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, list] = {}
+        self._allocators: Dict[int, asyncio.Task] = {}
+        self._sequence = itertools.count()
+
+    async def _priority_key(self, drop_id: int, user_id: int) -> Optional[tuple]:
+        ranking = self._rankings.get(drop_id)
+        if ranking is not None and user_id in ranking[0]:
+            return ranking[0][user_id]
+
+        if ranking is not None and ranking[1] is not None:
+            async with self._session_factory() as db:
+                entry = await crud.get_user_priority_input(db, drop_id, user_id, ranking[1])
+            if entry == "NOT_IN_WAITLIST":
+                return None
+            if entry != "STALE_RANKING":
+                key = ranking[0][user_id] = priority.priority_key(drop_id, entry)
+                return key
+
+        lock = self._ranking_locks.setdefault(drop_id, asyncio.Lock())
+        async with lock:
+            current = self._rankings.get(drop_id)
+            if current is not None and current is not ranking and user_id in current[0]:
+                return current[0][user_id]  # bekleyen başka istek az önce yeniledi
+            async with self._session_factory() as db:
+                entries, first_join = await crud.get_waitlist_priority_state(db, drop_id)
+            keys = {entry.user_id: priority.priority_key(drop_id, entry) for entry in entries}
+            current = self._rankings[drop_id] = (keys, first_join)
+        return current[0].get(user_id)
+
+    async def submit(self, drop_id: int, user_id: int):
+        """Claim isteğini kuyruğa alır; dağıtım sonucunu (Claim veya hata kodu) döndürür."""
+        key = await self._priority_key(drop_id, user_id)
+        if key is None:
+            return "NOT_IN_WAITLIST"
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._pending.setdefault(drop_id, []), (key, next(self._sequence), user_id, future))
+        if drop_id not in self._allocators:
+            self._allocators[drop_id] = asyncio.create_task(self._allocate(drop_id))
+        return await future
+
+    async def _allocate(self, drop_id: int) -> None:
+        try:
+            while self._pending.get(drop_id):
+                await asyncio.sleep(self.batch_window)
+                heap = self._pending.pop(drop_id)
+                batch = [heapq.heappop(heap) for _ in range(len(heap))]
+                order = list(dict.fromkeys(user_id for _, _, user_id, _ in batch))
+
+                try:
+                    async with self._session_factory() as db:
+                        results = await crud.allocate_claims(db, drop_id, order)
+                except Exception as e:
+                    print(f"Beklenmedik hata: {e}")
+                    results = {user_id: "INTERNAL_ERROR" for user_id in order}
+
+                for _, _, user_id, future in batch:
+                    if not future.done():
+                        future.set_result(results[user_id])
+        finally:
+            self._allocators.pop(drop_id, None)
+
+    def invalidate(self, drop_id: int) -> None:
+        """Waitlist/drop değiştiğinde saklanan sıralamayı bırakır."""
+        self._rankings.pop(drop_id, None)
+
+
+fair_claim_queue = FairClaimQueue(
+    SessionLocal,
+    batch_window=settings.fair_claim_batch_ms / 1000,
+)
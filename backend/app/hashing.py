@@ -0,0 +1,99 @@
+"""
+Parola hash'leme için sınırlı (bounded) işçi havuzu ve kabul kontrolü.
+
+bcrypt bilerek yavaştır ve CPU'ya bağlıdır. Drop açılmadan hemen önceki bir
+login fırtınasında hash işlemleri event loop'u veya ortak thread havuzunu
+işgal ederse claim endpoint'leri de yavaşlar. Bu yüzden:
+
+- Hash/doğrulama ayrı bir süreç havuzunda (`PASSWORD_HASH_WORKERS`) çalışır.
+  0 verilirse süreç havuzu yerine thread kullanılır (testler / tek çekirdek).
+- Aynı anda bekleyebilecek iş sayısı sınırlıdır
+  (`PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE`). Sınır aşılırsa iş
+  kuyruğa alınmaz, `HashingOverloaded` fırlatılır ve router 503 döner.
+- Gecikme ve kuyruk derinliği `/metrics` üzerinden raporlanır.
+"""
+
+import asyncio
+import time
+
+from . import security
+from .config import settings
+from .metrics import Registry, registry
+
+
+class HashingOverloaded(Exception):
+    """Hash kuyruğu dolu; istek reddedilmeli (503)."""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int, metrics: Registry = registry):
+        self.workers = workers
+        self.max_pending = max(workers, 1) + max_queue
+        self.pending = 0
+        self._executor = None
+
+        self.latency = metrics.histogram(
+            "dropspot_password_hash_seconds",
+            "Parola hash/doğrulama süresi (kuyrukta bekleme dahil).",
+            labelnames=("operation",),
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+        )
+        self.rejected = metrics.counter(
+            "dropspot_password_hash_rejected_total",
+            "Kuyruk dolu olduğu için reddedilen hash işleri.",
+            labelnames=("operation",),
+        )
+        metrics.gauge(
+            "dropspot_password_hash_in_flight",
+            "Çalışan veya kuyrukta bekleyen hash işleri.",
+            lambda: self.pending,
+        )
+        metrics.gauge(
+            "dropspot_password_hash_queue_depth",
+            "Boş işçi bekleyen hash işleri.",
+            lambda: self.queue_depth,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - max(self.workers, 1))
+
+    def _get_executor(self):
+        if self._executor is None and self.workers > 0:
+            # İlk hash'te yüklenir (açılışta import maliyeti yok).
+            # spawn: çalışan thread'leri olan süreçten fork almaktan kaçınılır
+            from concurrent.futures import ProcessPoolExecutor
+            from multiprocessing import get_context
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected.inc(operation=operation)
+            raise HashingOverloaded()
+
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+            self.latency.observe(time.perf_counter() - started, operation=operation)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", security.get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", security.verify_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
@@ -0,0 +1,297 @@
+"""
+Tekrar denemeye dayanıklı claim / join / leave: `Idempotency-Key` başlığı.
+
+Yük dengeleyicide zaman aşımına uğrayan istemci aynı isteği tekrar gönderir;
+anahtar olmadan tekrar, yeni bir transaction açar ve claim için 409
+(`ALREADY_CLAIMED`) alır, kullanıcı kodunu hiç göremez. Anahtarla:
+
+- İlk isteğin yanıtı (durum, başlıklar, gövde) saklanır; aynı kullanıcının aynı
+  anahtarla tekrarı route'a hiç girmeden (hız sınırı, DB, `crud.create_claim`
+  yok) aynı baytları alır ve `Idempotent-Replayed: true` başlığı eklenir.
+- Anahtar kullanıcıya aittir; başka bir yolda (örn. farklı drop) veya farklı
+  gövdeyle (örn. toplu join'de başka `drop_ids`) tekrar kullanılırsa 422 döner.
+- Saklama iki katmanlıdır: süreç içi TTL'li, boyutu sınırlı önbellek ve
+  `idempotency_keys` tablosu (yeniden başlatma ve diğer worker'lar için).
+- Eşzamanlı kopyalar: aynı süreçte ikinci istek ilkinin sonucunu bekler
+  (single-flight); başka worker'da işlenmekte olan anahtar için 409 ve
+  `Retry-After` döner.
+- 5xx, 401 ve 429 yanıtları saklanmaz; anahtar serbest kalır ve tekrar deneme
+  isteği yeniden çalıştırır.
+
+Maliyet: anahtarlı ilk istekte iki kısa yazma (ayırma + yanıt). Anahtarsız
+istekler etkilenmez.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+from starlette.datastructures import Headers
+
+from . import crud, models
+from .config import settings
+from .database import SessionLocal
+from .routers.auth import peek_user_id
+
+# POST /drops/{id}/claim | join | leave ve toplu POST /drops/join
+IDEMPOTENT_PATHS = re.compile(r"^/drops/(\d+/(claim|join|leave)|join)$")
+MAX_KEY_LENGTH = 255
+UNSTORED_STATUSES = (401, 408, 429)
+
+REPLAY_HEADER = (b"idempotent-replayed", b"true")
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status: int
+    headers: Tuple[Tuple[bytes, bytes], ...]
+    body: bytes
+
+    async def send(self, send, replayed: bool = False) -> None:
+        headers = list(self.headers)
+        if replayed:
+            headers.append(REPLAY_HEADER)
+        await send({"type": "http.response.start", "status": self.status, "headers": headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+@dataclass(frozen=True)
+class Outcome:
+    fingerprint: str
+    response: StoredResponse
+    stored: bool  # False: ayırma yapılamadı veya yanıt saklanmadı
+
+
+def error_response(status: int, detail: str, headers: Tuple[Tuple[bytes, bytes], ...] = ()) -> StoredResponse:
+    body = json.dumps({"detail": detail}, ensure_ascii=False, separators=(",", ":")).encode()
+    return StoredResponse(
+        status,
+        ((b"content-length", str(len(body)).encode()), (b"content-type", b"application/json"), *headers),
+        body,
+    )
+
+
+KEY_MISMATCH = error_response(422, "Idempotency-Key başka bir istekte kullanıldı")
+IN_PROGRESS = error_response(409, "Aynı Idempotency-Key ile istek hâlâ işleniyor", ((b"retry-after", b"1"),))
+INVALID_KEY = error_response(400, f"Idempotency-Key 1-{MAX_KEY_LENGTH} karakter olmalı")
+
+
+def is_storable(status: int) -> bool:
+    return status < 500 and status not in UNSTORED_STATUSES
+
+
+def _encode_headers(headers) -> str:
+    return json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers])
+
+
+def _decode_headers(headers: str) -> Tuple[Tuple[bytes, bytes], ...]:
+    return tuple((name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(headers))
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        session_factory,
+        cache_ttl_seconds: float = 300,
+        max_entries: int = 100_000,
+        key_ttl_seconds: int = 86_400,
+        lock_seconds: int = 60,
+    ):
+        self._session_factory = session_factory
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.max_entries = max_entries
+        self.key_ttl_seconds = key_ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._entries = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    def _get(self, scoped: Hashable):
+        entry = self._entries.get(scoped)
+        if entry is None:
+            return None
+        outcome, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(scoped, None)
+            return None
+        return outcome
+
+    def _remember(self, scoped: Hashable, outcome: Outcome) -> None:
+        self._entries[scoped] = (outcome, time.monotonic() + self.cache_ttl_seconds)
+        self._entries.move_to_end(scoped)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Süreç içi önbelleği boşaltır (DB kayıtları kalır)."""
+        self._entries.clear()
+
+    @staticmethod
+    def _replay(outcome: Outcome, fingerprint: str) -> Tuple[StoredResponse, bool]:
+        if outcome.fingerprint != fingerprint:
+            return KEY_MISMATCH, False
+        return outcome.response, outcome.stored
+
+    async def execute(
+        self, user_id: int, key: str, fingerprint: str, handler: Callable[[], Awaitable[StoredResponse]]
+    ) -> Tuple[StoredResponse, bool]:
+        """
+        İsteği anahtar başına en fazla bir kez çalıştırır.
+        Dönüş: (yanıt, tekrar oynatıldı mı).
+        """
+        scoped = (user_id, key)
+        outcome = self._get(scoped)
+        if outcome is not None:
+            return self._replay(outcome, fingerprint)
+
+        in_flight = self._in_flight.get(scoped)
+        if in_flight is not None:
+            return self._replay(await asyncio.shield(in_flight), fingerprint)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[scoped] = future
+        try:
+            outcome, replayed = await self._execute(user_id, key, fingerprint, handler)
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # bekleyen yoksa "never retrieved" uyarısını engelle
+            raise
+        finally:
+            self._in_flight.pop(scoped, None)
+        future.set_result(outcome)
+        return outcome.response, replayed
+
+    async def _execute(self, user_id, key, fingerprint, handler) -> Tuple[Outcome, bool]:
+        async with self._session_factory() as db:
+            reserved = await crud.reserve_idempotency_key(
+                db, user_id, key, fingerprint, self.key_ttl_seconds, self.lock_seconds
+            )
+        if reserved == "KEY_MISMATCH":
+            return Outcome(fingerprint, KEY_MISMATCH, stored=False), False
+        if reserved == "IN_PROGRESS":
+            return Outcome(fingerprint, IN_PROGRESS, stored=False), False
+        if isinstance(reserved, models.IdempotencyKey):
+            response = StoredResponse(reserved.status_code, _decode_headers(reserved.headers), reserved.body)
+            outcome = Outcome(fingerprint, response, stored=True)
+            self._remember((user_id, key), outcome)
+            return outcome, True
+
+        try:
+            response = await handler()
+        except BaseException:
+            await asyncio.shield(self._release(user_id, key))
+            raise
+
+        if not is_storable(response.status):
+            await self._release(user_id, key)
+            return Outcome(fingerprint, response, stored=False), False
+
+        async with self._session_factory() as db:
+            await crud.complete_idempotency_key(
+                db, user_id, key, response.status, _encode_headers(response.headers), response.body
+            )
+        outcome = Outcome(fingerprint, response, stored=True)
+        self._remember((user_id, key), outcome)
+        return outcome, False
+
+    async def _release(self, user_id: int, key: str) -> None:
+        async with self._session_factory() as db:
+            await crud.release_idempotency_key(db, user_id, key)
+
+    async def purge(self) -> int:
+        """Süresi dolmuş DB kayıtlarını siler (açılışta çağrılır)."""
+        async with self._session_factory() as db:
+            return await crud.purge_idempotency_keys(db, self.key_ttl_seconds)
+
+
+async def read_body(receive) -> bytes:
+    """İstek gövdesini sonuna kadar okur (parmak izi için)."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def replay_receive(body: bytes, receive):
+    """Okunmuş gövdeyi uygulamaya tek mesajda tekrar verir; sonrası asıl `receive`."""
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def wrapped():
+        if pending:
+            return pending.pop()
+        return await receive()
+
+    return wrapped
+
+
+def fingerprint(path: str, body: bytes) -> str:
+    return f"POST {path} {hashlib.sha256(body).hexdigest()[:32]}"
+
+
+async def capture_response(app, scope, receive) -> StoredResponse:
+    """Uygulamanın yanıtını istemciye göndermeden toplar."""
+    start = {}
+    chunks = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    headers = tuple((bytes(name), bytes(value)) for name, value in start.get("headers", ()))
+    return StoredResponse(start["status"], headers, b"".join(chunks))
+
+
+class IdempotencyMiddleware:
+    """
+    Saf ASGI: yalnızca `IDEMPOTENT_PATHS`'e gelen, `Idempotency-Key` ve geçerli
+    Bearer token taşıyan POST isteklerine karışır; diğerleri doğrudan geçer.
+    Token'sız/geçersiz token'lı istek route'a bırakılır (401 orada döner).
+    """
+
+    def __init__(self, app, store: "IdempotencyStore" = None):
+        self.app = app
+        self.store = store or idempotency_store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not IDEMPOTENT_PATHS.match(scope["path"]):
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if key is None:
+            return await self.app(scope, receive, send)
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        user_id = peek_user_id(token) if scheme.lower() == "bearer" else None
+        if user_id is None:
+            return await self.app(scope, receive, send)
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            return await INVALID_KEY.send(send)
+
+        body = await read_body(receive)
+        response, replayed = await self.store.execute(
+            user_id,
+            key,
+            fingerprint(scope["path"], body),
+            lambda: capture_response(self.app, scope, replay_receive(body, receive)),
+        )
+        await response.send(send, replayed)
+
+
+idempotency_store = IdempotencyStore(
+    SessionLocal,
+    cache_ttl_seconds=settings.idempotency_cache_ttl_seconds,
+    max_entries=settings.idempotency_cache_max_entries,
+    key_ttl_seconds=settings.idempotency_key_ttl_seconds,
+    lock_seconds=settings.idempotency_lock_seconds,
+)
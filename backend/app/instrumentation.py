@@ -0,0 +1,270 @@
+"""
+İstek başına DB sorgusu sayımı ve sıcak yol (hot path) zamanlaması.
+
+- `RequestMetricsMiddleware` (saf ASGI) her HTTP isteği için bir
+  `RequestStats` nesnesini contextvar'a koyar ve istek bitince route
+  şablonu (örn. `/drops/{drop_id}/claim`) etiketiyle histogramlara yazar.
+- SQLAlchemy `before/after_cursor_execute` olayları her sorgunun süresini
+  o isteğin istatistiğine ekler. Yazma ifadelerinin (INSERT/UPDATE/DELETE)
+  süresi ayrıca tutulur.
+- Kilit beklemesi (`db-lock`, yazma süresinin bir parçası):
+  SQLite'ta transaction'ı açan yazma ifadesinden önce `BEGIN IMMEDIATE`
+  çalıştırılır ve süresi (busy timeout içinde yazma kilidini bekleme) ölçülür;
+  sürücünün örtük `BEGIN`'i de yazma ifadesinde kilidi alacağından davranış
+  değişmez. PostgreSQL'de claim'in koşullu UPDATE'i `RETURNING` ile
+  `clock_timestamp() - statement_timestamp()` döndürür (`lock_wait_columns`):
+  ifadenin başından satır kilidi alınıp satır güncellenene kadar geçen süre.
+  Satır eşleşmezse (stok bitti) satır dönmediğinden bekleme sayılmaz.
+- Sürücü commit'i (aiosqlite/asyncpg) cursor üzerinden geçmez; süresi
+  `TimedAsyncSession.commit` ile ölçülür. Commit içindeki flush ifadeleri
+  zaten `db` süresinde sayıldığı için commit süresinden düşülür.
+- `span("jwt")` gibi adlandırılmış bölümler (örn. JWT çözme) istek
+  içindeki süreyi ayrıca ölçer.
+- `SERVER_TIMING=1` ise yanıtlara `Server-Timing` başlığı eklenir
+  (`db;dur=..., db-write;dur=..., db-lock;dur=..., db-commit;dur=..., jwt;dur=..., app;dur=...`).
+
+Maliyet: istek başına bir contextvar ataması, sorgu ve commit başına iki
+`perf_counter()` çağrısı; kapatmak için `REQUEST_METRICS=0`.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .metrics import Registry, registry
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 10, 20, 50)
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+
+@dataclass
+class RequestStats:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db_seconds: float = 0.0
+    db_write_seconds: float = 0.0
+    db_lock_wait_seconds: float = 0.0
+    commits: int = 0
+    db_commit_seconds: float = 0.0
+    spans: Dict[str, float] = field(default_factory=dict)
+
+    def server_timing(self, total: float) -> str:
+        parts = [
+            f"db;dur={self.db_seconds * 1000:.2f};desc=\"{self.queries} queries\"",
+            f"db-write;dur={self.db_write_seconds * 1000:.2f}",
+            f"db-lock;dur={self.db_lock_wait_seconds * 1000:.2f}",
+            f"db-commit;dur={self.db_commit_seconds * 1000:.2f};desc=\"{self.commits} commits\"",
+        ]
+        parts.extend(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans.items())
+        parts.append(f"app;dur={self.app_seconds(total) * 1000:.2f}")
+        return ", ".join(parts)
+
+    def app_seconds(self, total: float) -> float:
+        return max(total - self.db_seconds - self.db_commit_seconds, 0.0)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("dropspot_request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """İstek içindeki adlandırılmış bir bölümün süresini ölçer (istek dışında etkisizdir)."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.spans[name] = stats.spans.get(name, 0.0) + time.perf_counter() - started
+
+
+def lock_wait_columns(db: AsyncSession) -> tuple:
+    """
+    PostgreSQL'de koşullu UPDATE'in `RETURNING`ine eklenecek kilit bekleme sütunu
+    (`record_lock_wait` ile okunur); diğer veritabanlarında boş.
+    """
+    if not settings.request_metrics or db.get_bind().dialect.name != "postgresql":
+        return ()
+    return ((func.clock_timestamp() - func.statement_timestamp()).label("lock_wait"),)
+
+
+def record_lock_wait(row) -> None:
+    """`lock_wait_columns` ile dönen satırdaki bekleme süresini isteğe yazar."""
+    stats = _current.get()
+    lock_wait = row._mapping.get("lock_wait")
+    if stats is not None and lock_wait is not None:
+        stats.db_lock_wait_seconds += lock_wait.total_seconds()
+
+
+def instrument_engine(db_engine) -> None:
+    sync_engine = getattr(db_engine, "sync_engine", db_engine)
+    sqlite = sync_engine.dialect.name == "sqlite"
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if stats is None:
+            return
+        conn.info.setdefault("dropspot_query_start", []).append(time.perf_counter())
+        if (sqlite and statement.lstrip()[:6].upper() in WRITE_PREFIXES
+                and not conn.connection.driver_connection.in_transaction):
+            # Yazma kilidini ayrı bir adımda al: bekleme süresi ölçülebilsin
+            started = time.perf_counter()
+            cursor.execute("BEGIN IMMEDIATE")
+            stats.db_lock_wait_seconds += time.perf_counter() - started
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if stats is None:
+            return
+        starts = conn.info.get("dropspot_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if statement.lstrip()[:6].upper() in WRITE_PREFIXES:
+            stats.db_write_seconds += elapsed
+
+
+class TimedAsyncSession(AsyncSession):
+    """`commit()` süresini (flush ifadeleri hariç) o isteğin istatistiğine yazar."""
+
+    async def commit(self) -> None:
+        stats = _current.get()
+        if stats is None:
+            return await super().commit()
+        started, statement_seconds = time.perf_counter(), stats.db_seconds
+        try:
+            await super().commit()
+        finally:
+            elapsed = time.perf_counter() - started - (stats.db_seconds - statement_seconds)
+            stats.commits += 1
+            stats.db_commit_seconds += max(elapsed, 0.0)
+
+
+def route_template(scope) -> str:
+    """
+    İsteğin route şablonu (örn. `/drops/{drop_id}/claim`).
+    `include_router` ile eklenen route'ların `path`'i prefix'siz olduğundan şablon,
+    gerçek yoldaki path parametre değerleri adlarıyla değiştirilerek kurulur.
+    Eşleşmeyen yollar tek etikette toplanır (etiket sayısı sınırlı kalsın).
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    segments = scope["path"].split("/")
+    return "/".join(f"{{{names[s]}}}" if s in names else s for s in segments)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app, metrics: Registry = registry, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+        self.requests = metrics.counter(
+            "dropspot_http_requests_total",
+            "HTTP istekleri (route şablonu ve durum koduna göre).",
+            labelnames=("method", "route", "status"),
+        )
+        self.duration = metrics.histogram(
+            "dropspot_http_request_duration_seconds",
+            "İsteğin toplam süresi.",
+            labelnames=("method", "route"),
+            buckets=LATENCY_BUCKETS,
+        )
+        self.db_queries = metrics.histogram(
+            "dropspot_http_request_db_queries",
+            "İstek başına çalışan SQL ifadesi sayısı.",
+            labelnames=("method", "route"),
+            buckets=QUERY_COUNT_BUCKETS,
+        )
+        self.db_seconds = metrics.histogram(
+            "dropspot_http_request_db_seconds",
+            "İstek başına SQL ifadelerinde geçen toplam süre.",
+            labelnames=("method", "route"),
+            buckets=LATENCY_BUCKETS,
+        )
+        self.db_write_seconds = metrics.histogram(
+            "dropspot_http_request_db_write_seconds",
+            "İstek başına INSERT/UPDATE/DELETE ifadelerinde geçen süre.",
+            labelnames=("method", "route"),
+            buckets=LATENCY_BUCKETS,
+        )
+        self.db_lock_wait_seconds = metrics.histogram(
+            "dropspot_http_request_db_lock_wait_seconds",
+            "İstek başına yazma kilidi / satır kilidi beklemesi (yazma süresinin parçası).",
+            labelnames=("method", "route"),
+            buckets=LATENCY_BUCKETS,
+        )
+        self.db_commit_seconds = metrics.histogram(
+            "dropspot_http_request_db_commit_seconds",
+            "İstek başına commit'lerde geçen süre (flush ifadeleri hariç).",
+            labelnames=("method", "route"),
+            buckets=LATENCY_BUCKETS,
+        )
+        self.handler_seconds = metrics.histogram(
+            "dropspot_http_request_handler_seconds",
+            "İstek süresinin DB dışındaki kısmı (auth, serileştirme, uygulama kodu).",
+            labelnames=("method", "route"),
+            buckets=LATENCY_BUCKETS,
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    total = time.perf_counter() - stats.started
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing(total).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._observe(scope, stats, status_code)
+
+    def _observe(self, scope, stats: RequestStats, status_code: int) -> None:
+        labels = {"method": scope["method"], "route": route_template(scope)}
+        total = time.perf_counter() - stats.started
+
+        self.requests.inc(status=str(status_code), **labels)
+        self.duration.observe(total, **labels)
+        self.db_queries.observe(stats.queries, **labels)
+        self.db_seconds.observe(stats.db_seconds, **labels)
+        self.db_write_seconds.observe(stats.db_write_seconds, **labels)
+        self.db_lock_wait_seconds.observe(stats.db_lock_wait_seconds, **labels)
+        self.db_commit_seconds.observe(stats.db_commit_seconds, **labels)
+        self.handler_seconds.observe(stats.app_seconds(total), **labels)
+
+
+def install(app, db_engine) -> None:
+    if not settings.request_metrics:
+        return
+    instrument_engine(db_engine)
+    app.add_middleware(RequestMetricsMiddleware, server_timing=settings.server_timing)
@@ -0,0 +1,222 @@
+"""
+Tamponlu (write-behind) waitlist join alımı: `WAITLIST_INGEST_MODE=buffered`.
+
+Duyuru anlarında çok sayıda `POST /drops/{id}/join` gelir ve varsayılan modda
+her biri kendi SQLite transaction'ını commit eder. Tamponlu modda:
+
+1. Join önce yalnızca-ekleme (append-only) bir günlük dosyasına yazılır.
+   Aynı aralıkta gelen join'ler tek bir `write + fsync` ile diske iner
+   (group commit); istemciye yanıt bu senkron tamamlandıktan sonra döner.
+2. Onaylanan join'ler her `JOIN_FLUSH_INTERVAL_MS` aralığında tek
+   transaction'da `waitlist` tablosuna toplu eklenir
+   (`crud.insert_waitlist_entries`, ON CONFLICT DO NOTHING).
+3. DB'ye yazılmadan önce günlük `<path>.flushing` adına döndürülür; commit
+   sonrası silinir. Açılışta (`start`) her iki dosya da yeniden oynatılır:
+   çökme anında DB'ye inmemiş join'ler kaybolmaz, tekrar oynatma idempotenttir.
+
+Kendi yazısını okuma (read-your-writes): bekleyen join'ler bellekte tutulur;
+aynı kullanıcı tekrar katılırsa "ALREADY_IN_WAITLIST" alır. DB'ye zaten inmiş
+kayıtlar sıra indeksinden (`waitlist_index`) bakılır; böylece yanıt sözleşmesi
+varsayılan moddakiyle aynı kalır. Waitlist'i okuyan
+yollar (leave, adil claim, toplu dağıtım) önce `drain()` ile tamponu boşaltır.
+"""
+
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from . import crud, models
+from .config import settings
+from .database import SessionLocal
+from .waitlist_index import waitlist_index
+
+
+class WaitlistJoinBuffer:
+    def __init__(self, session_factory, journal_path: str, flush_interval: float, fsync: bool = True):
+        self._session_factory = session_factory
+        self.journal_path = journal_path
+        self.flushing_path = journal_path + ".flushing"
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        # Günlüğe yazılmayı bekleyen kayıtlar ve yanıt bekleyen istekler
+        self._unsynced: List[Tuple[int, int]] = []
+        self._sync_waiters: List[asyncio.Future] = []
+        # Onaylanmış fakat DB'ye yazılmamış join'ler (read-your-writes)
+        self._pending: Dict[Tuple[int, int], None] = {}
+        self._flushing_batch: Optional[List[Tuple[int, int]]] = None
+        self._known_drops = set()
+        self._drop_lookups: Dict[int, asyncio.Future] = {}
+
+        self._journal = None
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+
+    # --- yaşam döngüsü ---
+
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            await self._replay()
+            self._journal = open(self.journal_path, "ab")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.drain()
+        self._journal.close()
+        self._journal = None
+
+    async def _replay(self) -> None:
+        """Önceki süreçten kalan (DB'ye inmemiş) join'leri yeniden ekler."""
+        pairs = []
+        for path in (self.flushing_path, self.journal_path):
+            if os.path.exists(path):
+                pairs.extend(_read_journal(path))
+        if pairs:
+            async with self._session_factory() as db:
+                await crud.insert_waitlist_entries(db, list(dict.fromkeys(pairs)))
+        for path in (self.flushing_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # --- istek yolu ---
+
+    async def join(self, user_id: int, drop_id: int) -> str:
+        if self._task is None:
+            await self.start()
+        if not await self._drop_exists(drop_id):
+            return "DROP_NOT_FOUND"
+
+        key = (user_id, drop_id)
+        if key in self._pending:
+            return "ALREADY_IN_WAITLIST"
+        position, _ = await waitlist_index.lookup(drop_id, user_id)
+        if position is not None or key in self._pending:
+            return "ALREADY_IN_WAITLIST"
+        self._pending[key] = None
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._unsynced.append(key)
+        self._sync_waiters.append(waiter)
+        self._wakeup.set()
+        await waiter  # günlük diske indiğinde tamamlanır
+        return "SUCCESS"
+
+    def is_pending(self, user_id: int, drop_id: int) -> bool:
+        return (user_id, drop_id) in self._pending
+
+    def forget_drop(self, drop_id: int) -> None:
+        self._known_drops.discard(drop_id)
+
+    async def _drop_exists(self, drop_id: int) -> bool:
+        if drop_id in self._known_drops:
+            return True
+        # Aynı drop için eşzamanlı ilk join'ler tek sorguyu bekler
+        lookup = self._drop_lookups.get(drop_id)
+        if lookup is None:
+            lookup = self._drop_lookups[drop_id] = asyncio.ensure_future(self._load_drop(drop_id))
+            lookup.add_done_callback(lambda _: self._drop_lookups.pop(drop_id, None))
+        return await asyncio.shield(lookup)
+
+    async def _load_drop(self, drop_id: int) -> bool:
+        async with self._session_factory() as db:
+            found = await db.scalar(select(models.Drop.id).where(models.Drop.id == drop_id))
+        if found is not None:
+            self._known_drops.add(drop_id)
+        return found is not None
+
+    # --- arka plan ---
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except Exception as e:
+                # DB geçici olarak yazılamıyorsa kayıtlar günlükte kalır; sonraki turda denenir
+                print(f"Waitlist tamponu boşaltılamadı: {e}")
+            await asyncio.sleep(self.flush_interval)
+            if self._pending:
+                self._wakeup.set()
+
+    async def _sync_journal(self) -> None:
+        if not self._unsynced:
+            return
+        records, waiters = self._unsynced, self._sync_waiters
+        self._unsynced, self._sync_waiters = [], []
+        data = b"".join(f"{user_id} {drop_id}\n".encode() for user_id, drop_id in records)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_journal, data)
+        except Exception as exc:
+            for key in records:
+                self._pending.pop(key, None)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(exc)
+            raise
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _write_journal(self, data: bytes) -> None:
+        self._journal.write(data)
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    async def drain(self) -> None:
+        """Onaylanmış tüm join'leri DB'ye yazar (okuma yollarından önce çağrılır)."""
+        async with self._flush_lock:
+            if self._journal is None:
+                return
+            await self._sync_journal()
+
+            if self._flushing_batch is None:
+                if not self._pending:
+                    return
+                # Günlüğü döndür: yeni join'ler yeni dosyaya yazılır
+                self._flushing_batch = list(self._pending)
+                self._journal.close()
+                os.replace(self.journal_path, self.flushing_path)
+                self._journal = open(self.journal_path, "ab")
+
+            # Başarısız olursa parti ve .flushing dosyası bir sonraki turda yeniden denenir
+            async with self._session_factory() as db:
+                await crud.insert_waitlist_entries(db, self._flushing_batch)
+
+            os.remove(self.flushing_path)
+            for key in self._flushing_batch:
+                self._pending.pop(key, None)
+            self._flushing_batch = None
+
+
+def _read_journal(path: str):
+    pairs = []
+    with open(path, "rb") as journal:
+        for line in journal:
+            parts = line.split()
+            if len(parts) == 2:  # yarım yazılmış son satır atlanır
+                pairs.append((int(parts[0]), int(parts[1])))
+    return pairs
+
+
+join_buffer = WaitlistJoinBuffer(
+    SessionLocal,
+    journal_path=settings.join_journal_path,
+    flush_interval=settings.join_flush_interval_ms / 1000,
+    fsync=settings.join_journal_fsync,
+)
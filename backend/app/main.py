@@ -1,20 +1,64 @@
 # app/main.py
 
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from .database import engine
-from . import models
-from .routers import auth, admin, drops
+from .config import settings
+from .hashing import password_hasher
+from .idempotency import IdempotencyMiddleware
+from .instrumentation import install as install_instrumentation
+from .join_buffer import join_buffer
+from .metrics import registry
+from .window_scheduler import window_scheduler
+from . import startup
+from .routers import auth, admin, claims, drops, me
+
+startup_seconds = 0.0
+registry.gauge("dropspot_startup_seconds", "Son açılışın (lifespan) süresi.", lambda: startup_seconds)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Import anında DB/dosya işi yapılmaz; şema ve ısıtma burada, süreç başına bir kez (bkz. app/startup.py)
+    global startup_seconds
+    started = time.perf_counter()
+    if not settings.secret_key:
+        raise RuntimeError("SECRET_KEY ayarlanmalı (.env veya ortam değişkeni)")
+    if not startup.preloaded:
+        if settings.schema_migrate:
+            await startup.prepare_database()
+        await asyncio.gather(startup.warm_pool(), startup.preload())
+    else:
+        await startup.warm_pool()
+    await window_scheduler.start() #pencere geçişleri sınır anlarında; açık drop'ların stok kapısı tohumlanır
+    await drops.warm_drop_list_cache()
+    await startup.warm_routes(app)
+    if settings.waitlist_ingest_mode == "buffered":
+        await join_buffer.start() #önceki süreçten kalan günlüğü yeniden oynatır
+    startup_seconds = time.perf_counter() - started
+    yield
+    await window_scheduler.stop()
+    await join_buffer.stop()
+    password_hasher.shutdown()
+    await engine.dispose()
 
-models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="DropSpot API",
     description="Özel ürünler için bekleme listesi ve claim platformu.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Claim/join/leave tekrarlarında ilk yanıt aynen döner (CORS'un içinde: tekrar yanıtları da CORS başlığı alır)
+app.add_middleware(IdempotencyMiddleware)
+
 origins = [
     "http://localhost:3000",
 ]
@@ -27,9 +71,14 @@ app.add_middleware(
     allow_headers=["*"],       
 )
 
+# İstek başına sorgu sayısı / DB süresi metrikleri (GET /metrics, Server-Timing)
+install_instrumentation(app, engine)
+
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 app.include_router(drops.router, prefix="/drops", tags=["Drops"])
+app.include_router(claims.router, prefix="/claims", tags=["Claims"])
+app.include_router(me.router, prefix="/me", tags=["Me"])
 
 
 @app.get("/", tags=["Root"])
@@ -37,4 +86,12 @@ def read_root():
     """
     API'nin çalışıp çalışmadığını kontrol etmek için basit bir endpoint.
     """
-    return {"message": "DropSpot API'ye hoş geldiniz! (SQLite Veritabanı Aktif)"}
\ No newline at end of file
+    return {"message": "DropSpot API'ye hoş geldiniz! (SQLite Veritabanı Aktif)"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """
+    Prometheus text formatında süreç metrikleri.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
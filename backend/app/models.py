@@ -1,8 +1,50 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
+from datetime import datetime, timezone
 from .database import Base
 
+
+def as_utc(value):
+    """Naive değerler UTC kabul edilir; saat dilimi olanlar UTC'ye çevrilir."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    Zamanlar DB sınırında bir kez UTC'ye normalize edilir.
+    SQLite saat dilimini saklamaz (`+03:00` ile gelen değer dönüştürülmeden
+    kesilirdi); yazarken UTC'ye çevrilir, okurken UTC olarak işaretlenir.
+    Uygulama kodu her zaman saat dilimli UTC değer görür.
+
+    Bu değişiklikten önce SQLite'a UTC dışı offset'le yazılmış satırlar
+    düzeltilmez: atılan offset saklanmadığından geri kazanılamaz; bu satırlar
+    yerel saat UTC'ymiş gibi okunur (PostgreSQL `timestamptz` etkilenmez).
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return as_utc(value)
+
+    def process_result_value(self, value, dialect):
+        return as_utc(value)
+
+
+def window_status(start, end, now=None):
+    """Claim penceresinin durumu: "upcoming", "active" veya "ended"."""
+    now = now or datetime.now(timezone.utc)
+    if now < start:
+        return "upcoming"
+    if now > end:
+        return "ended"
+    return "active"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -20,25 +62,35 @@ class Drop(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     description = Column(String)
-    claim_window_start = Column(DateTime(timezone=True), nullable=False)
-    claim_window_end = Column(DateTime(timezone=True), nullable=False)
+    claim_window_start = Column(UTCDateTime, nullable=False)
+    claim_window_end = Column(UTCDateTime, nullable=False)
     stock = Column(Integer, nullable=False)
 
     waitlist_users = relationship("Waitlist", back_populates="drop", cascade="all, delete-orphan")
     claims = relationship("Claim", back_populates="drop", cascade="all, delete-orphan")
 
+    # GET /drops: (claim_window_start, id) sıralı keyset sayfalama ve pencere filtreleri
+    __table_args__ = (
+        Index("ix_drops_window_start_id", "claim_window_start", "id"),
+        Index("ix_drops_window_end", "claim_window_end"),
+    )
+
 class Waitlist(Base):
     __tablename__ = "waitlist"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     drop_id = Column(Integer, ForeignKey("drops.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(UTCDateTime, server_default=func.now())
 
     user = relationship("User", back_populates="waitlist_entries")
     drop = relationship("Drop", back_populates="waitlist_users")
 
-    __table_args__ = (UniqueConstraint('user_id', 'drop_id', name='_user_drop_uc'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'drop_id', name='_user_drop_uc'),
+        # Drop'un waitlist'i ve kullanıcının sırası (id <= ?) tam tablo taraması olmadan sayılır
+        Index("ix_waitlist_drop_id", "drop_id", "id"),
+    )
 
 class Claim(Base):
     __tablename__ = "claims"
@@ -47,9 +99,34 @@ class Claim(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     drop_id = Column(Integer, ForeignKey("drops.id"), nullable=False)
     code = Column(String, unique=True, index=True, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(UTCDateTime, server_default=func.now())
+    # Teslimatta bir kez set edilir (POST /claims/{code}/redeem); eski DB'lere açılışta eklenir
+    redeemed_at = Column(UTCDateTime, nullable=True)
 
     user = relationship("User", back_populates="claims")
     drop = relationship("Drop", back_populates="claims")
 
     __table_args__ = (UniqueConstraint('user_id', 'drop_id', name='_user_drop_claim_uc'),)
+    # created_at INSERT ... RETURNING ile gelir; claim sonrası ayrıca refresh sorgusu gerekmez
+    __mapper_args__ = {"eager_defaults": True}
+
+class IdempotencyKey(Base):
+    """
+    `Idempotency-Key` ile gelen claim/join/leave isteklerinin ilk yanıtı
+    (bkz. app/idempotency.py). `status_code` NULL ise istek hâlâ işleniyor.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    key = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False) #"POST /drops/5/claim <gövde sha256>": anahtar başka istekte kullanılamaz
+    status_code = Column(Integer, nullable=True)
+    headers = Column(String, nullable=True) #JSON: [[ad, değer], ...]
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(UTCDateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="_user_idempotency_key_uc"),
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
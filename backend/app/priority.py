@@ -0,0 +1,81 @@
+"""
+Seed tabanlı waitlist öncelik puanı.
+
+README'deki seed ve katsayılar (`calculate_seed.py` ile aynı türetme):
+
+    priority_score = 1000
+                     + (join_latency_ms % A)
+                     + (account_age_days % B)
+                     - (rapid_actions % C)
+
+Girdiler yalnızca `waitlist` tablosundan hesaplanır (bkz. `crud.get_waitlist_priority_inputs`):
+
+- join_latency_ms: kullanıcının drop'a, ilk katılan kullanıcıdan kaç ms sonra katıldığı
+- account_age_days: kullanıcının ilk waitlist kaydından bu kayda kadar geçen gün
+  (User tablosunda kayıt tarihi tutulmuyor)
+- rapid_actions: bu kayıttan önceki/sonraki 60 sn içinde yaptığı diğer waitlist kayıtları
+
+Eşit puanlar seed + drop + kullanıcıdan türetilen bir hash ile ayrılır; böylece
+aynı veriyle sıralama her çalıştırmada aynıdır.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+SEED = "a1369a5275d8"
+BASE_SCORE = 1000
+RAPID_ACTION_WINDOW = timedelta(seconds=60)
+
+
+def derive_coefficients(seed: str) -> Tuple[int, int, int]:
+    a = 7 + (int(seed[0:2], 16) % 5)
+    b = 13 + (int(seed[2:4], 16) % 7)
+    c = 3 + (int(seed[4:6], 16) % 3)
+    return a, b, c
+
+
+A, B, C = derive_coefficients(SEED)
+
+
+@dataclass(frozen=True)
+class PriorityInput:
+    user_id: int
+    join_latency_ms: int
+    account_age_days: int
+    rapid_actions: int
+
+
+def priority_input(user_id: int, join_time: datetime, first_join: datetime, history: List[datetime]) -> PriorityInput:
+    """`history`: kullanıcının tüm waitlist kayıt zamanları (bu kayıt dahil)."""
+    return PriorityInput(
+        user_id=user_id,
+        join_latency_ms=int((join_time - first_join).total_seconds() * 1000),
+        account_age_days=(join_time - min(history)).days,
+        rapid_actions=sum(1 for ts in history if abs(ts - join_time) <= RAPID_ACTION_WINDOW) - 1,
+    )
+
+
+def priority_score(entry: PriorityInput) -> int:
+    return (
+        BASE_SCORE
+        + (entry.join_latency_ms % A)
+        + (entry.account_age_days % B)
+        - (entry.rapid_actions % C)
+    )
+
+
+def tie_breaker(drop_id: int, user_id: int, seed: str = SEED) -> str:
+    return hashlib.sha256(f"{seed}|{drop_id}|{user_id}".encode()).hexdigest()
+
+
+def priority_key(drop_id: int, entry: PriorityInput) -> Tuple[int, str]:
+    """Küçük anahtar önce gelir: yüksek puan, eşitlikte seed hash'i."""
+    return (-priority_score(entry), tie_breaker(drop_id, entry.user_id))
+
+
+def rank_waitlist(drop_id: int, entries: Iterable[PriorityInput]) -> List[int]:
+    """Kullanıcı id'lerini öncelik sırasıyla döndürür."""
+    ordered = sorted(entries, key=lambda entry: priority_key(drop_id, entry))
+    return [entry.user_id for entry in ordered]
@@ -0,0 +1,192 @@
+"""
+İstek hızı sınırlayıcı (token bucket): claim ve join uçlarını döngüde
+istek atan botlara karşı korur.
+
+Her istek üç kovadan (bucket) geçer; en özelden en genele:
+
+- `user`: token'daki kullanıcı (token önbelleği veya JWT imzası ile, DB'siz)
+- `ip`:   istemci adresi
+- `drop`: drop'a gelen toplam istek (tüm kullanıcılar)
+
+Kova `burst` kadar jetonla başlar ve saniyede `rate` jeton dolar; jeton
+kalmadıysa istek 429 (`Retry-After`) ile reddedilir. Kontrol route
+seviyesindeki bağımlılıkta, DB session'ı açılmadan önce yapılır
+(bkz. `routers/drops.py`). `rate = 0` o kovayı kapatır.
+
+Backend seçimi `RATE_LIMIT_BACKEND` ayarıyla yapılır (stok kapısı ile aynı):
+`memory` (varsayılan, süreç başına; kilitleri parçalı, LRU ile en fazla
+`RATE_LIMIT_MAX_KEYS` kova) veya `sqlite` (aynı makinedeki worker'ların
+paylaştığı yerel dosya, `RATE_LIMIT_PATH`). `sqlite` event loop'ta senkron
+çalışır; dosya kilidi kısa sürede (`busy_timeout`) alınamazsa istek
+engellenmez (fail open), worker donmaz.
+"""
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+from .metrics import Registry, registry
+
+
+class RateLimitBackend(ABC):
+    """Kovaların saklandığı yer. Çoklu worker için paylaşımlı bir backend yazılabilir."""
+
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Bir jeton harcar; izin verildiyse 0, değilse beklenmesi gereken saniyeyi döndürür."""
+
+
+def _refill(tokens: float, elapsed: float, rate: float, burst: int) -> Tuple[float, float]:
+    """(yeni jeton sayısı, bekleme süresi) döndürür."""
+    tokens = min(float(burst), tokens + max(elapsed, 0.0) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Süreç içi kovalar. Anahtarlar `shards` parçaya bölünür; her parçanın
+    kendi kilidi ve LRU sırası vardır. Sınır aşılınca en uzun süredir
+    kullanılmayan kova atılır (atılan kova bir sonraki istekte dolu başlar).
+    """
+
+    def __init__(self, max_keys: int, shards: int = 16):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self._shard_capacity = max(1, max_keys // shards)
+
+    def take(self, key, rate, burst):
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            entry = buckets.get(key)
+            if entry is None:
+                tokens, wait = _refill(float(burst), 0.0, rate, burst)
+            else:
+                tokens, wait = _refill(entry[0], now - entry[1], rate, burst)
+                buckets.move_to_end(key)
+            buckets[key] = (tokens, now)
+            if len(buckets) > self._shard_capacity:
+                buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return sum(len(buckets) for _, buckets in self._shards)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Aynı makinedeki worker'ların paylaştığı dosya tabanlı kovalar.
+    Oku-hesapla-yaz adımı `BEGIN IMMEDIATE` ile süreçler arası atomiktir.
+    Uzun süredir kullanılmayan (zaten dolmuş) kovalar arada bir silinir.
+    """
+
+    PRUNE_EVERY = 1024
+    IDLE_SECONDS = 300
+
+    def __init__(self, path: str, busy_timeout: float = 0.05):
+        self._path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._takes = 0
+        self.busy = 0  # kilit alınamadığı için izin verilen istekler
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            # Dosya ve tablo import anında değil, ilk kullanımda oluşturulur
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                " key TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+            # Kurulumdan sonra istek yolundaki beklemeler kısa tutulur
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rate, burst):
+        try:
+            return self._take(key, rate, burst)
+        except sqlite3.OperationalError:
+            # "database is locked": diğer worker'lar kilidi tutuyor; sınırlayıcı isteği engellemez
+            self.busy += 1
+            return 0.0
+
+    def _take(self, key, rate, burst):
+        conn = self._connect()
+        now = time.time()  # süreçler arası paylaşıldığı için duvar saati
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_limit WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                tokens, wait = _refill(float(burst), 0.0, rate, burst)
+            else:
+                tokens, wait = _refill(row[0], now - row[1], rate, burst)
+            conn.execute(
+                "INSERT INTO rate_limit (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limit WHERE updated < ?", (now - self.IDLE_SECONDS,))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, rules: Dict[str, Tuple[float, int]], metrics: Registry = registry):
+        self.backend = backend
+        # kapsam (user/ip/drop) -> (saniyede jeton, kova boyutu)
+        self.rules = rules
+        self.rejected = metrics.counter(
+            "dropspot_rate_limited_total",
+            "Hız sınırına takılıp 429 ile reddedilen istekler.",
+            labelnames=("action", "scope"),
+        )
+
+    def check(self, action: str, user: Optional[int] = None, ip: Optional[str] = None,
+              drop: Optional[int] = None) -> float:
+        """
+        Kovaları en özelden en genele sırayla dener; reddedilirse bekleme
+        süresini (saniye) döndürür. Özel kovada reddedilen istek, paylaşılan
+        drop kovasından jeton harcamaz.
+        """
+        for scope, value in (("user", user), ("ip", ip), ("drop", drop)):
+            rate, burst = self.rules.get(scope, (0, 0))
+            if value is None or rate <= 0:
+                continue
+            wait = self.backend.take(f"{action}:{scope}:{value}", rate, max(burst, 1))
+            if wait > 0:
+                self.rejected.inc(action=action, scope=scope)
+                return wait
+        return 0.0
+
+
+def _build_backend() -> RateLimitBackend:
+    if settings.rate_limit_backend == "sqlite":
+        return SQLiteRateLimitBackend(settings.rate_limit_path)
+    return InMemoryRateLimitBackend(settings.rate_limit_max_keys, settings.rate_limit_shards)
+
+
+rate_limiter = RateLimiter(
+    _build_backend(),
+    rules={
+        "user": (settings.rate_limit_user_per_second, settings.rate_limit_user_burst),
+        "ip": (settings.rate_limit_ip_per_second, settings.rate_limit_ip_burst),
+        "drop": (settings.rate_limit_drop_per_second, settings.rate_limit_drop_burst),
+    },
+)
@@ -1,44 +1,199 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from .. import crud, schemas, database
 
 from ..routers.auth import get_current_admin_user
-from .. import models
+from ..auth_cache import AuthenticatedUser, token_cache
+from ..cache import drop_list_cache, user_drops_cache
+from ..claim_filter import claim_filter
+from ..drop_import import UploadError, iter_upload_rows, process_rows
+from ..exports import CLAIM_COLUMNS, MEDIA_TYPES, WAITLIST_COLUMNS, stream_export
+from ..fair_queue import fair_claim_queue
+from ..join_buffer import join_buffer
+from ..waitlist_index import waitlist_index
 
 router = APIRouter()
 
 @router.post("/drops", response_model=schemas.Drop, status_code=status.HTTP_201_CREATED)
-def create_new_drop(
+async def create_new_drop(
     drop: schemas.DropCreate, 
-    db: Session = Depends(database.get_db), 
-    admin_user: models.User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(database.get_db), 
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
 ):
-    return crud.create_drop(db=db, drop=drop)
+    db_drop = await crud.create_drop(db=db, drop=drop)
+    drop_list_cache.invalidate()
+    user_drops_cache.invalidate()
+    return db_drop
+
+async def _bulk_upload(request: Request, schema, write_chunk):
+    rows = iter_upload_rows(request.headers.get("content-type", ""), request.stream())
+    try:
+        report = await process_rows(rows, schema, write_chunk)
+    except UploadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        # Satırlar hata verse de önceki partiler yazılmış olabilir: önbellekler parti başına bir kez
+        drop_list_cache.invalidate()
+        user_drops_cache.invalidate()
+    return report
+
+@router.post("/drops/bulk", response_model=schemas.BulkDropResult)
+async def bulk_create_drops(
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    POST /admin/drops/bulk
+    Sezonluk katalog yüklemesi: JSON dizisi, NDJSON veya CSV (bkz. app/drop_import.py).
+    Geçerli satırlar 1000'lik partilerde tek `INSERT ... RETURNING` ile yazılır;
+    sonuç satır bazındadır (created / invalid).
+    """
+    async def write_chunk(chunk):
+        drop_ids = await crud.create_drops(db, [item for _, item in chunk])
+        return [
+            schemas.BulkRowResult(row=row_no, status=schemas.BulkRowStatus.created, id=drop_id)
+            for (row_no, _), drop_id in zip(chunk, drop_ids)
+        ]
+
+    return await _bulk_upload(request, schemas.DropCreate, write_chunk)
+
+@router.patch("/drops/bulk", response_model=schemas.BulkDropResult)
+async def bulk_update_drops(
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    PATCH /admin/drops/bulk
+    Her satır `id` ve değişecek alanları taşır (verilmeyen alanlar korunur).
+    Sonuç satır bazındadır (updated / not_found / invalid).
+    """
+    async def write_chunk(chunk):
+        results, updates = [], []
+        for row_no, item in chunk:
+            if not item.model_fields_set - {"id"}:
+                results.append(schemas.BulkRowResult(
+                    row=row_no, status=schemas.BulkRowStatus.invalid, id=item.id, errors=["Güncellenecek alan yok"]
+                ))
+            else:
+                updates.append((row_no, item))
+        if updates:
+            _, missing = await crud.update_drops(db, [item for _, item in updates])
+            for row_no, item in updates:
+                row_status = schemas.BulkRowStatus.not_found if item.id in missing else schemas.BulkRowStatus.updated
+                results.append(schemas.BulkRowResult(row=row_no, status=row_status, id=item.id))
+        return results
+
+    return await _bulk_upload(request, schemas.DropBulkUpdate, write_chunk)
 
 @router.get("/drops", response_model=List[schemas.Drop])
-def read_all_drops(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db), admin_user: models.User = Depends(get_current_admin_user)):
-    return crud.get_drops(db, skip=skip, limit=limit)
+async def read_all_drops(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(database.get_db), admin_user: AuthenticatedUser = Depends(get_current_admin_user)):
+    return await crud.get_drops(db, skip=skip, limit=limit)
 
 @router.put("/drops/{drop_id}", response_model=schemas.Drop)
-def update_existing_drop(
+async def update_existing_drop(
     drop_id: int, 
     drop_update: schemas.DropUpdate, 
-    db: Session = Depends(database.get_db),
-    admin_user: models.User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
 ):
-    db_drop = crud.update_drop(db, drop_id=drop_id, drop_update=drop_update)
+    db_drop = await crud.update_drop(db, drop_id=drop_id, drop_update=drop_update)
     if db_drop is None:
         raise HTTPException(status_code=404, detail="Drop bulunamadı")
+    drop_list_cache.invalidate()
+    user_drops_cache.invalidate()
     return db_drop
 
 @router.delete("/drops/{drop_id}", response_model=schemas.Drop)
-def delete_existing_drop(
+async def delete_existing_drop(
     drop_id: int, 
-    db: Session = Depends(database.get_db), 
-    admin_user: models.User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(database.get_db), 
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
 ):
-    db_drop = crud.delete_drop(db, drop_id=drop_id)
+    db_drop = await crud.delete_drop(db, drop_id=drop_id)
     if db_drop is None:
         raise HTTPException(status_code=404, detail="Drop bulunamadı")
+    drop_list_cache.invalidate()
+    user_drops_cache.invalidate()
+    fair_claim_queue.invalidate(drop_id)
+    join_buffer.forget_drop(drop_id)
+    claim_filter.forget_drop(drop_id)
+    waitlist_index.forget_drop(drop_id)
     return db_drop
+
+@router.patch("/users/{user_id}", response_model=schemas.User)
+async def update_user_role(
+    user_id: int,
+    user_update: schemas.UserAdminUpdate,
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    Kullanıcının admin yetkisini değiştirir. Eski token'lardaki `is_admin`
+    claim'ine artık güvenilmez: önbellek kaydı silinir, token DB ile doğrulanır.
+    """
+    db_user = await crud.set_user_admin(db, user_id=user_id, is_admin=user_update.is_admin)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
+    token_cache.invalidate_user(user_id)
+    return db_user
+
+@router.post("/drops/{drop_id}/allocate", response_model=schemas.AllocationReport)
+async def allocate_drop_stock(
+    drop_id: int,
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    Drop'un stoğunu waitlist'e öncelik sırasıyla tek transaction'da dağıtır.
+    Tekrar çalıştırılabilir (idempotent); claim'i olanlar atlanır.
+    """
+    await join_buffer.drain() #tamponlu join'ler de çekilişe dahil olsun
+    report = await crud.allocate_drop(db, drop_id=drop_id)
+    if report == "DROP_NOT_FOUND":
+        raise HTTPException(status_code=404, detail="Drop bulunamadı")
+    drop_list_cache.invalidate()
+    user_drops_cache.invalidate()
+    return report
+
+
+async def _export_response(db: AsyncSession, drop_id: int, name: str, rows_source, columns, export_format):
+    if not await crud.get_drop(db, drop_id):
+        raise HTTPException(status_code=404, detail="Drop bulunamadı")
+    await db.close() #akış kendi session'ını açar; bu bağlantı havuza dönsün
+    return StreamingResponse(
+        stream_export(rows_source, drop_id, columns, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="drop-{drop_id}-{name}.{export_format.value}"'},
+    )
+
+@router.get("/drops/{drop_id}/claims.{export_format}")
+async def export_drop_claims(
+    drop_id: int,
+    export_format: schemas.ExportFormat,
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    GET /admin/drops/{drop_id}/claims.csv | .ndjson
+    Teslimat için drop'un tüm claim kodları ve e-postaları; satırlar
+    sunucu tarafı cursor'dan akıtılır (bellek satır sayısından bağımsız).
+    """
+    return await _export_response(db, drop_id, "claims", crud.stream_claim_export, CLAIM_COLUMNS, export_format)
+
+@router.get("/drops/{drop_id}/waitlist.{export_format}")
+async def export_drop_waitlist(
+    drop_id: int,
+    export_format: schemas.ExportFormat,
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    GET /admin/drops/{drop_id}/waitlist.csv | .ndjson
+    Drop'un waitlist'i katılım sırasıyla (position, email, user_id, joined_at).
+    """
+    await join_buffer.drain() #tamponlu join'ler de dışa aktarılsın
+    return await _export_response(db, drop_id, "waitlist", crud.stream_waitlist_export, WAITLIST_COLUMNS, export_format)
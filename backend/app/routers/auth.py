@@ -1,27 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
+from typing import Optional
 from jose import JWTError, jwt
 
 
-from .. import models
 from .. import crud, schemas, database, security
+from ..auth_cache import AuthenticatedUser, token_cache
+from ..hashing import HashingOverloaded, password_hasher
+from ..instrumentation import span
 
 from fastapi.security import OAuth2PasswordBearer   #for dependency injection
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 router = APIRouter()
 
+
+def hashing_overloaded_exception():
+    # Hash kuyruğu dolu: claim yolunu korumak için istek kuyruğa alınmaz
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Sunucu şu anda yoğun, lütfen birazdan tekrar deneyin.",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/signup", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def signup_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def signup_user(user: schemas.UserCreate, db: AsyncSession = Depends(database.get_db)):
+    db_user = await crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Bu e-posta adresi zaten kayıtlı."
         )
-    return crud.create_user(db=db, user=user)
+    try:
+        return await crud.create_user(db=db, user=user)
+    except HashingOverloaded:
+        raise hashing_overloaded_exception()
 
 
 class Token(schemas.BaseModel):
@@ -29,9 +44,9 @@ class Token(schemas.BaseModel):
     token_type: str
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_db)
 ):
     """
     POST /auth/login
@@ -41,9 +56,15 @@ def login_for_access_token(
     Swagger (/docs) arayüzü bunu otomatik olarak halleder.
     """
     
-    user = crud.get_user_by_email(db, email=form_data.username) 
+    user = await crud.get_user_by_email(db, email=form_data.username) 
     
-    if not user or not security.verify_password(form_data.password, user.password_hash):
+    # bcrypt CPU'ya bağlı: doğrulama sınırlı hash havuzunda yapılır
+    try:
+        password_ok = user is not None and await password_hasher.verify(form_data.password, user.password_hash)
+    except HashingOverloaded:
+        raise hashing_overloaded_exception()
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Geçersiz e-posta veya parola",
@@ -52,17 +73,26 @@ def login_for_access_token(
         
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        data={"sub": user.email}, 
+        data={"sub": user.email, "user_id": user.id, "is_admin": bool(user.is_admin)}, 
         expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_db)):
     """
-    Token'ı alır, doğrular ve mevcut kullanıcı modelini döndürür.
+    Token'ı alır, doğrular ve mevcut kullanıcıyı döndürür.
     Korumalı endpoint'ler bunu 'Depends' olarak kullanacak.
+
+    Token 'user_id' ve 'is_admin' claim'lerini taşıdığı için DB'ye gidilmez;
+    doğrulanmış token'lar ayrıca önbellekte tutulur (JWT tekrar çözülmez).
+    DB'ye yalnızca eski biçimli token'larda (sadece 'sub') veya kullanıcı
+    geçersiz kılındıktan önce üretilmiş token'larda gidilir.
     """
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Kimlik bilgileri doğrulanamadı",
@@ -70,20 +100,53 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     )
     
     try:
-        payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
+        with span("jwt"):
+            payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = crud.get_user_by_email(db, email=email)
-    if user is None:
-        raise credentials_exception
-        
+    user_id = payload.get("user_id")
+    if user_id is not None and not token_cache.needs_db_check(user_id, payload.get("iat", 0)):
+        user = AuthenticatedUser(id=user_id, email=email, is_admin=bool(payload.get("is_admin")))
+    else:
+        if user_id is not None:
+            db_user = await crud.get_user(db, user_id=user_id)
+        else:
+            db_user = await crud.get_user_by_email(db, email=email)
+        if db_user is None:
+            raise credentials_exception
+        user = AuthenticatedUser(id=db_user.id, email=db_user.email, is_admin=bool(db_user.is_admin))
+
+    token_cache.put(token, user, payload["exp"])
     return user
 
-async def get_current_admin_user(current_user: models.User = Depends(get_current_user)):
+def peek_user_id(token: Optional[str]) -> Optional[int]:
+    """
+    Token'ın kullanıcı id'sini DB'ye gitmeden döndürür (hız sınırı anahtarı için).
+    Önbellekte yoksa imza doğrulanır; geçersiz veya eski biçimli token'da None.
+    Asıl doğrulama yine `get_current_user` ile yapılır (DB'siz doğrulanabilen
+    token önbelleğe yazılır, JWT ikinci kez çözülmez).
+    """
+    if not token:
+        return None
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user.id
+    try:
+        with span("jwt"):
+            payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
+    except JWTError:
+        return None
+    user_id, email = payload.get("user_id"), payload.get("sub")
+    if user_id is not None and email is not None and not token_cache.needs_db_check(user_id, payload.get("iat", 0)):
+        user = AuthenticatedUser(id=user_id, email=email, is_admin=bool(payload.get("is_admin")))
+        token_cache.put(token, user, payload["exp"])
+    return user_id
+
+async def get_current_admin_user(current_user: AuthenticatedUser = Depends(get_current_user)):
     """
     Mevcut kullanıcının admin olup olmadığını kontrol eder.
     """
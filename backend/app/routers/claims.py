@@ -0,0 +1,113 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from .. import crud, schemas, database
+from ..auth_cache import AuthenticatedUser
+from ..claim_codes import claim_codec, is_legacy_code
+from ..claim_filter import claim_filter
+from ..routers.auth import get_current_admin_user
+
+router = APIRouter()
+
+
+def claim_not_found():
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Claim kodu bulunamadı")
+
+
+async def lookup_code(code: str) -> Optional[str]:
+    """
+    DB'de aranacak kodu döndürür; kesinlikle olmayan kodlarda None.
+    1. Biçim ve kontrol karakterleri (anahtarlı, DB'siz)
+    2. Kodun drop'una ait Bloom filtresi (bkz. app/claim_filter.py)
+    Eski UUID kodlar drop bilgisi taşımadığı için doğrudan DB'de aranır.
+    """
+    if is_legacy_code(code):
+        return code
+    decoded = claim_codec.decode(code)
+    if decoded is None:
+        return None
+    normalized = claim_codec.normalize(code)
+    if not await claim_filter.might_exist(decoded[0], normalized):
+        return None
+    return normalized
+
+
+async def valid_claim_code(code: str) -> str:
+    """Olmayan kodları DB session'ı açılmadan 404 ile reddeder."""
+    normalized = await lookup_code(code)
+    if normalized is None:
+        raise claim_not_found()
+    return normalized
+
+
+@router.post("/verify", response_model=schemas.BulkVerifyResult)
+async def bulk_verify_claims(
+    request: schemas.BulkVerifyRequest,
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    POST /claims/verify
+    Depo tarayıcıları için toplu doğrulama (istek başına en fazla 5000 kod).
+    Filtreden geçen kodlar 500'lük parçalar halinde tek `IN` sorgusuyla aranır.
+    """
+    keys = {code: await lookup_code(code) for code in dict.fromkeys(request.codes)}
+    found = await crud.get_claims_by_codes(db, [key for key in keys.values() if key is not None])
+
+    results = []
+    for code in request.codes:
+        db_claim = found.get(keys[code])
+        if db_claim is None:
+            results.append(schemas.BulkVerifyItem(code=code, status=schemas.ClaimCodeStatus.not_found))
+            continue
+        results.append(schemas.BulkVerifyItem(
+            code=code,
+            status=schemas.ClaimCodeStatus.redeemed if db_claim.redeemed_at else schemas.ClaimCodeStatus.valid,
+            drop_id=db_claim.drop_id,
+            redeemed_at=db_claim.redeemed_at,
+        ))
+    counts = {state: 0 for state in schemas.ClaimCodeStatus}
+    for item in results:
+        counts[item.status] += 1
+    return schemas.BulkVerifyResult(
+        results=results,
+        valid=counts[schemas.ClaimCodeStatus.valid],
+        redeemed=counts[schemas.ClaimCodeStatus.redeemed],
+        not_found=counts[schemas.ClaimCodeStatus.not_found],
+    )
+
+
+@router.get("/{code}", response_model=schemas.ClaimVerification)
+async def verify_claim(
+    code: str = Depends(valid_claim_code),
+    db: AsyncSession = Depends(database.get_db),
+):
+    """
+    GET /claims/{code}
+    Claim kodunu doğrular (örn. teslimat noktasında). Kod büyük/küçük harf ve
+    `-` ayraçlarından bağımsızdır; O/I/L harfleri 0/1 olarak okunur.
+    """
+    db_claim = await crud.get_claim_by_code(db, code=code)
+    if db_claim is None:
+        raise claim_not_found()
+    return db_claim
+
+
+@router.post("/{code}/redeem", response_model=schemas.ClaimVerification)
+async def redeem_claim(
+    code: str = Depends(valid_claim_code),
+    db: AsyncSession = Depends(database.get_db),
+    admin_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """
+    POST /claims/{code}/redeem
+    Claim'i teslim edildi olarak işaretler (`redeemed_at`). Tek seferliktir:
+    ikinci okutma 409 döner.
+    """
+    result = await crud.redeem_claim(db, code=code)
+    if result == "CLAIM_NOT_FOUND":
+        raise claim_not_found()
+    if result == "ALREADY_REDEEMED":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Bu claim zaten teslim edildi")
+    return result
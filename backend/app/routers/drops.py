@@ -1,36 +1,212 @@
 # app/routers/drops.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import math
 
-from .. import crud, schemas, models, database
-from ..routers.auth import get_current_user
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import crud, schemas, database, serialization
+from ..routers.auth import get_current_user, peek_user_id
+from ..auth_cache import AuthenticatedUser
+from ..cache import CachedResponse, drop_list_cache, etag_matches, make_etag, user_drops_cache
+from ..config import settings
+from ..events import event_hub, sse_stream
+from ..fair_queue import fair_claim_queue
+from ..join_buffer import join_buffer
+from ..rate_limit import rate_limiter
+from ..stock_gate import stock_gate
+from ..waitlist_index import waitlist_index
+from ..window_scheduler import window_scheduler
 
 router = APIRouter()
 
+drop_list_adapter = TypeAdapter(List[schemas.Drop])
+
+
+def _fast_serialization() -> bool:
+    # orjson kurulu değilse varsayılan yol (bkz. app/serialization.py)
+    return settings.fast_serialization and serialization.AVAILABLE
+
+
+async def reject_sold_out_drop(drop_id: int):
+    """
+    Stok kapısı: tükendiği bilinen drop için isteği, DB session'ı açılmadan
+    ve kullanıcı doğrulanmadan önce 409 ile reddeder.
+    Route seviyesindeki bağımlılıklar diğerlerinden önce çözülür.
+    """
+    if stock_gate.is_sold_out(drop_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Stok tükendi")
+
+
+async def reject_closed_window(drop_id: int):
+    """
+    Pencere kapısı: claim penceresi açık olmayan drop için isteği, DB
+    session'ı açılmadan 403 ile reddeder (O(1), bkz. app/window_scheduler.py).
+    Başka worker pencereyi değiştirmiş olabileceğinden, son `WINDOW_RECHECK_MS`
+    içinde doğrulanmamış sınırlarla reddetmeden önce drop DB'den yeniden okunur.
+    """
+    closed = ("upcoming", "ended")
+    if window_scheduler.state(drop_id) in closed and await window_scheduler.confirm_state(drop_id) in closed:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Hak talebi penceresi kapalı")
+
+
+def _rate_limit(action: str, request: Request, drop_id: Optional[int] = None):
+    """
+    Hız sınırı: kullanıcı / IP / drop kovalarından biri boşsa isteği, DB
+    session'ı açılmadan önce 429 ile reddeder (bkz. app/rate_limit.py).
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    user_id = peek_user_id(token) if scheme.lower() == "bearer" else None
+    ip = request.client.host if request.client else None
+    wait = rate_limiter.check(action, user=user_id, ip=ip, drop=drop_id)
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Çok fazla istek, lütfen birazdan tekrar deneyin.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+async def limit_claims(drop_id: int, request: Request):
+    _rate_limit("claim", request, drop_id)
+
+
+async def limit_joins(drop_id: int, request: Request):
+    _rate_limit("join", request, drop_id)
+
+
+async def limit_batch_joins(request: Request):
+    _rate_limit("join", request)
+
+
+async def _build_drop_list(
+    db: AsyncSession, status_filter: Optional[schemas.DropWindowStatus], cursor: Optional[str], limit: int
+) -> CachedResponse:
+    fast = _fast_serialization()
+    result = await crud.list_drops(
+        db, window_status=status_filter, cursor=cursor, limit=limit, as_rows=fast
+    )
+    if result == "INVALID_CURSOR":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Geçersiz cursor")
+    drops, next_cursor = result
+    if fast:
+        body = serialization.encode_drops(drops)
+    else:
+        body = drop_list_adapter.dump_json(drop_list_adapter.validate_python(drops, from_attributes=True))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return CachedResponse(etag=make_etag(body), body=body, headers=headers)
+
+
+async def warm_drop_list_cache(limit: int = 100) -> None:
+    """Açılışta ilk sayfaları (filtresiz ve `?status=active`) önbelleğe alır."""
+    async with database.SessionLocal() as db:
+        for status_filter in (None, schemas.DropWindowStatus.active):
+            await drop_list_cache.get_or_build(
+                (status_filter, None, limit), lambda: _build_drop_list(db, status_filter, None, limit)
+            )
+
 
 @router.get("/", response_model=List[schemas.Drop])
-def read_active_drops(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
+async def read_active_drops(
+    status_filter: Optional[schemas.DropWindowStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_db),
+):
     """
     GET /drops
-    Tüm aktif (veya listelenebilir) drop'ları getirir.
+    Drop'ları claim penceresi başlangıcına göre sıralı getirir.
+
+    - `status`: active / upcoming / ended (verilmezse hepsi)
+    - `cursor`: önceki sayfanın `X-Next-Cursor` başlığı (keyset sayfalama)
+    - Yanıt `ETag` taşır; `If-None-Match` eşleşirse 304 döner.
+      Önbellek admin create/update/delete/allocate, pencere geçişleri ve
+      stoğu tüketen (sell-out) claim'lerde temizlenir; aradaki claim'lerin
+      düşürdüğü stok en fazla `DROP_LIST_CACHE_TTL_SECONDS` gecikmeyle görünür.
+    - FAST_SERIALIZATION=1 ise gövde sütun tuple'larından orjson ile kurulur.
+    """
+    cached = await drop_list_cache.get_or_build(
+        (status_filter, cursor, limit), lambda: _build_drop_list(db, status_filter, cursor, limit)
+    )
+
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache", **cached.headers}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+@router.get("/{drop_id}/events")
+async def stream_drop_events(
+    drop_id: int,
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+):
+    """
+    GET /drops/{drop_id}/events
+    Drop'un stok ve claim penceresi değişikliklerini Server-Sent Events olarak yayınlar.
+    İlk mesaj anlık durumdur; sonrakiler en fazla 100 ms'de bir birleştirilerek gelir.
+    """
+    # Önce abone ol: ilk okuma ile abonelik arasında gelen güncelleme kaçmasın
+    subscription = event_hub.subscribe(drop_id)
+    db_drop = await crud.get_drop(db, drop_id)
+    if not db_drop:
+        subscription.close()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Drop bulunamadı")
+
+    snapshot = {"drop_id": drop_id, **crud.drop_event_state(db_drop)}
+    await db.close() #uzun yaşayan akış boyunca bağlantı havuzda tutulmasın
+
+    return StreamingResponse(
+        sse_stream(subscription, snapshot, request.is_disconnected, settings.event_keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/join",
+    response_model=schemas.BatchJoinResult,
+    dependencies=[Depends(limit_batch_joins)],
+)
+async def join_drop_waitlists(
+    request: schemas.BatchJoinRequest,
+    db: AsyncSession = Depends(database.get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    Giriş yapmış kullanıcıyı birden fazla drop'un bekleme listesine tek ifadeyle ekler
+    (örn. bir koleksiyonun tamamı). Idempotent'tir.
     """
-    drops = crud.get_drops(db, skip=skip, limit=limit)
-    return drops
+    await join_buffer.drain() #tamponlu modda bekleyen join'ler önce DB'ye insin
+    result = await crud.join_waitlists(db, user_id=current_user.id, drop_ids=request.drop_ids)
+    user_drops_cache.discard(current_user.id)
+    return result
 
 
-@router.post("/{drop_id}/join", response_model=schemas.Message)
-def join_drop_waitlist(
+@router.post(
+    "/{drop_id}/join",
+    response_model=schemas.Message,
+    dependencies=[Depends(limit_joins)],
+)
+async def join_drop_waitlist(
     drop_id: int, 
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(database.get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Giriş yapmış kullanıcıyı bir drop'un bekleme listesine ekler.
     Idempotent'tir (birden fazla kez denense bile sonuç değişmez).
+    WAITLIST_INGEST_MODE=buffered ise join günlüğe yazılıp onaylanır, DB'ye toplu iner.
     """
-    result = crud.join_waitlist(db, user_id=current_user.id, drop_id=drop_id)
+    if settings.waitlist_ingest_mode == "buffered":
+        result = await join_buffer.join(current_user.id, drop_id)
+    else:
+        result = await crud.join_waitlist(db, user_id=current_user.id, drop_id=drop_id)
+    user_drops_cache.discard(current_user.id)
     
     if result == "DROP_NOT_FOUND":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Drop bulunamadı")
@@ -41,17 +217,39 @@ def join_drop_waitlist(
     return {"detail": "Başarıyla bekleme listesine eklendiniz."}
 
 
+@router.get("/{drop_id}/waitlist/position", response_model=schemas.WaitlistPosition)
+async def read_waitlist_position(
+    drop_id: int,
+    db: AsyncSession = Depends(database.get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    GET /drops/{drop_id}/waitlist/position
+    Kullanıcının katılım sırasındaki yeri ve waitlist boyutu ("80.000 kişiden 4.312.").
+    `COUNT(*)` yapılmaz; bellekteki sıra indeksinden O(log n) okunur (bkz. app/waitlist_index.py).
+    """
+    if not await crud.get_drop(db, drop_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Drop bulunamadı")
+    await db.close()
+    await join_buffer.drain() #tamponlu join'ler de sayılsın
+    position, size = await waitlist_index.lookup(drop_id, current_user.id)
+    return schemas.WaitlistPosition(drop_id=drop_id, joined=position is not None, position=position, size=size)
+
+
 @router.post("/{drop_id}/leave", response_model=schemas.Message)
-def leave_drop_waitlist(
+async def leave_drop_waitlist(
     drop_id: int, 
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(database.get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Giriş yapmış kullanıcıyı bekleme listesinden kaldırır.
     Idempotent'tir.
     """
-    result = crud.leave_waitlist(db, user_id=current_user.id, drop_id=drop_id)
+    await join_buffer.drain() #tamponda bekleyen join'den sonra silinsin
+    result = await crud.leave_waitlist(db, user_id=current_user.id, drop_id=drop_id)
+    fair_claim_queue.invalidate(drop_id) #ayrılan kullanıcı adil dağıtımda yer almasın
+    user_drops_cache.discard(current_user.id)
     
     if result == "NOT_IN_WAITLIST":
         return {"detail": "Zaten bekleme listesinde değilsiniz."}
@@ -59,27 +257,48 @@ def leave_drop_waitlist(
     return {"detail": "Başarıyla bekleme listesinden ayrıldınız."}
 
 
-@router.post("/{drop_id}/claim", response_model=schemas.Claim)
-def claim_drop(
+@router.post(
+    "/{drop_id}/claim",
+    response_model=schemas.Claim,
+    dependencies=[Depends(limit_claims), Depends(reject_closed_window), Depends(reject_sold_out_drop)],
+)
+async def claim_drop(
     drop_id: int, 
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(database.get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Giriş yapmış kullanıcı için bir hak talebi oluşturur.
     Tüm stok, zaman ve benzersizlik kontrolleri burada yapılır.
+
+    CLAIM_MODE=fair ise istek waitlist önceliğine göre sıralanan kuyruğa girer
+    ve stok toplu olarak dağıtılır (bkz. app/fair_queue.py).
     """
-    result = crud.create_claim(db, user_id=current_user.id, drop_id=drop_id)
+    if settings.claim_mode == "fair":
+        await join_buffer.drain()
+        result = await fair_claim_queue.submit(drop_id, current_user.id)
+    else:
+        result = await crud.create_claim(db, user_id=current_user.id, drop_id=drop_id)
+    user_drops_cache.discard(current_user.id)
     
     if result == "DROP_NOT_FOUND":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Drop bulunamadı")
     if result == "CLAIM_WINDOW_CLOSED":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Hak talebi penceresi kapalı")
+    if result == "NOT_IN_WAITLIST":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Bu drop için bekleme listesinde değilsiniz")
     if result == "OUT_OF_STOCK":
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Stok tükendi")
     if result == "ALREADY_CLAIMED":
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Bu drop için zaten hak talebinde bulundunuz")
     if result == "INTERNAL_ERROR":
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="İşlem sırasında bir hata oluştu")
-        
+
+    # Liste önbelleği yalnızca drop tükenince temizlenir: her claim'de temizlemek
+    # lansmanda önbelleği boşa çıkarırdı. Ara stok değerleri SSE ile anlık gider,
+    # listede en fazla DROP_LIST_CACHE_TTL_SECONDS gecikir.
+    if stock_gate.is_sold_out(drop_id):
+        drop_list_cache.invalidate()
+    if _fast_serialization():
+        return Response(content=serialization.encode_claim(result), media_type="application/json")
     return result
\ No newline at end of file
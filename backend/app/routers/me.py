@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, Header, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import crud, schemas, database
+from ..auth_cache import AuthenticatedUser
+from ..cache import CachedResponse, etag_matches, make_etag, user_drops_cache
+from ..join_buffer import join_buffer
+from ..routers.auth import get_current_user
+
+router = APIRouter()
+
+user_drop_list_adapter = TypeAdapter(List[schemas.UserDrop])
+
+
+@router.get("/drops", response_model=List[schemas.UserDrop])
+async def read_my_drops(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    GET /me/drops
+    Tüm drop'lar ve kullanıcının her birindeki durumu: `joined`, `claimed`,
+    `claim_code`, `waitlist_position`. Drop sayısından bağımsız tek sorgudur.
+
+    Yanıt kullanıcı başına kısa süre önbelleklenir; kullanıcının join/leave/claim
+    istekleri ve admin drop değişiklikleri önbelleği temizler. Diğer kullanıcıların
+    claim'leriyle değişen stok en fazla TTL kadar eski olabilir.
+    """
+    async def build():
+        await join_buffer.drain() #tamponlu join'ler de görünsün
+        rows = await crud.get_user_drop_states(db, user_id=current_user.id)
+        items = [
+            schemas.UserDrop(
+                **schemas.Drop.model_validate(db_drop).model_dump(),
+                joined=waitlist_id is not None,
+                claimed=claim_code is not None,
+                claim_code=claim_code,
+                waitlist_position=position if waitlist_id is not None else None,
+            )
+            for db_drop, waitlist_id, claim_code, position in rows
+        ]
+        body = user_drop_list_adapter.dump_json(items)
+        return CachedResponse(etag=make_etag(body), body=body, headers={})
+
+    cached = await user_drops_cache.get_or_build(current_user.id, build)
+
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, ConfigDict, UUID4
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, UUID4
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 import uuid
 
 
@@ -16,6 +17,9 @@ class User(UserBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class UserAdminUpdate(BaseModel):
+    is_admin: bool
+
 
 
 class DropBase(BaseModel):
@@ -35,10 +39,42 @@ class DropUpdate(BaseModel):
     claim_window_end: Optional[datetime] = None
     stock: Optional[int] = None
 
+class DropBulkUpdate(DropUpdate):
+    id: int
+
+class BulkRowStatus(str, Enum):
+    created = "created"
+    updated = "updated"
+    not_found = "not_found"
+    invalid = "invalid"
+
+class BulkRowResult(BaseModel):
+    row: int  # 1'den başlar (CSV'de başlıktan sonraki satır)
+    status: BulkRowStatus
+    id: Optional[int] = None
+    errors: Optional[List[str]] = None
+
+class BulkDropResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkRowResult]
+
 class Drop(DropBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
 
+class UserDrop(Drop):
+    """GET /me/drops: drop ve giriş yapmış kullanıcının o drop'taki durumu."""
+    joined: bool
+    claimed: bool
+    claim_code: Optional[str] = None
+    waitlist_position: Optional[int] = None  # 1'den başlar; katılmadıysa None
+
+class DropWindowStatus(str, Enum):
+    active = "active"      # claim penceresi şu an açık
+    upcoming = "upcoming"  # pencere henüz açılmadı
+    ended = "ended"        # pencere kapandı
+
 
 
 
@@ -54,6 +90,21 @@ class Waitlist(WaitlistBase):
 
 
 
+class WaitlistPosition(BaseModel):
+    drop_id: int
+    joined: bool
+    position: Optional[int] = None  # 1'den başlar (katılım sırası); katılmadıysa None
+    size: int
+
+class BatchJoinRequest(BaseModel):
+    drop_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+class BatchJoinResult(BaseModel):
+    joined: List[int]
+    already_in_waitlist: List[int]
+    not_found: List[int]
+
+
 class ClaimBase(BaseModel):
     user_id: int
     drop_id: int
@@ -64,8 +115,50 @@ class Claim(ClaimBase):
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+class ClaimVerification(BaseModel):
+    code: str
+    drop_id: int
+    created_at: datetime
+    redeemed_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class ClaimCodeStatus(str, Enum):
+    valid = "valid"
+    redeemed = "redeemed"
+    not_found = "not_found"
+
+class BulkVerifyRequest(BaseModel):
+    codes: List[str] = Field(..., min_length=1, max_length=5000)
+
+class BulkVerifyItem(BaseModel):
+    code: str
+    status: ClaimCodeStatus
+    drop_id: Optional[int] = None
+    redeemed_at: Optional[datetime] = None
+
+class BulkVerifyResult(BaseModel):
+    results: List[BulkVerifyItem]
+    valid: int
+    redeemed: int
+    not_found: int
 
 
 
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class AllocationReport(BaseModel):
+    drop_id: int
+    waitlist_size: int
+    allocated: int          # bu çalıştırmada oluşturulan claim sayısı
+    already_claimed: int    # önceki çalıştırmalardan / claim'lerden kalanlar
+    remaining_stock: int
+    elapsed_ms: float
+    rows_per_second: float
+
+
 class Message(BaseModel):
     detail: str
\ No newline at end of file
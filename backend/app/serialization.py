@@ -0,0 +1,43 @@
+"""
+Sıcak uçlar için hızlı JSON yolu (`FAST_SERIALIZATION=1`).
+
+Varsayılan yol `GET /drops` için ORM nesnelerini `schemas.Drop` ile
+(`from_attributes`) doğrulayıp kodlar; `POST /drops/{id}/claim` yanıtı
+FastAPI'nin `response_model` doğrulamasından geçer. Hızlı yol:
+
+- Drop listesi ORM nesnesi yerine sütun tuple'larından (`crud.list_drops(..., as_rows=True)`)
+  kurulur; Pydantic modeli hiç oluşturulmaz.
+- Kodlama `orjson` ile yapılır. Kurulu değilse ayar yok sayılır ve varsayılan
+  yol kullanılır: stdlib `json` ile tuple yolu pydantic-core'dan yavaştır.
+- Çıktı varsayılan yolla bayt bayt aynıdır (UTC zamanlar `Z` ile); bu
+  sayede iki yol arasında geçişte ETag'ler değişmez.
+
+Liste gövdesi yine `drop_list_cache`'te bayt olarak tutulur ve yalnızca
+drop'lar değiştiğinde yeniden üretilir. Ölçüm: `python -m benchmarks.bench_serialization`.
+"""
+
+from typing import Iterable, Sequence
+
+try:
+    import orjson
+except ImportError:  # isteğe bağlı bağımlılık
+    orjson = None
+
+AVAILABLE = orjson is not None
+
+# schemas.Drop / schemas.Claim alan sırası
+DROP_FIELDS = ("title", "description", "claim_window_start", "claim_window_end", "stock", "id")
+CLAIM_FIELDS = ("user_id", "drop_id", "id", "code", "created_at")
+
+
+def dumps(value) -> bytes:
+    return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+
+
+def encode_drops(rows: Iterable[Sequence]) -> bytes:
+    """`crud.list_drops(..., as_rows=True)` satırlarını (DROP_FIELDS sırasıyla) JSON dizisine çevirir."""
+    return dumps([dict(zip(DROP_FIELDS, row)) for row in rows])
+
+
+def encode_claim(claim) -> bytes:
+    return dumps({field: getattr(claim, field) for field in CLAIM_FIELDS})
@@ -0,0 +1,130 @@
+"""
+Uygulama açılışı: şema, bağlantı havuzu ve bellek içi yapıların ısıtılması.
+
+Import anında DB'ye dokunulmaz. Dosya sisteminde tek istisna `.env`'dir:
+engine ve süreç içi yapılar ayarlarla import anında kurulduğu için
+`app/config.py` onu import anında bir kez okur. Diğer tüm açılış işi
+`main.lifespan`'de bu modül üzerinden yapılır:
+
+1. `prepare_database`: tablolar, eksik sütunlar ve indeksler (`SCHEMA_MIGRATE=0` ise atlanır).
+2. `warm_pool`: `DB_POOL_WARM` bağlantı önceden açılır (SQLite pragmaları /
+   PostgreSQL el sıkışması ilk isteğe kalmaz).
+3. `preload`: claim kodu filtresi ve waitlist sıra indeksi paralel kurulur,
+   süresi dolmuş Idempotency-Key kayıtları silinir.
+4. Pencere zamanlayıcısı (açık drop'ların stok kapısı tohumlanır), drop
+   listesinin ilk sayfaları (`main.lifespan`) ve `warm_routes`.
+
+Ön yükle-çatalla (preload-and-fork, örn. gunicorn `--preload`) çok worker'lı
+kurulumda ana süreç `preload_for_fork(app)` çağırır: şema bir kez hazırlanır;
+filtre, indeks ve route bağlamları bir kez kurulur; bağlantılar kapatılır.
+Çatallanan worker'lar bunları bellekte (copy-on-write) hazır bulur; kendi
+açılışlarında yalnızca havuzu ısıtıp zamanlayıcıyı başlatırlar. Stok kapısı ve
+hız sınırı worker'lar arasında ancak `STOCK_GATE_BACKEND=sqlite` /
+`RATE_LIMIT_BACKEND=sqlite` ile paylaşılır; `memory` ile her worker kendi
+sayaçlarını tutar. Şemayı ayrı bir adımda hazırlamak için:
+
+    python -m app.startup
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from starlette.exceptions import HTTPException
+
+from . import models
+from .claim_filter import claim_filter
+from .config import settings
+from .database import add_missing_columns, add_missing_indexes, engine
+from .idempotency import idempotency_store
+from .waitlist_index import waitlist_index
+
+
+async def prepare_database(db_engine=engine) -> None:
+    async with db_engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+        await conn.run_sync(add_missing_indexes)
+
+
+async def warm_pool(db_engine=engine, connections: Optional[int] = None) -> None:
+    """Havuzda `connections` (varsayılan `DB_POOL_WARM`) bağlantıyı aynı anda açıp geri bırakır."""
+    if connections is None:
+        connections = settings.db_pool_warm
+    connections = min(connections, settings.db_pool_size)
+
+    async def touch():
+        async with db_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    if connections > 0:
+        await asyncio.gather(*(touch() for _ in range(connections)))
+
+
+# preload_for_fork() çalıştıysa (ana süreç) worker açılışı şema ve ön yüklemeyi atlar
+preloaded = False
+
+
+async def preload() -> None:
+    """Claim kodu filtresi, waitlist sıra indeksi ve eski Idempotency-Key kayıtları (paralel)."""
+    await asyncio.gather(
+        idempotency_store.purge(),
+        claim_filter.rebuild(), #var olmayan claim kodları DB'ye gitmeden reddedilsin
+        waitlist_index.rebuild(), #sıra/boyut sorguları COUNT(*) yapmasın
+    )
+
+
+async def warm_routes(app) -> None:
+    """
+    FastAPI route eşleme bağlamlarını ilk istekten önce kurar (ilk istekte
+    ≈ 20 ms). Hiçbir route'a uymayan yapay bir istek tüm route'ları gezer.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/-", "raw_path": b"/-",
+        "query_string": b"", "root_path": "", "headers": [], "client": None, "server": None,
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    try:
+        await app.router(scope, receive, send)
+    except HTTPException:
+        pass  # beklenen 404
+
+
+def preload_for_fork(app=None) -> float:
+    """
+    Ana süreçte, worker'lar çatallanmadan önce çağrılır. Açık bağlantı
+    bırakmaz (çatallanan süreçler aynı soketi paylaşmasın). Süreyi (sn) döner.
+    """
+    global preloaded
+    started = time.perf_counter()
+
+    async def run():
+        if settings.schema_migrate:
+            await prepare_database()
+        await preload()
+        if app is not None:
+            await warm_routes(app)
+        await engine.dispose()
+
+    asyncio.run(run())
+    preloaded = True
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+
+    async def migrate():
+        await prepare_database()
+        await engine.dispose()
+
+    asyncio.run(migrate())
+    print(f"Şema hazır ({time.perf_counter() - started:.2f} sn)")
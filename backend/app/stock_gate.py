@@ -0,0 +1,176 @@
+"""
+Stok kapısı (stock gate): tükenmiş drop'lara gelen claim isteklerini
+veritabanına gitmeden reddeder.
+
+Kapı sadece bir "ipucu"dur; gerçek stok düşümü her zaman veritabanında
+(`crud.create_claim` içindeki koşullu UPDATE) yapılır. Kapı yalnızca
+veritabanından gözlemlenmiş "stok 0" bilgisini hatırlar:
+
+- `crud.create_drop` sayacı `Drop.stock` ile tohumlar (seed).
+- `crud.create_claim` her başarılı claim sonrası kalan stoğu yazar,
+  OUT_OF_STOCK sonucunda sayacı 0'a çeker.
+- `crud.update_drop` ve `crud.delete_drop` sayacı geçersiz kılar.
+
+Geçersiz kılma her drop için bir "nesil" (generation) sayacını artırır.
+Geçersiz kılmadan önce başlamış bir claim'in getirdiği eski değer, nesil
+uyuşmadığı için yazılmaz (örn. yeniden stoklama sırasında yarış).
+
+Backend seçimi `STOCK_GATE_BACKEND` ayarıyla yapılır:
+`memory` (varsayılan, süreç başına) veya `sqlite` (aynı makinedeki tüm
+worker'ların paylaştığı yerel dosya, `STOCK_GATE_PATH`). `memory` ile çoklu
+worker'da başka worker'ın yeniden stoklaması bu sürecin kapısını geçersiz
+kılmaz; "tükendi" değeri pencere zamanlayıcısının senkronizasyonunda DB'deki
+stokla düzeltilir (bkz. `WindowScheduler.load`).
+"""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+from .config import settings
+
+
+class StockGateBackend(ABC):
+    """Sayaçların saklandığı yer. Çoklu worker için paylaşımlı bir backend yazılabilir."""
+
+    shared = False  # True: tüm worker'lar aynı sayaçları görür (geçersiz kılma herkese ulaşır)
+
+    @abstractmethod
+    def get(self, drop_id: int) -> Tuple[Optional[int], int]:
+        """(bilinen stok veya None, nesil) döndürür."""
+
+    @abstractmethod
+    def set(self, drop_id: int, stock: int, generation: int) -> None:
+        """Nesil hâlâ aynıysa stoğu yazar."""
+
+    @abstractmethod
+    def invalidate(self, drop_id: int) -> None:
+        """Bilinen stoğu siler ve nesli artırır."""
+
+
+class InMemoryStockGateBackend(StockGateBackend):
+    """Süreç içi sözlük. Tek worker'lı kurulumlar ve testler için."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stock = {}
+        self._generation = {}
+
+    def get(self, drop_id):
+        return self._stock.get(drop_id), self._generation.get(drop_id, 0)
+
+    def set(self, drop_id, stock, generation):
+        with self._lock:
+            if self._generation.get(drop_id, 0) == generation:
+                self._stock[drop_id] = stock
+
+    def invalidate(self, drop_id):
+        with self._lock:
+            self._stock.pop(drop_id, None)
+            self._generation[drop_id] = self._generation.get(drop_id, 0) + 1
+
+
+class SQLiteStockGateBackend(StockGateBackend):
+    """
+    Aynı makinedeki worker'ların paylaştığı dosya tabanlı sayaç.
+    SQLite'ın dosya kilidi, süreçler arası atomikliği sağlar.
+
+    Claim yolunda event loop'ta senkron çalışır; kilit `busy_timeout` içinde
+    alınamazsa kapı "bilinmiyor" sayılır (fail open, karar DB'ye kalır) ve
+    `set` atlanır. Yalnızca `invalidate` (admin yolu) uzun bekler: kaçırılan
+    geçersiz kılma yeniden stoklanmış drop'u "tükendi" gösterirdi.
+    """
+
+    shared = True
+    INVALIDATE_TIMEOUT = 5.0
+    UNKNOWN_GENERATION = -1  # okunamayan nesil; bununla gelen `set` yazılmaz
+
+    def __init__(self, path: str, busy_timeout: float = 0.05):
+        self._path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            # Dosya ve tablo import anında değil, ilk kullanımda oluşturulur
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stock_gate ("
+                " drop_id INTEGER PRIMARY KEY,"
+                " stock INTEGER,"
+                " generation INTEGER NOT NULL DEFAULT 0)"
+            )
+            # Kurulumdan sonra istek yolundaki beklemeler kısa tutulur
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    def get(self, drop_id):
+        try:
+            row = self._connect().execute(
+                "SELECT stock, generation FROM stock_gate WHERE drop_id = ?", (drop_id,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None, self.UNKNOWN_GENERATION
+        if row is None:
+            return None, 0
+        return row[0], row[1]
+
+    def set(self, drop_id, stock, generation):
+        if generation == self.UNKNOWN_GENERATION:
+            return
+        try:
+            self._connect().execute(
+                "INSERT INTO stock_gate (drop_id, stock, generation) VALUES (?, ?, ?) "
+                "ON CONFLICT(drop_id) DO UPDATE SET stock = excluded.stock "
+                "WHERE stock_gate.generation = excluded.generation",
+                (drop_id, stock, generation),
+            )
+        except sqlite3.OperationalError:
+            pass  # kapı yalnızca ipucu; yazılamayan değer bir sonraki claim'de yazılır
+
+    def invalidate(self, drop_id):
+        conn = self._connect()
+        conn.execute(f"PRAGMA busy_timeout={int(self.INVALIDATE_TIMEOUT * 1000)}")
+        try:
+            conn.execute(
+                "INSERT INTO stock_gate (drop_id, stock, generation) VALUES (?, NULL, 1) "
+                "ON CONFLICT(drop_id) DO UPDATE SET stock = NULL, generation = stock_gate.generation + 1",
+                (drop_id,),
+            )
+        finally:
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+
+
+class StockGate:
+    def __init__(self, backend: StockGateBackend):
+        self.backend = backend
+
+    def is_sold_out(self, drop_id: int) -> bool:
+        stock, _ = self.backend.get(drop_id)
+        return stock is not None and stock <= 0
+
+    def generation(self, drop_id: int) -> int:
+        """DB işleminden ÖNCE okunur, sonuç `seed`'e geri verilir."""
+        return self.backend.get(drop_id)[1]
+
+    def seed(self, drop_id: int, stock: int, generation: Optional[int] = None) -> None:
+        if generation is None:
+            generation = self.generation(drop_id)
+        self.backend.set(drop_id, stock, generation)
+
+    def invalidate(self, drop_id: int) -> None:
+        self.backend.invalidate(drop_id)
+
+
+def _build_backend() -> StockGateBackend:
+    if settings.stock_gate_backend == "sqlite":
+        return SQLiteStockGateBackend(settings.stock_gate_path)
+    return InMemoryStockGateBackend()
+
+
+stock_gate = StockGate(_build_backend())
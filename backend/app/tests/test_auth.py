@@ -0,0 +1,115 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import event, select, update
+
+from app import models, security
+from app.auth_cache import VerifiedTokenCache, token_cache
+from app.database import engine
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+class QueryRecorder:
+    """Test yardımcısı: engine üzerinden çalışan SQL ifadelerini toplar."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+def test_token_carries_identity_claims(client: TestClient):
+    headers = create_user_and_login(client, "claims@test.com")
+    payload = jwt.decode(
+        headers["Authorization"].split()[1], security.SECRET_KEY, algorithms=[security.ALGORITHM]
+    )
+    assert payload["sub"] == "claims@test.com"
+    assert isinstance(payload["user_id"], int)
+    assert payload["is_admin"] is False
+    assert payload["jti"]
+
+
+def test_claim_runs_without_user_lookup(client: TestClient):
+    """
+    Claim isteği kullanıcı tablosuna gitmemeli: sadece koşullu stok UPDATE'i
+    ve claim INSERT'ü (created_at RETURNING ile) çalışmalı.
+    """
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "noquery@test.com")
+    drop_id = create_open_drop(client, admin_headers, stock=5)["id"]
+
+    with QueryRecorder() as recorder:
+        response = client.post(f"/drops/{drop_id}/claim", headers=user_headers)
+
+    assert response.status_code == 200
+    assert response.json()["created_at"]
+    assert not any("FROM users" in s for s in recorder.statements)
+    assert len(recorder.statements) == 2
+
+
+def test_invalidated_user_is_rechecked_against_db(client: TestClient, session_factory):
+    """Yetkisi alınan admin, geçersiz kılmadan sonra eski token'la admin işlemi yapamamalı."""
+    headers = create_admin_and_login(client)
+    assert client.get("/admin/drops", headers=headers).status_code == 200
+
+    async def revoke_admin():
+        async with session_factory() as db:
+            await db.execute(
+                update(models.User).where(models.User.email == "admin@test.com").values(is_admin=False)
+            )
+            await db.commit()
+            return await db.scalar(select(models.User.id).where(models.User.email == "admin@test.com"))
+
+    admin_id = asyncio.run(revoke_admin())
+    # Önbellekte olduğu için token hâlâ admin kabul edilir
+    assert client.get("/admin/drops", headers=headers).status_code == 200
+
+    token_cache.invalidate_user(admin_id)
+    assert client.get("/admin/drops", headers=headers).status_code == 403
+
+    async def restore_admin():
+        async with session_factory() as db:
+            await db.execute(update(models.User).where(models.User.id == admin_id).values(is_admin=True))
+            await db.commit()
+
+    asyncio.run(restore_admin())
+    token_cache.clear()
+
+
+def test_role_change_invalidates_cached_token(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    headers = create_user_and_login(client, "promoted@test.com")
+    user_id = jwt.decode(
+        headers["Authorization"].split()[1], security.SECRET_KEY, algorithms=[security.ALGORITHM]
+    )["user_id"]
+    assert client.get("/admin/drops", headers=headers).status_code == 403
+
+    # Eski token'ın `is_admin=False` claim'i artık DB ile doğrulanır
+    response = client.patch(f"/admin/users/{user_id}", json={"is_admin": True}, headers=admin_headers)
+    assert response.status_code == 200 and response.json()["is_admin"] is True
+    assert client.get("/admin/drops", headers=headers).status_code == 200
+
+    client.patch(f"/admin/users/{user_id}", json={"is_admin": False}, headers=admin_headers)
+    assert client.get("/admin/drops", headers=headers).status_code == 403
+    assert client.patch("/admin/users/999999", json={"is_admin": True}, headers=admin_headers).status_code == 404
+
+
+def test_invalidation_marks_expire_with_token_lifetime(monkeypatch):
+    cache = VerifiedTokenCache(ttl_seconds=60, max_entries=10, token_lifetime_seconds=1800)
+    now = 1_000_000.0
+    monkeypatch.setattr("app.auth_cache.time.time", lambda: now)
+    cache.invalidate_user(1)
+
+    now += 1801
+    cache.invalidate_user(2)
+    assert set(cache._invalidated_at) == {2}
+    assert not cache.needs_db_check(1, issued_at=now - 1)
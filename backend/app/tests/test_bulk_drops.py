@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.tests.test_main_flow import create_admin_and_login
+
+START = datetime(2032, 1, 1, tzinfo=timezone.utc)
+
+
+def drop_row(i, **overrides):
+    start = START + timedelta(hours=i)
+    return {
+        "title": f"Katalog {i}",
+        "claim_window_start": start.isoformat(),
+        "claim_window_end": (start + timedelta(hours=1)).isoformat(),
+        "stock": 10,
+        **overrides,
+    }
+
+
+def test_bulk_create_reports_each_row(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+
+    response = client.post(
+        "/admin/drops/bulk",
+        json=[drop_row(1), drop_row(2, stock="çok"), drop_row(3)],
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert [item["status"] for item in body["results"]] == ["created", "invalid", "created"]
+    assert body["results"][1]["errors"][0].startswith("stock")
+
+    created_id = body["results"][0]["id"]
+    listed = client.get("/drops/", params={"status": "upcoming", "limit": 500}).json()
+    assert created_id in {item["id"] for item in listed}
+
+    csv_body = (
+        "title,description,claim_window_start,claim_window_end,stock\n"
+        f'CSV 1,"iki\nsatır, virgüllü",{START.isoformat()},{(START + timedelta(hours=1)).isoformat()},5\n'
+        f"CSV 2,,{START.isoformat()},{(START + timedelta(hours=1)).isoformat()},\n"
+        "eksik,sütun\n"
+    )
+    response = client.post(
+        "/admin/drops/bulk", content=csv_body.encode(), headers={**admin_headers, "Content-Type": "text/csv"}
+    )
+    results = response.json()["results"]
+    assert [item["status"] for item in results] == ["created", "invalid", "invalid"]
+    assert results[1]["errors"] == ["stock: Field required"]
+    listed = client.get("/drops/", params={"status": "upcoming", "limit": 500}).json()
+    assert next(item for item in listed if item["id"] == results[0]["id"])["description"] == "iki\nsatır, virgüllü"
+
+    ndjson_body = json.dumps(drop_row(4)) + "\n{bozuk\n\n" + json.dumps(drop_row(5)) + "\n"
+    response = client.post(
+        "/admin/drops/bulk", content=ndjson_body, headers={**admin_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert [item["status"] for item in response.json()["results"]] == ["created", "invalid", "created"]
+
+    bad = client.post("/admin/drops/bulk", content="{}", headers={**admin_headers, "Content-Type": "application/json"})
+    assert bad.status_code == 400
+
+
+def test_bulk_update_reports_missing_rows(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    created = client.post("/admin/drops/bulk", json=[drop_row(10), drop_row(11)], headers=admin_headers).json()
+    first, second = [item["id"] for item in created["results"]]
+
+    response = client.patch("/admin/drops/bulk", json=[
+        {"id": first, "stock": 0},
+        {"id": second, "title": "Yeni ad", "description": "güncel"},
+        {"id": 999999, "stock": 1},
+        {"id": first},
+    ], headers=admin_headers)
+    body = response.json()
+    assert [item["status"] for item in body["results"]] == ["updated", "updated", "not_found", "invalid"]
+    assert (body["succeeded"], body["failed"]) == (2, 2)
+
+    listed = {item["id"]: item for item in client.get("/drops/", params={"status": "upcoming", "limit": 500}).json()}
+    assert listed[first]["stock"] == 0 and listed[first]["title"] == "Katalog 10"
+    assert (listed[second]["title"], listed[second]["description"], listed[second]["stock"]) == ("Yeni ad", "güncel", 10)
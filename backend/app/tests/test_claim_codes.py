@@ -0,0 +1,82 @@
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.claim_codes import ALPHABET, CODE_LENGTH, ClaimCodec
+from app.database import get_db
+from app.main import app
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+def test_codes_round_trip_and_never_collide():
+    codec = ClaimCodec("test-secret")
+    codes = {codec.encode(drop_id, user_id) for drop_id in range(1, 101) for user_id in range(1, 101)}
+    assert len(codes) == 100 * 100
+    assert all(len(code) == CODE_LENGTH and set(code) <= set(ALPHABET) for code in codes)
+
+    code = codec.encode(2_000_000, 2_147_483_647)
+    assert codec.decode(code) == (2_000_000, 2_147_483_647)
+    # Küçük harf, ayraç ve Crockford eşdeğerleri aynı koda çözülür
+    assert codec.decode(f"{code[:4]}-{code[4:8]}-{code[8:]}".lower()) == (2_000_000, 2_147_483_647)
+    # Başka anahtarla üretilmiş kod doğrulanmaz (1/256 ihtimal dışında)
+    assert ClaimCodec("other-secret").decode(code) != (2_000_000, 2_147_483_647)
+
+
+def test_typos_are_rejected_without_db():
+    codec = ClaimCodec("test-secret")
+    code = codec.encode(7, 42)
+    variants = [
+        code[:i] + char + code[i + 1:]
+        for i in range(CODE_LENGTH)
+        for char in ALPHABET
+        if char != code[i]
+    ]
+    accepted = [variant for variant in variants if codec.decode(variant) is not None]
+    assert len(accepted) / len(variants) < 0.02
+    assert codec.decode(code[:-1]) is None
+    assert codec.decode("U" * CODE_LENGTH) is None
+
+
+def test_verify_claim_code(client: TestClient, session_factory, monkeypatch):
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "codes@test.com")
+    drop_id = create_open_drop(client, admin_headers, stock=2)["id"]
+
+    claim = client.post(f"/drops/{drop_id}/claim", headers=user_headers).json()
+    assert len(claim["code"]) == CODE_LENGTH
+
+    response = client.get(f"/claims/{claim['code'].lower()}")
+    assert response.status_code == 200
+    assert response.json()["drop_id"] == drop_id
+    assert response.json()["code"] == claim["code"]
+
+    # Kontrol karakteri tutmayan kod için DB session'ı açılmaz
+    sessions = []
+    original_override = app.dependency_overrides[get_db]
+
+    async def counting_get_db():
+        sessions.append(1)
+        async for db in original_override():
+            yield db
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, counting_get_db)
+    tampered = claim["code"][:-1] + ("0" if claim["code"][-1] != "0" else "1")
+    assert client.get(f"/claims/{tampered}").status_code == 404
+    assert client.get("/claims/not-a-code").status_code == 404
+    assert sessions == []
+
+    # Kısa kodlardan önce üretilmiş UUID kodlar hâlâ doğrulanır
+    legacy_code = str(uuid.uuid4())
+
+    async def add_legacy_claim():
+        async with session_factory() as db:
+            user = models.User(email="legacy-code@test.com", password_hash="x")
+            db.add(user)
+            await db.flush()
+            db.add(models.Claim(user_id=user.id, drop_id=drop_id, code=legacy_code))
+            await db.commit()
+
+    asyncio.run(add_legacy_claim())
+    assert client.get(f"/claims/{legacy_code}").status_code == 200
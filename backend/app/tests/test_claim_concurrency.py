@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app import crud, models
+
+
+def test_parallel_claims_never_oversell(session_factory):
+    """
+    Concurrency Test: Stoğu K olan bir drop'a N paralel claim gönderilir.
+    Tam olarak K claim başarılı olmalı, stok 0'ın altına düşmemeli.
+    """
+    n_users, stock = 40, 7
+
+    async def scenario():
+        # Hazırlık: Kullanıcıları ve açık bir drop'u doğrudan DB'ye yaz
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            drop = models.Drop(
+                title="Concurrency Drop",
+                claim_window_start=now - timedelta(hours=1),
+                claim_window_end=now + timedelta(hours=1),
+                stock=stock,
+            )
+            users = [
+                models.User(email=f"race{i}@test.com", password_hash="x")
+                for i in range(n_users)
+            ]
+            db.add(drop)
+            db.add_all(users)
+            await db.commit()
+            drop_id = drop.id
+            user_ids = [u.id for u in users]
+
+        async def claim(user_id):
+            async with session_factory() as db:
+                result = await crud.create_claim(db, user_id=user_id, drop_id=drop_id)
+                return result if isinstance(result, str) else "OK"
+
+        results = await asyncio.gather(*(claim(user_id) for user_id in user_ids))
+
+        async with session_factory() as db:
+            remaining = (await crud.get_drop(db, drop_id)).stock
+            claim_count = await db.scalar(
+                select(func.count()).select_from(models.Claim).where(models.Claim.drop_id == drop_id)
+            )
+        return results, remaining, claim_count
+
+    results, remaining, claim_count = asyncio.run(scenario())
+
+    assert results.count("OK") == stock
+    assert results.count("OUT_OF_STOCK") == n_users - stock
+    assert remaining == 0
+    assert claim_count == stock
@@ -0,0 +1,140 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, inspect, select
+
+from app import crud, models
+from app.claim_codes import claim_codec
+from app.claim_filter import ClaimCodeFilter, ScalableBloomFilter
+from app.database import Base, add_missing_columns, add_missing_indexes, engine
+from app.tests.test_join_buffer import create_drop_and_users
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+def test_bloom_filter_has_no_false_negatives_when_grown():
+    bloom = ScalableBloomFilter(capacity=1024)
+    members = [claim_codec.encode(1, user_id) for user_id in range(5000)]
+    for code in members:
+        bloom.add(code)
+
+    assert all(code in bloom for code in members)
+    outsiders = [claim_codec.encode(2, user_id) for user_id in range(20000)]
+    false_positives = sum(1 for code in outsiders if code in bloom)
+    assert false_positives / len(outsiders) < 0.03
+
+
+def test_filter_sees_claims_committed_out_of_id_order(session_factory):
+    async def scenario():
+        drop_id, (early, late) = await create_drop_and_users(session_factory, "out-of-order", 2)
+        async with session_factory() as db:
+            base_id = (await db.scalar(select(func.max(models.Claim.id)))) or 0
+            # Başka bir worker: yüksek id'li claim önce commit edilir
+            db.add(models.Claim(id=base_id + 1000, user_id=late, drop_id=drop_id, code=claim_codec.encode(drop_id, late)))
+            await db.commit()
+
+        claim_filter = ClaimCodeFilter(session_factory, refresh_interval=0, resync_interval=3600)
+        await claim_filter.rebuild()
+
+        async with session_factory() as db:
+            # Id'yi daha önce almış transaction sonra commit eder
+            db.add(models.Claim(id=base_id + 500, user_id=early, drop_id=drop_id, code=claim_codec.encode(drop_id, early)))
+            await db.commit()
+
+        found = await claim_filter.might_exist(drop_id, claim_codec.encode(drop_id, early))
+        unknown = claim_codec.encode(drop_id, 777_777)
+        while_changing = await claim_filter.might_exist(drop_id, unknown)
+        claim_filter._changed_at[drop_id] -= claim_filter.overlap_seconds
+        settled = await claim_filter.might_exist(drop_id, unknown)
+        return found, while_changing, settled
+
+    assert asyncio.run(scenario()) == (True, True, False)
+
+
+def test_missing_nullable_columns_are_added(tmp_path):
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old_engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE claims (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,"
+            " drop_id INTEGER NOT NULL, code VARCHAR NOT NULL, created_at DATETIME)"
+        )
+        conn.exec_driver_sql("INSERT INTO claims (user_id, drop_id, code) VALUES (1, 1, 'OLD')")
+        add_missing_columns(conn, Base.metadata)
+        add_missing_columns(conn, Base.metadata)  # ikinci çalıştırma bir şey yapmaz
+        add_missing_indexes(conn, Base.metadata)
+        add_missing_indexes(conn, Base.metadata)
+
+    columns = {column["name"] for column in inspect(old_engine).get_columns("claims")}
+    assert "redeemed_at" in columns
+    assert "ix_claims_code" in {index["name"] for index in inspect(old_engine).get_indexes("claims")}
+    with old_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT code, redeemed_at FROM claims").all() == [("OLD", None)]
+    old_engine.dispose()
+
+
+def test_redeem_is_single_use_and_unknown_codes_skip_db(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "redeem@test.com")
+    drop_id = create_open_drop(client, admin_headers, stock=2)["id"]
+    code = client.post(f"/drops/{drop_id}/claim", headers=user_headers).json()["code"]
+
+    assert client.post(f"/claims/{code}/redeem", headers=user_headers).status_code == 403
+    redeemed = client.post(f"/claims/{code}/redeem", headers=admin_headers)
+    assert redeemed.status_code == 200
+    assert redeemed.json()["redeemed_at"] is not None
+    assert client.post(f"/claims/{code}/redeem", headers=admin_headers).status_code == 409
+    assert client.get(f"/claims/{code}").json()["redeemed_at"] is not None
+
+    # Biçimi geçerli ama hiç verilmemiş kod: ilk kaçırmada drop filtresi bir kez
+    # tazelenir, sonraki istekler hiç SQL çalıştırmadan 404 alır
+    unknown = claim_codec.encode(drop_id, 999_999)
+    assert client.get(f"/claims/{unknown}").status_code == 404
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        assert client.get(f"/claims/{unknown}").status_code == 404
+        assert client.post(f"/claims/{unknown}/redeem", headers=admin_headers).status_code == 404
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert statements == []
+
+
+def test_concurrent_redeem_succeeds_once(client: TestClient, session_factory):
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "race-redeem@test.com")
+    drop_id = create_open_drop(client, admin_headers, stock=1)["id"]
+    code = client.post(f"/drops/{drop_id}/claim", headers=user_headers).json()["code"]
+
+    async def redeem():
+        async with session_factory() as db:
+            return await crud.redeem_claim(db, code=code)
+
+    async def scenario():
+        return await asyncio.gather(*[redeem() for _ in range(5)])
+
+    results = asyncio.run(scenario())
+    assert sum(1 for result in results if not isinstance(result, str)) == 1
+    assert sorted(result for result in results if isinstance(result, str)) == ["ALREADY_REDEEMED"] * 4
+
+
+def test_bulk_verify(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    drop_id = create_open_drop(client, admin_headers, stock=3)["id"]
+    codes = []
+    for i in range(3):
+        headers = create_user_and_login(client, f"scanner{i}@test.com")
+        codes.append(client.post(f"/drops/{drop_id}/claim", headers=headers).json()["code"])
+    client.post(f"/claims/{codes[0]}/redeem", headers=admin_headers)
+
+    unknown = claim_codec.encode(drop_id, 888_888)
+    response = client.post(
+        "/claims/verify",
+        json={"codes": [codes[0], codes[1].lower(), codes[2], "junk", unknown]},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["status"] for item in body["results"]] == ["redeemed", "valid", "valid", "not_found", "not_found"]
+    assert body["results"][1]["drop_id"] == drop_id
+    assert (body["valid"], body["redeemed"], body["not_found"]) == (2, 1, 2)
@@ -0,0 +1,24 @@
+import asyncio
+from dataclasses import replace
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import create_db_engine
+
+
+def test_sqlite_pragmas_are_applied(tmp_path):
+    """Unit Test: Her yeni SQLite bağlantısında WAL, synchronous, busy timeout ve foreign key ayarlanmalı."""
+    cfg = replace(settings, sqlite_synchronous="NORMAL", sqlite_busy_timeout_ms=1234)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pragma.db'}", cfg)
+
+    async def read_pragmas():
+        async with engine.connect() as conn:
+            pragmas = [
+                (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+                for name in ("journal_mode", "synchronous", "busy_timeout", "foreign_keys")
+            ]
+        await engine.dispose()
+        return pragmas
+
+    assert asyncio.run(read_pragmas()) == ["wal", 1, 1234, 1]  # synchronous=NORMAL -> 1
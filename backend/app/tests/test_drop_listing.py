@@ -0,0 +1,113 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import schemas
+from app.cache import drop_list_cache
+from app.config import settings
+from app.routers import drops as drops_router
+from app.tests.test_auth import QueryRecorder
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+def create_upcoming_drop(client: TestClient, admin_headers: dict, days_ahead: int):
+    start = datetime.now(timezone.utc) + timedelta(days=days_ahead)
+    drop_data = {
+        "title": f"Yakında {days_ahead}",
+        "claim_window_start": start.isoformat(),
+        "claim_window_end": (start + timedelta(hours=1)).isoformat(),
+        "stock": 3,
+    }
+    response = client.post("/admin/drops", json=drop_data, headers=admin_headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_keyset_pagination_walks_upcoming_drops_in_order(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    # Oluşturma sırası pencere sırasından farklı
+    created = [create_upcoming_drop(client, admin_headers, days) for days in (300, 100, 200)]
+
+    seen, cursor = [], None
+    while True:
+        params = {"status": "upcoming", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/drops/", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen.extend(drop["id"] for drop in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    ours = [drop_id for drop_id in seen if drop_id in created]
+    assert ours == [created[1], created[2], created[0]]
+    assert len(seen) == len(set(seen))
+
+    assert client.get("/drops/", params={"cursor": "bozuk"}).status_code == 400
+
+
+def test_listing_etag_and_invalidation(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+
+    first = client.get("/drops/")
+    etag = first.headers["ETag"]
+
+    # Tekrar gelen istek önbellekten: DB sorgusu yok, ETag eşleşirse 304
+    with QueryRecorder() as recorder:
+        not_modified = client.get("/drops/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert recorder.statements == []
+
+    # Admin değişikliği önbelleği temizler
+    new_id = create_upcoming_drop(client, admin_headers, days_ahead=50)
+    changed = client.get("/drops/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert new_id in [drop["id"] for drop in changed.json()]
+
+
+def test_only_sell_out_claim_clears_listing_cache(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    drop_id = create_open_drop(client, admin_headers, stock=2)["id"]
+    users = [create_user_and_login(client, f"listing-claim{i}@test.com") for i in range(2)]
+    params = {"status": "active", "limit": 500}
+    etag = client.get("/drops/", params=params).headers["ETag"]
+
+    assert client.post(f"/drops/{drop_id}/claim", headers=users[0]).status_code == 200
+    with QueryRecorder() as recorder:
+        assert client.get("/drops/", params=params, headers={"If-None-Match": etag}).status_code == 304
+    assert recorder.statements == []
+
+    assert client.post(f"/drops/{drop_id}/claim", headers=users[1]).status_code == 200
+    sold_out = client.get("/drops/", params=params)
+    assert sold_out.headers["ETag"] != etag
+    assert next(drop for drop in sold_out.json() if drop["id"] == drop_id)["stock"] == 0
+
+
+def test_fast_serialization_matches_default_bytes(client: TestClient, monkeypatch):
+    # orjson yoksa hızlı yol sessizce varsayılana düşer ve test kendini karşılaştırırdı
+    pytest.importorskip("orjson")
+    admin_headers = create_admin_and_login(client)
+    create_upcoming_drop(client, admin_headers, days_ahead=400)
+    drop_id = create_open_drop(client, admin_headers, stock=2)["id"]
+    user_headers = create_user_and_login(client, "fast-json@test.com")
+    client.post(f"/drops/{drop_id}/join", headers=user_headers)
+
+    params = {"limit": 500}
+    default = client.get("/drops/", params=params)
+
+    monkeypatch.setattr(drops_router, "settings", replace(settings, fast_serialization=True))
+    drop_list_cache.invalidate()
+    fast = client.get("/drops/", params=params)
+    assert fast.content == default.content
+    assert fast.headers["ETag"] == default.headers["ETag"]
+
+    claim = client.post(f"/drops/{drop_id}/claim", headers=user_headers)
+    assert claim.status_code == 200
+    assert claim.json()["drop_id"] == drop_id
+    assert claim.content == schemas.Claim.model_validate_json(claim.content).model_dump_json().encode()
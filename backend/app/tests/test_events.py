@@ -0,0 +1,96 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app import crud, models
+from app.events import DropEventHub, event_hub, sse_stream
+
+
+def decode(message: bytes) -> dict:
+    data_line = [line for line in message.decode().splitlines() if line.startswith("data: ")][0]
+    return json.loads(data_line[len("data: "):])
+
+
+def test_hub_coalesces_bursts_per_drop():
+    async def scenario():
+        hub = DropEventHub(coalesce_interval=0.05)
+        subscriptions = [hub.subscribe(1) for _ in range(3)]
+        other = hub.subscribe(2)
+
+        for stock in (9, 8, 7, 6):
+            hub.publish(1, stock=stock)
+        first = [await s.get(timeout=1) for s in subscriptions]
+
+        # Aralık dolmadan gelen güncellemeler bir sonraki mesajda birleşir
+        hub.publish(1, stock=5)
+        hub.publish(1, window="ended")
+        second = await subscriptions[0].get(timeout=1)
+        return first, second, await other.get(timeout=0.1)
+
+    first, second, other = asyncio.run(scenario())
+
+    # İlk patlama tek mesaj; her aboneye aynı baytlar
+    assert len(set(first)) == 1
+    assert decode(first[0])["stock"] == 6
+    assert decode(second)["stock"] == 5
+    assert decode(second)["window"] == "ended"
+    assert other is None
+
+
+def test_slow_subscriber_keeps_latest_state():
+    async def scenario():
+        hub = DropEventHub(coalesce_interval=0, max_queue=2)
+        subscription = hub.subscribe(1)
+        for stock in (3, 2, 1):
+            hub.publish(1, stock=stock)
+            await asyncio.sleep(0.01)
+        return [decode(await subscription.get(timeout=1))["stock"] for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [2, 1]
+
+
+def test_sse_stream_sends_snapshot_then_claim_updates(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            drop = models.Drop(
+                title="Canlı Drop",
+                claim_window_start=now - timedelta(hours=1),
+                claim_window_end=now + timedelta(hours=1),
+                stock=2,
+            )
+            user = models.User(email="live@test.com", password_hash="x")
+            db.add_all([drop, user])
+            await db.commit()
+            drop_id, user_id = drop.id, user.id
+
+        subscription = event_hub.subscribe(drop_id)
+
+        async def never_disconnected():
+            return False
+
+        stream = sse_stream(subscription, {"drop_id": drop_id, "stock": 2}, never_disconnected)
+        snapshot = await stream.__anext__()
+
+        async with session_factory() as db:
+            await crud.create_claim(db, user_id=user_id, drop_id=drop_id)
+        update = await asyncio.wait_for(stream.__anext__(), timeout=1)
+
+        await stream.aclose()
+        return drop_id, snapshot, update
+
+    drop_id, snapshot, update = asyncio.run(scenario())
+
+    assert decode(snapshot)["stock"] == 2
+    assert decode(update)["stock"] == 1
+    assert decode(update)["drop_id"] == drop_id
+    # Akış kapanınca abonelik bırakılır
+    assert event_hub.subscriber_count(drop_id) == 0
+
+
+def test_events_for_unknown_drop_returns_404(client: TestClient):
+    response = client.get("/drops/999999/events")
+    assert response.status_code == 404
+    assert event_hub.subscriber_count(999999) == 0
@@ -0,0 +1,51 @@
+import asyncio
+import csv
+import io
+import json
+from functools import partial
+
+from fastapi.testclient import TestClient
+
+from app import crud, schemas
+from app.exports import WAITLIST_COLUMNS, stream_export
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+def test_claim_and_waitlist_exports_stream_every_row(client: TestClient, session_factory):
+    admin_headers = create_admin_and_login(client)
+    drop_id = create_open_drop(client, admin_headers, stock=5)["id"]
+    codes = {}
+    for i in range(3):
+        email = f"export{i}@test.com"
+        headers = create_user_and_login(client, email)
+        client.post(f"/drops/{drop_id}/join", headers=headers)
+        codes[email] = client.post(f"/drops/{drop_id}/claim", headers=headers).json()["code"]
+
+    response = client.get(f"/admin/drops/{drop_id}/claims.csv", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert f"drop-{drop_id}-claims.csv" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {row["email"]: row["code"] for row in rows} == codes
+    assert all(row["redeemed_at"] == "" for row in rows)
+
+    response = client.get(f"/admin/drops/{drop_id}/waitlist.ndjson", headers=admin_headers)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["position"] for line in lines] == [1, 2, 3]
+    assert [line["email"] for line in lines] == list(codes)
+
+    user_headers = create_user_and_login(client, "export-nosy@test.com")
+    assert client.get(f"/admin/drops/{drop_id}/claims.csv", headers=user_headers).status_code == 403
+    assert client.get(f"/admin/drops/{drop_id}/claims.xml", headers=admin_headers).status_code == 422
+    assert client.get("/admin/drops/999999/waitlist.csv", headers=admin_headers).status_code == 404
+
+    # Küçük parçalarla: sıra parçalar arasında kesintisiz sayılır, her parça ayrı gönderilir
+    async def collect():
+        source = partial(crud.stream_waitlist_export, chunk_size=2)
+        return [chunk async for chunk in stream_export(
+            source, drop_id, WAITLIST_COLUMNS, schemas.ExportFormat.csv, session_factory
+        )]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 3  # başlık + 2 parça
+    assert [row["position"] for row in csv.DictReader(io.StringIO(b"".join(chunks).decode()))] == ["1", "2", "3"]
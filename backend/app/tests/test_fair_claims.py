@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app import crud, models, priority
+from app.fair_queue import FairClaimQueue
+from app.tests.test_auth import QueryRecorder
+
+
+def test_coefficients_match_readme_seed():
+    assert priority.SEED == "a1369a5275d8"
+    assert (priority.A, priority.B, priority.C) == (8, 18, 4)
+
+
+def test_ranking_is_deterministic_and_uses_formula():
+    entries = [
+        priority.PriorityInput(user_id=1, join_latency_ms=0, account_age_days=0, rapid_actions=0),
+        priority.PriorityInput(user_id=2, join_latency_ms=7, account_age_days=17, rapid_actions=0),
+        priority.PriorityInput(user_id=3, join_latency_ms=7, account_age_days=17, rapid_actions=3),
+    ]
+    assert priority.priority_score(entries[1]) == 1000 + 7 + 17
+    assert priority.priority_score(entries[2]) == 1000 + 7 + 17 - 3
+
+    ranking = priority.rank_waitlist(5, entries)
+    assert ranking == [2, 3, 1]
+    assert priority.rank_waitlist(5, reversed(entries)) == ranking
+
+
+def test_fair_queue_allocates_stock_in_priority_order(session_factory):
+    n_users, stock = 8, 3
+
+    async def scenario():
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            drop = models.Drop(
+                title="Fair Drop",
+                claim_window_start=now - timedelta(hours=1),
+                claim_window_end=now + timedelta(hours=1),
+                stock=stock,
+            )
+            users = [models.User(email=f"fair{i}@test.com", password_hash="x") for i in range(n_users + 1)]
+            db.add(drop)
+            db.add_all(users)
+            await db.flush()
+            # Son kullanıcı bekleme listesinde değil
+            db.add_all([
+                models.Waitlist(user_id=u.id, drop_id=drop.id, created_at=now - timedelta(seconds=90 * i))
+                for i, u in enumerate(users[:n_users])
+            ])
+            await db.commit()
+            drop_id = drop.id
+            user_ids = [u.id for u in users]
+
+            expected = priority.rank_waitlist(drop_id, await crud.get_waitlist_priority_inputs(db, drop_id))
+
+        queue = FairClaimQueue(session_factory, batch_window=0.05)
+        results = await asyncio.gather(*(queue.submit(drop_id, user_id) for user_id in user_ids))
+        again = await queue.submit(drop_id, expected[0])
+
+        async with session_factory() as db:
+            remaining = (await crud.get_drop(db, drop_id)).stock
+        return user_ids, results, again, remaining, expected
+
+    user_ids, results, again, remaining, expected = asyncio.run(scenario())
+
+    outcome = dict(zip(user_ids, results))
+    winners = [user_id for user_id, result in outcome.items() if isinstance(result, models.Claim)]
+
+    assert sorted(winners) == sorted(expected[:stock])
+    assert all(outcome[user_id] == "OUT_OF_STOCK" for user_id in expected[stock:])
+    assert outcome[user_ids[-1]] == "NOT_IN_WAITLIST"
+    assert again == "ALREADY_CLAIMED"
+    assert remaining == 0
+
+
+def test_user_joining_after_ranking_is_not_rejected(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            drop = models.Drop(
+                title="Late Join Drop",
+                claim_window_start=now - timedelta(hours=1),
+                claim_window_end=now + timedelta(hours=1),
+                stock=2,
+            )
+            early, late, outsider = [models.User(email=f"late-join{i}@test.com", password_hash="x") for i in range(3)]
+            db.add_all([drop, early, late, outsider])
+            await db.flush()
+            db.add(models.Waitlist(user_id=early.id, drop_id=drop.id))
+            await db.commit()
+            drop_id, early_id, late_id, outsider_id = drop.id, early.id, late.id, outsider.id
+
+        queue = FairClaimQueue(session_factory, batch_window=0.01)
+        first = await queue.submit(drop_id, early_id)
+        async with session_factory() as db:
+            await crud.join_waitlist(db, user_id=late_id, drop_id=drop_id)
+        late_result = await queue.submit(drop_id, late_id)
+        outsider_result = await queue.submit(drop_id, outsider_id)
+        return first, late_result, outsider_result
+
+    first, late_result, outsider_result = asyncio.run(scenario())
+    assert isinstance(first, models.Claim)
+    assert isinstance(late_result, models.Claim)
+    assert outsider_result == "NOT_IN_WAITLIST"
+
+
+def test_late_joiners_do_not_rebuild_ranking(session_factory):
+    """Sıralamadan sonra katılan her kullanıcı yalnızca kendi geçmişini okur."""
+    n_late = 4
+
+    async def scenario():
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            drop = models.Drop(
+                title="Late Joiners Drop",
+                claim_window_start=now - timedelta(hours=1),
+                claim_window_end=now + timedelta(hours=1),
+                stock=1,
+            )
+            users = [models.User(email=f"late-joiners{i}@test.com", password_hash="x") for i in range(n_late + 1)]
+            db.add(drop)
+            db.add_all(users)
+            await db.flush()
+            db.add(models.Waitlist(user_id=users[0].id, drop_id=drop.id))
+            await db.commit()
+            drop_id, user_ids = drop.id, [u.id for u in users]
+
+        queue = FairClaimQueue(session_factory, batch_window=0.01)
+        await queue._priority_key(drop_id, user_ids[0])
+        async with session_factory() as db:
+            for user_id in user_ids[1:]:
+                await crud.join_waitlist(db, user_id=user_id, drop_id=drop_id)
+
+        with QueryRecorder() as recorder:
+            keys = [await queue._priority_key(drop_id, user_id) for user_id in user_ids[1:]]
+
+        async with session_factory() as db:
+            entries = await crud.get_waitlist_priority_inputs(db, drop_id)
+        expected = {entry.user_id: priority.priority_key(drop_id, entry) for entry in entries}
+        return recorder.statements, keys, [expected[user_id] for user_id in user_ids[1:]]
+
+    statements, keys, expected = asyncio.run(scenario())
+    assert keys == expected
+    assert len(statements) == n_late
+    assert not any(" IN (SELECT" in statement.upper() for statement in statements)
+
+
+def test_bulk_allocation_is_idempotent(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            drop = models.Drop(
+                title="Lottery Drop",
+                claim_window_start=now,
+                claim_window_end=now + timedelta(hours=1),
+                stock=3,
+            )
+            users = [models.User(email=f"lottery{i}@test.com", password_hash="x") for i in range(5)]
+            db.add(drop)
+            db.add_all(users)
+            await db.flush()
+            db.add_all([models.Waitlist(user_id=u.id, drop_id=drop.id) for u in users])
+            await db.commit()
+            drop_id = drop.id
+
+            expected = priority.rank_waitlist(drop_id, await crud.get_waitlist_priority_inputs(db, drop_id))
+
+        async with session_factory() as db:
+            first = await crud.allocate_drop(db, drop_id)
+        async with session_factory() as db:
+            rerun = await crud.allocate_drop(db, drop_id)
+            winners = set((await db.scalars(
+                select(models.Claim.user_id).where(models.Claim.drop_id == drop_id)
+            )).all())
+            missing = await crud.allocate_drop(db, 999999)
+        return first, rerun, winners, expected, missing
+
+    first, rerun, winners, expected, missing = asyncio.run(scenario())
+
+    assert (first.allocated, first.remaining_stock, first.waitlist_size) == (3, 0, 5)
+    assert winners == set(expected[:3])
+    assert (rerun.allocated, rerun.already_claimed, rerun.remaining_stock) == (0, 3, 0)
+    assert missing == "DROP_NOT_FOUND"
@@ -0,0 +1,104 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.idempotency import IdempotencyStore, StoredResponse, idempotency_store
+from app.tests.test_auth import QueryRecorder
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+def test_claim_retry_replays_first_response(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "retry@test.com")
+    drop_id = create_open_drop(client, admin_headers, stock=5)["id"]
+    other_id = create_open_drop(client, admin_headers, stock=5)["id"]
+    client.post(f"/drops/{drop_id}/join", headers=user_headers)
+
+    keyed = {**user_headers, "Idempotency-Key": "claim-retry-1"}
+    first = client.post(f"/drops/{drop_id}/claim", headers=keyed)
+    assert first.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+
+    # Bellekten: route, hız sınırı ve DB'ye hiç gidilmez
+    with QueryRecorder() as recorder:
+        retry = client.post(f"/drops/{drop_id}/claim", headers=keyed)
+    assert recorder.statements == []
+    assert retry.status_code == 200
+    assert retry.content == first.content
+    assert retry.headers["idempotent-replayed"] == "true"
+
+    # Yeniden başlatma / başka worker: tablodan, claim yeniden çalışmadan
+    idempotency_store.clear()
+    with QueryRecorder() as recorder:
+        retry = client.post(f"/drops/{drop_id}/claim", headers=keyed)
+    assert retry.content == first.content
+    assert not any("claims" in statement for statement in recorder.statements)
+
+    # Anahtarsız tekrar eskisi gibi 409
+    assert client.post(f"/drops/{drop_id}/claim", headers=user_headers).status_code == 409
+
+    mismatch = client.post(f"/drops/{other_id}/claim", headers=keyed)
+    assert mismatch.status_code == 422
+
+
+def test_batch_join_key_reused_with_different_body_is_rejected(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "batch-retry@test.com")
+    first_id = create_open_drop(client, admin_headers, stock=5)["id"]
+    second_id = create_open_drop(client, admin_headers, stock=5)["id"]
+
+    keyed = {**user_headers, "Idempotency-Key": "batch-join-1"}
+    first = client.post("/drops/join", json={"drop_ids": [first_id]}, headers=keyed)
+    assert first.status_code == 200
+    assert first.json()["joined"] == [first_id]
+
+    retry = client.post("/drops/join", json={"drop_ids": [first_id]}, headers=keyed)
+    assert retry.content == first.content
+    assert retry.headers["idempotent-replayed"] == "true"
+
+    mismatch = client.post("/drops/join", json={"drop_ids": [second_id]}, headers=keyed)
+    assert mismatch.status_code == 422
+    assert "idempotent-replayed" not in mismatch.headers
+
+    # DB katmanı da gövdeyi ayırt eder
+    idempotency_store.clear()
+    assert client.post("/drops/join", json={"drop_ids": [second_id]}, headers=keyed).status_code == 422
+    position = client.get(f"/drops/{second_id}/waitlist/position", headers=user_headers)
+    assert position.json()["joined"] is False
+
+
+def test_concurrent_duplicates_run_once(session_factory):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return StoredResponse(200, ((b"content-type", b"application/json"),), b'{"code":"X"}')
+
+    async def scenario():
+        store = IdempotencyStore(session_factory)
+        results = await asyncio.gather(*[
+            store.execute(991, "concurrent", "POST /drops/1/claim", handler) for _ in range(5)
+        ])
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert {response.body for response, _ in results} == {b'{"code":"X"}'}
+    assert sorted(replayed for _, replayed in results) == [False, True, True, True, True]
+
+
+def test_server_errors_are_not_stored(session_factory):
+    statuses = [503, 200]
+
+    async def handler():
+        return StoredResponse(statuses.pop(0), (), b"")
+
+    async def scenario():
+        store = IdempotencyStore(session_factory)
+        first, _ = await store.execute(992, "flaky", "POST /drops/1/join", handler)
+        store.clear()
+        second, replayed = await store.execute(992, "flaky", "POST /drops/1/join", handler)
+        return first.status, second.status, replayed
+
+    assert asyncio.run(scenario()) == (503, 200, False)
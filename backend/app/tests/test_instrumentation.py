@@ -0,0 +1,102 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal
+from app.instrumentation import RequestMetricsMiddleware, span
+from app.metrics import Registry, registry
+
+
+def test_request_metrics_use_full_route_template(client: TestClient):
+    queries = registry._metrics["dropspot_http_request_db_queries"]
+    labels = {"method": "GET", "route": "/drops/{drop_id}/events"}
+    before_count, before_sum = queries.count(**labels), queries.sum(**labels)
+
+    response = client.get("/drops/424242/events")
+    assert response.status_code == 404
+
+    # Drop sorgusu bu isteğe sayılır; etiket prefix'li şablondur (id değil)
+    assert queries.count(**labels) == before_count + 1
+    assert queries.sum(**labels) - before_sum >= 1
+    assert 'route="/drops/424242/events"' not in registry.render()
+
+
+def test_server_timing_header_reports_spans():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with span("auth"):
+            pass
+        return {"item_id": item_id}
+
+    metrics = Registry()
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics, server_timing=True)
+
+    with TestClient(app) as test_client:
+        response = test_client.get("/items/7")
+        test_client.get("/missing")
+
+    header = response.headers["server-timing"]
+    assert 'db;dur=0.00;desc="0 queries"' in header
+    assert "auth;dur=" in header and "app;dur=" in header
+
+    requests = metrics._metrics["dropspot_http_requests_total"]
+    assert requests.value(method="GET", route="/items/{item_id}", status="200") == 1
+    assert requests.value(method="GET", route="unmatched", status="404") == 1
+
+
+def test_commit_time_is_measured_separately():
+    app = FastAPI()
+
+    @app.post("/users")
+    async def create_user():
+        async with SessionLocal() as db:
+            db.add(models.User(email="commit-timing@test.com", password_hash="x"))
+            await db.commit()
+        return {}
+
+    metrics = Registry()
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics, server_timing=True)
+
+    with TestClient(app) as test_client:
+        response = test_client.post("/users")
+
+    # INSERT flush sırasında çalışır ve `db`de sayılır; commit ayrıca raporlanır
+    assert 'desc="1 commits"' in response.headers["server-timing"]
+    commits = metrics._metrics["dropspot_http_request_db_commit_seconds"]
+    assert commits.count(method="POST", route="/users") == 1
+    assert commits.sum(method="POST", route="/users") > 0
+
+
+def test_sqlite_write_lock_wait_is_measured():
+    app = FastAPI()
+
+    @app.post("/users")
+    async def create_user():
+        async with SessionLocal() as holder, SessionLocal() as db:
+            # Başka bir transaction yazma kilidini 50 ms tutar
+            holder.add(models.User(email="lock-holder@test.com", password_hash="x"))
+            await holder.flush()
+
+            async def release():
+                await asyncio.sleep(0.05)
+                await holder.commit()
+
+            releasing = asyncio.create_task(release())
+            db.add(models.User(email="lock-waiter@test.com", password_hash="x"))
+            await db.commit()
+            await releasing
+        return {}
+
+    metrics = Registry()
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics, server_timing=True)
+
+    with TestClient(app) as test_client:
+        response = test_client.post("/users")
+
+    assert "db-lock;dur=" in response.headers["server-timing"]
+    lock_wait = metrics._metrics["dropspot_http_request_db_lock_wait_seconds"]
+    assert lock_wait.sum(method="POST", route="/users") >= 0.04
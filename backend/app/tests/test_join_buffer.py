@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app import models
+from app.join_buffer import WaitlistJoinBuffer
+
+
+async def create_drop_and_users(session_factory, prefix, n_users):
+    async with session_factory() as db:
+        now = datetime.now(timezone.utc)
+        drop = models.Drop(
+            title=f"{prefix} Drop",
+            claim_window_start=now + timedelta(days=1),
+            claim_window_end=now + timedelta(days=2),
+            stock=1,
+        )
+        users = [models.User(email=f"{prefix}{i}@test.com", password_hash="x") for i in range(n_users)]
+        db.add(drop)
+        db.add_all(users)
+        await db.commit()
+        return drop.id, [u.id for u in users]
+
+
+async def waitlist_count(session_factory, drop_id):
+    async with session_factory() as db:
+        return await db.scalar(
+            select(func.count()).select_from(models.Waitlist).where(models.Waitlist.drop_id == drop_id)
+        )
+
+
+def test_buffered_joins_are_batched_and_read_your_writes(session_factory, tmp_path):
+    async def scenario():
+        drop_id, user_ids = await create_drop_and_users(session_factory, "buffered", 20)
+        buffer = WaitlistJoinBuffer(session_factory, str(tmp_path / "waitlist.journal"), flush_interval=0.01)
+        buffer.drain = _journal_only(buffer)
+        await buffer.start()
+
+        results = await asyncio.gather(*(buffer.join(user_id, drop_id) for user_id in user_ids))
+        before_flush = await waitlist_count(session_factory, drop_id)
+        # DB'ye inmemiş join'i aynı kullanıcı görür
+        repeat = await buffer.join(user_ids[0], drop_id)
+        missing = await buffer.join(user_ids[0], 999999)
+
+        await WaitlistJoinBuffer.drain(buffer)
+        after_flush = await waitlist_count(session_factory, drop_id)
+        await buffer.stop()
+        return results, before_flush, repeat, missing, after_flush
+
+    results, before_flush, repeat, missing, after_flush = asyncio.run(scenario())
+
+    assert results == ["SUCCESS"] * 20
+    assert before_flush == 0
+    assert repeat == "ALREADY_IN_WAITLIST"
+    assert missing == "DROP_NOT_FOUND"
+    assert after_flush == 20
+
+
+def test_join_after_flush_reports_already_in_waitlist(session_factory, tmp_path):
+    async def scenario():
+        drop_id, (user_id,) = await create_drop_and_users(session_factory, "rejoin", 1)
+        buffer = WaitlistJoinBuffer(session_factory, str(tmp_path / "waitlist.journal"), flush_interval=0.01)
+        await buffer.start()
+        first = await buffer.join(user_id, drop_id)
+        await buffer.drain()
+        assert not buffer.is_pending(user_id, drop_id)
+        again = await buffer.join(user_id, drop_id)
+        await buffer.stop()
+        return first, again, await waitlist_count(session_factory, drop_id)
+
+    assert asyncio.run(scenario()) == ("SUCCESS", "ALREADY_IN_WAITLIST", 1)
+
+
+def test_journal_is_replayed_after_crash(session_factory, tmp_path):
+    journal = tmp_path / "waitlist.journal"
+
+    async def crash():
+        drop_id, user_ids = await create_drop_and_users(session_factory, "crash", 5)
+        # DB'ye boşaltmayan bir tampon: join'ler yalnızca günlükte
+        buffer = WaitlistJoinBuffer(session_factory, str(journal), flush_interval=0.01)
+        buffer.drain = _journal_only(buffer)
+        await buffer.start()
+        await asyncio.gather(*(buffer.join(user_id, drop_id) for user_id in user_ids))
+        return drop_id, await waitlist_count(session_factory, drop_id)
+
+    drop_id, before = asyncio.run(crash())
+    assert before == 0
+    assert len(journal.read_text().splitlines()) == 5
+
+    async def restart():
+        buffer = WaitlistJoinBuffer(session_factory, str(journal), flush_interval=0.01)
+        await buffer.start()
+        count = await waitlist_count(session_factory, drop_id)
+        await buffer.stop()
+        return count
+
+    assert asyncio.run(restart()) == 5
+    assert journal.read_text() == ""
+
+
+def _journal_only(buffer):
+    # Çökme benzetimi: günlük diske yazılır ama DB'ye boşaltma hiç gerçekleşmez
+    async def drain():
+        await buffer._sync_journal()
+    return drain
@@ -0,0 +1,96 @@
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import app
+from app.metrics import Registry
+from app.rate_limit import InMemoryRateLimitBackend, RateLimiter, SQLiteRateLimitBackend, rate_limiter
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+def test_bucket_refills_over_time(tmp_path):
+    for backend in (InMemoryRateLimitBackend(max_keys=100), SQLiteRateLimitBackend(str(tmp_path / "limit.db"))):
+        assert backend.take("k", rate=20, burst=2) == 0
+        assert backend.take("k", rate=20, burst=2) == 0
+        wait = backend.take("k", rate=20, burst=2)
+        assert 0 < wait <= 0.05
+
+        time.sleep(0.06)
+        assert backend.take("k", rate=20, burst=2) == 0
+
+
+def test_memory_backend_is_bounded():
+    backend = InMemoryRateLimitBackend(max_keys=32, shards=4)
+    for i in range(1000):
+        backend.take(f"user:{i}", rate=1, burst=1)
+    assert len(backend) <= 32
+
+
+def test_sqlite_backend_is_shared_between_workers(tmp_path):
+    """Aynı dosyayı kullanan iki backend (iki worker) tek kovayı paylaşır."""
+    path = str(tmp_path / "shared.db")
+    worker1, worker2 = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+    assert worker1.take("claim:user:1", rate=1, burst=2) == 0
+    assert worker2.take("claim:user:1", rate=1, burst=2) == 0
+    assert worker1.take("claim:user:1", rate=1, burst=2) > 0
+
+
+def test_sqlite_backend_fails_open_when_locked(tmp_path):
+    """Başka worker dosya kilidini tutuyorsa event loop beklemez, istek geçer."""
+    path = str(tmp_path / "locked.db")
+    backend = SQLiteRateLimitBackend(path, busy_timeout=0.01)
+    assert backend.take("claim:user:1", rate=1, burst=1) == 0
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        assert backend.take("claim:user:1", rate=1, burst=1) == 0
+        assert time.perf_counter() - started < 0.5
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert backend.busy == 1
+    assert backend.take("claim:user:1", rate=1, burst=1) > 0  # kova hâlâ boş
+
+
+def test_user_rejection_does_not_spend_drop_tokens():
+    limiter = RateLimiter(
+        InMemoryRateLimitBackend(max_keys=100),
+        rules={"user": (1, 1), "drop": (1, 2)},
+        metrics=Registry(),
+    )
+    assert limiter.check("claim", user=1, drop=5) == 0
+    assert limiter.check("claim", user=1, drop=5) > 0  # kullanıcı kovası boş
+    assert limiter.check("claim", user=2, drop=5) == 0  # drop kovasında hâlâ jeton var
+    assert limiter.check("claim", user=3, drop=5) > 0
+    assert limiter.rejected.value(action="claim", scope="user") == 1
+    assert limiter.rejected.value(action="claim", scope="drop") == 1
+
+
+def test_claim_loop_gets_429_before_db_session(client: TestClient, monkeypatch):
+    admin_headers = create_admin_and_login(client)
+    bot_headers = create_user_and_login(client, "bot@test.com")
+    drop_id = create_open_drop(client, admin_headers, stock=5)["id"]
+
+    monkeypatch.setattr(rate_limiter, "rules", {"user": (1, 2)})
+    sessions = []
+    original_override = app.dependency_overrides[get_db]
+
+    async def counting_get_db():
+        sessions.append(1)
+        async for db in original_override():
+            yield db
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, counting_get_db)
+
+    statuses = [client.post(f"/drops/{drop_id}/claim", headers=bot_headers).status_code for _ in range(2)]
+    assert statuses == [200, 409]  # ikinci istek: zaten claim edildi
+    opened = len(sessions)
+
+    limited = client.post(f"/drops/{drop_id}/claim", headers=bot_headers)
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "1"
+    assert len(sessions) == opened
@@ -1,3 +1,8 @@
+import asyncio
+import time
+
+from app.hashing import HashingOverloaded, PasswordHasher, password_hasher
+from app.metrics import Registry
 from app.security import get_password_hash, verify_password
 
 def test_password_hashing():
@@ -18,4 +23,56 @@ def test_password_hashing():
     assert verify_password(password, hashed_password) == True
     
     # 4. Yanlış parolayla doğrulamanın BAŞARISIZ olduğundan emin ol
-    assert verify_password("wrongpassword", hashed_password) == False
\ No newline at end of file
+    assert verify_password("wrongpassword", hashed_password) == False
+
+def test_password_hasher_process_pool():
+    """
+    Unit Test: Süreç havuzundaki hash, ana süreçteki doğrulamayla uyumlu olmalı
+    ve gecikme metriği kaydedilmeli.
+    """
+    hasher = PasswordHasher(workers=1, max_queue=4, metrics=Registry())
+
+    async def scenario():
+        hashed = await hasher.hash("pool-password")
+        return hashed, await hasher.verify("pool-password", hashed)
+
+    try:
+        hashed, verified = asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+
+    assert verify_password("pool-password", hashed) == True
+    assert verified == True
+    assert hasher.latency.count(operation="hash") == 1
+
+
+def test_password_hasher_rejects_when_saturated():
+    """
+    Unit Test: Kuyruk sınırı doluyken gelen iş beklemeden reddedilmeli.
+    """
+    hasher = PasswordHasher(workers=0, max_queue=1, metrics=Registry())  # en fazla 2 iş
+
+    async def scenario():
+        return await asyncio.gather(
+            *(hasher._run("hash", time.sleep, 0.2) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+
+    assert sum(isinstance(r, HashingOverloaded) for r in results) == 1
+    assert hasher.rejected.value(operation="hash") == 1
+    assert hasher.pending == 0
+
+
+def test_signup_returns_503_when_hash_pool_is_saturated(client, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.post("/auth/signup", json={"email": "busy@test.com", "password": "123"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    metrics = client.get("/metrics").text
+    assert 'dropspot_password_hash_rejected_total{operation="hash"} 1' in metrics
+    assert "dropspot_password_hash_queue_depth 0" in metrics
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from app.cache import drop_list_cache
+from app.main import app
+from app.stock_gate import stock_gate
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop
+
+
+def test_import_does_not_touch_database_or_files(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path}/app.db",
+        "STOCK_GATE_BACKEND": "sqlite",
+        "STOCK_GATE_PATH": str(tmp_path / "stock_gate.db"),
+        "RATE_LIMIT_BACKEND": "sqlite",
+        "RATE_LIMIT_PATH": str(tmp_path / "rate_limit.db"),
+    }
+    subprocess.run([sys.executable, "-c", "import app.main"], check=True, env=env)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_startup_preloads_active_drops_and_listing(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    drop_id = create_open_drop(client, admin_headers, stock=4)["id"]
+    stock_gate.invalidate(drop_id)
+    drop_list_cache.invalidate()
+
+    with TestClient(app):
+        assert stock_gate.backend.get(drop_id)[0] == 4
+        assert drop_list_cache.get((None, None, 100)) is not None
@@ -0,0 +1,69 @@
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.stock_gate import InMemoryStockGateBackend, SQLiteStockGateBackend, StockGate
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+def test_sold_out_drop_is_rejected_without_db(client: TestClient, monkeypatch):
+    """
+    Stok bitince sonraki claim'ler crud.create_claim'e (ve DB'ye) ulaşmadan 409 almalı.
+    Admin stoğu artırınca kapı geçersiz kılınmalı ve claim tekrar mümkün olmalı.
+    """
+    admin_headers = create_admin_and_login(client)
+    user1_headers = create_user_and_login(client, "gate1@test.com")
+    user2_headers = create_user_and_login(client, "gate2@test.com")
+
+    drop_id = create_open_drop(client, admin_headers, stock=1)["id"]
+    assert client.post(f"/drops/{drop_id}/claim", headers=user1_headers).status_code == 200
+
+    calls = []
+    original_create_claim = crud.create_claim
+    monkeypatch.setattr(crud, "create_claim", lambda *a, **kw: calls.append(1) or original_create_claim(*a, **kw))
+
+    # Geçersiz token ile bile: kapı kimlik doğrulamadan önce çalışır
+    sold_out = client.post(f"/drops/{drop_id}/claim", headers={"Authorization": "Bearer invalid"})
+    assert sold_out.status_code == 409
+    assert sold_out.json()["detail"] == "Stok tükendi"
+    assert calls == []
+
+    # Yeniden stoklama kapıyı geçersiz kılar
+    update_res = client.put(f"/admin/drops/{drop_id}", json={"stock": 1}, headers=admin_headers)
+    assert update_res.status_code == 200
+    assert client.post(f"/drops/{drop_id}/claim", headers=user2_headers).status_code == 200
+    assert calls == [1]
+
+
+def test_stale_seed_after_invalidation_is_ignored(tmp_path):
+    """Geçersiz kılmadan önce okunan nesille gelen eski değer yazılmamalı."""
+    for backend in (InMemoryStockGateBackend(), SQLiteStockGateBackend(str(tmp_path / "gate.db"))):
+        gate = StockGate(backend)
+        generation = gate.generation(1)
+        gate.invalidate(1)
+        gate.seed(1, 0, generation)
+        assert not gate.is_sold_out(1)
+
+        gate.seed(1, 0)
+        assert gate.is_sold_out(1)
+
+
+def test_sqlite_gate_skips_writes_while_locked(tmp_path):
+    path = str(tmp_path / "locked-gate.db")
+    gate = StockGate(SQLiteStockGateBackend(path, busy_timeout=0.01))
+    gate.seed(1, 5)
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        gate.seed(1, 0)  # yazılamaz; ipucu olduğu için atlanır
+        assert not gate.is_sold_out(1)  # WAL: okuma yazanı beklemez
+        assert time.perf_counter() - started < 0.5
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    gate.seed(1, 0)
+    assert gate.is_sold_out(1)
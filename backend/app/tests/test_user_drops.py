@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import engine
+from app.tests.test_main_flow import create_admin_and_login, create_open_drop, create_user_and_login
+
+
+def count_queries(client: TestClient, headers: dict):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/me/drops", headers=headers)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    return response.json(), len(statements)
+
+
+def test_my_drops_reports_state_per_drop(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    first_headers = create_user_and_login(client, "dash-first@test.com")
+    user_headers = create_user_and_login(client, "dash-user@test.com")
+    joined_id = create_open_drop(client, admin_headers, stock=5)["id"]
+    claimed_id = create_open_drop(client, admin_headers, stock=5)["id"]
+    other_id = create_open_drop(client, admin_headers, stock=5)["id"]
+
+    client.post(f"/drops/{joined_id}/join", headers=first_headers)
+    client.post(f"/drops/{joined_id}/join", headers=user_headers)
+    client.post(f"/drops/{claimed_id}/join", headers=user_headers)
+    code = client.post(f"/drops/{claimed_id}/claim", headers=user_headers).json()["code"]
+
+    by_id = {item["id"]: item for item in client.get("/me/drops", headers=user_headers).json()}
+    assert (by_id[joined_id]["joined"], by_id[joined_id]["claimed"], by_id[joined_id]["waitlist_position"]) == (True, False, 2)
+    assert (by_id[claimed_id]["claimed"], by_id[claimed_id]["claim_code"], by_id[claimed_id]["waitlist_position"]) == (True, code, 1)
+    assert (by_id[other_id]["joined"], by_id[other_id]["claim_code"], by_id[other_id]["waitlist_position"]) == (False, None, None)
+
+    # Kullanıcının kendi leave isteği önbelleği hemen temizler
+    client.post(f"/drops/{joined_id}/leave", headers=user_headers)
+    by_id = {item["id"]: item for item in client.get("/me/drops", headers=user_headers).json()}
+    assert by_id[joined_id]["joined"] is False
+    assert client.get("/me/drops").status_code == 401
+
+
+def test_my_drops_query_count_is_constant(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "dash-count@test.com")
+
+    create_open_drop(client, admin_headers, stock=1)
+    client.post(f"/drops/{create_open_drop(client, admin_headers, stock=1)['id']}/join", headers=user_headers)
+    count_queries(client, user_headers)  # token önbelleği ısınsın
+    client.post("/drops/join", json={"drop_ids": [1]}, headers=user_headers)  # önbelleği temizler
+    items, few_drops = count_queries(client, user_headers)
+
+    for _ in range(20):
+        create_open_drop(client, admin_headers, stock=1)  # admin değişikliği önbelleği temizler
+    more_items, many_drops = count_queries(client, user_headers)
+
+    assert len(more_items) == len(items) + 20
+    assert many_drops == few_drops == 1
+
+    # Önbellekten: SQL yok; ETag eşleşirse 304
+    cached_items, cached_queries = count_queries(client, user_headers)
+    assert cached_queries == 0 and cached_items == more_items
+    etag = client.get("/me/drops", headers=user_headers).headers["ETag"]
+    assert client.get("/me/drops", headers={**user_headers, "If-None-Match": etag}).status_code == 304
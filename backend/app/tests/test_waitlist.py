@@ -0,0 +1,91 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import crud, models
+
+from app.tests.test_auth import QueryRecorder
+from app.tests.test_drop_listing import create_upcoming_drop
+from app.tests.test_main_flow import create_admin_and_login, create_user_and_login
+from app.waitlist_index import WaitlistIndex
+
+
+def test_join_and_leave_are_single_statements(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    drop_id = create_upcoming_drop(client, admin_headers, days_ahead=400)
+    headers = create_user_and_login(client, "upsert@test.com")
+
+    with QueryRecorder() as recorder:
+        response = client.post(f"/drops/{drop_id}/join", headers=headers)
+    assert response.json()["detail"] == "Başarıyla bekleme listesine eklendiniz."
+    assert len(recorder.statements) == 1
+    assert "ON CONFLICT" in recorder.statements[0]
+
+    response = client.post(f"/drops/{drop_id}/join", headers=headers)
+    assert response.json()["detail"] == "Zaten bekleme listesindesiniz."
+
+    with QueryRecorder() as recorder:
+        response = client.post(f"/drops/{drop_id}/leave", headers=headers)
+    assert response.json()["detail"] == "Başarıyla bekleme listesinden ayrıldınız."
+    assert len(recorder.statements) == 1
+
+    response = client.post(f"/drops/{drop_id}/leave", headers=headers)
+    assert response.json()["detail"] == "Zaten bekleme listesinde değilsiniz."
+
+    # Drop varlığı foreign key ile kontrol edilir
+    assert client.post("/drops/999999/join", headers=headers).status_code == 404
+
+
+def test_batch_join(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    drop_ids = [create_upcoming_drop(client, admin_headers, days_ahead=days) for days in (410, 420, 430)]
+    headers = create_user_and_login(client, "collection@test.com")
+    client.post(f"/drops/{drop_ids[0]}/join", headers=headers)
+
+    with QueryRecorder() as recorder:
+        response = client.post("/drops/join", json={"drop_ids": drop_ids[1:]}, headers=headers)
+    assert response.json() == {"joined": drop_ids[1:], "already_in_waitlist": [], "not_found": []}
+    assert len(recorder.statements) == 1
+
+    response = client.post("/drops/join", json={"drop_ids": drop_ids + [999999]}, headers=headers)
+    assert response.json() == {"joined": [], "already_in_waitlist": drop_ids, "not_found": [999999]}
+
+    assert client.post("/drops/join", json={"drop_ids": []}, headers=headers).status_code == 422
+
+
+def test_waitlist_position_is_served_without_counting(client: TestClient, session_factory):
+    admin_headers = create_admin_and_login(client)
+    drop_id = create_upcoming_drop(client, admin_headers, days_ahead=440)
+    users = [create_user_and_login(client, f"queue{i}@test.com") for i in range(3)]
+    for headers in users:
+        client.post(f"/drops/{drop_id}/join", headers=headers)
+
+    positions = [client.get(f"/drops/{drop_id}/waitlist/position", headers=headers).json() for headers in users]
+    assert [(item["position"], item["size"]) for item in positions] == [(1, 3), (2, 3), (3, 3)]
+
+    client.post(f"/drops/{drop_id}/leave", headers=users[1])
+    with QueryRecorder() as recorder:
+        last = client.get(f"/drops/{drop_id}/waitlist/position", headers=users[2]).json()
+    assert (last["position"], last["size"]) == (2, 2)
+    assert not any("count(" in statement.lower() for statement in recorder.statements)
+    left = client.get(f"/drops/{drop_id}/waitlist/position", headers=users[1]).json()
+    assert (left["joined"], left["position"], left["size"]) == (False, None, 2)
+    assert client.get("/drops/999999/waitlist/position", headers=users[0]).status_code == 404
+
+    # Açılıştaki gibi tablodan kurulan indeks aynı sonucu verir; başka bir
+    # worker'ın (burada doğrudan DB'ye yazılan) join'i tazelemede görünür
+    async def scenario():
+        async with session_factory() as db:
+            staying = await crud.get_user_by_email(db, "queue2@test.com")
+            rejoining = await crud.get_user_by_email(db, "queue1@test.com")
+        index = WaitlistIndex(session_factory, refresh_interval=0)
+        await index.rebuild()
+        before = await index.lookup(drop_id, staying.id)
+        async with session_factory() as db:
+            db.add(models.Waitlist(user_id=rejoining.id, drop_id=drop_id))
+            await db.commit()
+        return before, await index.lookup(drop_id, rejoining.id)
+
+    before, after = asyncio.run(scenario())
+    assert before == (2, 2)
+    assert after == (3, 3)
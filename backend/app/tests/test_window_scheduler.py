@@ -0,0 +1,137 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.events import event_hub
+from app.stock_gate import stock_gate
+from app.tests.test_auth import QueryRecorder
+from app.tests.test_main_flow import create_admin_and_login, create_user_and_login
+from app.window_scheduler import WindowScheduler, window_scheduler
+
+
+def test_offset_datetimes_are_stored_as_utc(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    istanbul = timezone(timedelta(hours=3))
+    start = datetime(2031, 5, 1, 12, 0, tzinfo=istanbul)
+    response = client.post("/admin/drops", json={
+        "title": "Saat dilimli",
+        "claim_window_start": start.isoformat(),
+        "claim_window_end": (start + timedelta(hours=2)).isoformat(),
+        "stock": 1,
+    }, headers=admin_headers)
+    assert response.status_code == 201
+
+    drop = response.json()
+    assert datetime.fromisoformat(drop["claim_window_start"]) == start
+    listed = client.get("/drops/", params={"status": "upcoming", "limit": 500}).json()
+    stored = next(item for item in listed if item["id"] == drop["id"])
+    assert datetime.fromisoformat(stored["claim_window_start"]) == datetime(2031, 5, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def test_closed_window_is_rejected_without_db(client: TestClient):
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "early@test.com")
+    start = datetime.now(timezone.utc) + timedelta(days=2)
+    drop_id = client.post("/admin/drops", json={
+        "title": "Erken",
+        "claim_window_start": start.isoformat(),
+        "claim_window_end": (start + timedelta(hours=1)).isoformat(),
+        "stock": 1,
+    }, headers=admin_headers).json()["id"]
+
+    with QueryRecorder() as recorder:
+        response = client.post(f"/drops/{drop_id}/claim", headers=user_headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Hak talebi penceresi kapalı"
+    assert recorder.statements == []
+
+
+def test_window_opened_by_another_worker_is_rechecked(client: TestClient, session_factory, monkeypatch):
+    admin_headers = create_admin_and_login(client)
+    user_headers = create_user_and_login(client, "rechecked@test.com")
+    start = datetime.now(timezone.utc) + timedelta(days=2)
+    drop_id = client.post("/admin/drops", json={
+        "title": "Başka worker açtı",
+        "claim_window_start": start.isoformat(),
+        "claim_window_end": (start + timedelta(hours=1)).isoformat(),
+        "stock": 1,
+    }, headers=admin_headers).json()["id"]
+
+    async def open_window_elsewhere():
+        async with session_factory() as db:
+            drop = await db.get(models.Drop, drop_id)
+            drop.claim_window_start = datetime.now(timezone.utc) - timedelta(minutes=1)
+            await db.commit()
+
+    # Bu worker'ın bellekteki sınırları hâlâ "upcoming"
+    asyncio.run(open_window_elsewhere())
+    monkeypatch.setattr(window_scheduler, "recheck_interval", 0)
+    response = client.post(f"/drops/{drop_id}/claim", headers=user_headers)
+    assert response.status_code == 200
+    assert window_scheduler.state(drop_id) == "active"
+
+
+def test_scheduler_publishes_transitions_and_prewarms(session_factory):
+    async def scenario():
+        now = datetime.now(timezone.utc)
+        async with session_factory() as db:
+            drop = models.Drop(
+                title="Zamanlanmış",
+                claim_window_start=now + timedelta(seconds=0.3),
+                claim_window_end=now + timedelta(seconds=0.6),
+                stock=7,
+            )
+            db.add(drop)
+            await db.commit()
+            drop_id = drop.id
+
+        scheduler = WindowScheduler(session_factory, prewarm_seconds=0.2, resync_interval=0)
+        subscription = event_hub.subscribe(drop_id)
+        await scheduler.start()
+        try:
+            assert scheduler.state(drop_id) == "upcoming"
+            assert stock_gate.backend.get(drop_id)[0] is None
+            await asyncio.sleep(0.2)
+            warmed = stock_gate.backend.get(drop_id)[0]
+            events = [await subscription.get(timeout=1) for _ in range(2)]
+            return warmed, events, scheduler.state(drop_id)
+        finally:
+            subscription.close()
+            await scheduler.stop()
+
+    warmed, events, final_state = asyncio.run(scenario())
+    assert warmed == 7
+    windows = [json.loads(event.decode().split("data: ", 1)[1])["window"] for event in events]
+    assert windows == ["active", "ended"]
+    assert final_state == "ended"
+
+
+def test_resync_reopens_gate_restocked_by_another_worker(session_factory):
+    async def scenario():
+        now = datetime.now(timezone.utc)
+        async with session_factory() as db:
+            drop = models.Drop(
+                title="Başka worker'da stoklandı",
+                claim_window_start=now - timedelta(hours=1),
+                claim_window_end=now + timedelta(hours=1),
+                stock=0,
+            )
+            db.add(drop)
+            await db.commit()
+            drop_id = drop.id
+
+        scheduler = WindowScheduler(session_factory, resync_interval=0)
+        await scheduler.load()
+        stock_gate.seed(drop_id, 0)  # bu worker OUT_OF_STOCK gördü
+
+        # Yeniden stoklama başka worker'da: bu sürecin kapısı geçersiz kılınmaz
+        async with session_factory() as db:
+            (await db.get(models.Drop, drop_id)).stock = 3
+            await db.commit()
+        await scheduler.load()
+        return stock_gate.is_sold_out(drop_id), stock_gate.backend.get(drop_id)[0]
+
+    assert asyncio.run(scenario()) == (False, 3)
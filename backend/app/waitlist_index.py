@@ -0,0 +1,170 @@
+"""
+Waitlist sıra indeksi: "80.000 kişiden 4.312. sıradasınız" bilgisi `COUNT(*)`
+olmadan, bellekten verilir.
+
+Her drop için katılım sırası (waitlist.id) sıralı bir `array` olarak tutulur:
+
+- boyut: `len(ids)`, O(1)
+- sıra: `bisect_right(ids, kendi_id)`, O(log n)
+- join: id'ler artan geldiği için çoğunlukla sona ekleme (O(1)); değilse `insort`
+- leave: ikili arama + silme (C seviyesinde `memmove`)
+
+Kullanıcının kendi waitlist id'si `user_id -> id` sözlüğündedir. Açılışta
+`rebuild` tabloyu tek sorguda akıtarak kurar; `crud.join_waitlist`,
+`join_waitlists`, `insert_waitlist_entries` ve `leave_waitlist` artımlı günceller.
+
+Çoklu worker: başka worker'ın join'leri, drop okunurken en fazla
+`refresh_interval` saniyede bir DB'den artımlı (son görülen id'den sonrası)
+çekilir; başka worker'ın leave'leri artımlı görülemediği için drop'un listesi
+en fazla `resync_interval` saniyede bir baştan yüklenir
+(`ix_waitlist_drop_id` üzerinden aralık taraması). Tek worker'da ikisi de
+yalnızca güvenlik ağıdır.
+"""
+
+import asyncio
+import time
+from array import array
+from bisect import bisect_right, insort
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+
+
+class DropWaitlist:
+    """Tek drop'un katılım sırası."""
+
+    __slots__ = ("ids", "members", "last_id")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.members: Dict[int, int] = {}  # user_id -> waitlist id
+        self.last_id = 0
+
+    def add(self, user_id: int, waitlist_id: int) -> None:
+        if user_id in self.members:
+            return
+        self.members[user_id] = waitlist_id
+        if not self.ids or waitlist_id > self.ids[-1]:
+            self.ids.append(waitlist_id)
+        else:
+            insort(self.ids, waitlist_id)
+        self.last_id = max(self.last_id, waitlist_id)
+
+    def remove(self, user_id: int) -> None:
+        waitlist_id = self.members.pop(user_id, None)
+        if waitlist_id is None:
+            return
+        index = bisect_right(self.ids, waitlist_id) - 1
+        if index >= 0 and self.ids[index] == waitlist_id:
+            del self.ids[index]
+
+    def position(self, user_id: int) -> Optional[int]:
+        waitlist_id = self.members.get(user_id)
+        if waitlist_id is None:
+            return None
+        return bisect_right(self.ids, waitlist_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class WaitlistIndex:
+    def __init__(self, session_factory, refresh_interval: float = 1.0, resync_interval: float = 60.0):
+        self._session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.resync_interval = resync_interval
+        self._drops: Dict[int, DropWaitlist] = {}
+        self._refreshed_at: Dict[int, float] = {}
+        self._resynced_at: Dict[int, float] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def _drop(self, drop_id: int) -> DropWaitlist:
+        waitlist = self._drops.get(drop_id)
+        if waitlist is None:
+            waitlist = self._drops[drop_id] = DropWaitlist()
+        return waitlist
+
+    def add(self, drop_id: int, user_id: int, waitlist_id: int) -> None:
+        self._drop(drop_id).add(user_id, waitlist_id)
+
+    def add_many(self, rows: Iterable[Tuple[int, int, int]]) -> None:
+        """(drop_id, user_id, waitlist_id) satırları."""
+        for drop_id, user_id, waitlist_id in rows:
+            self._drop(drop_id).add(user_id, waitlist_id)
+
+    def remove(self, drop_id: int, user_id: int) -> None:
+        waitlist = self._drops.get(drop_id)
+        if waitlist is not None:
+            waitlist.remove(user_id)
+
+    def forget_drop(self, drop_id: int) -> None:
+        self._drops.pop(drop_id, None)
+        self._refreshed_at.pop(drop_id, None)
+        self._resynced_at.pop(drop_id, None)
+
+    async def rebuild(self) -> None:
+        """Tüm drop'ların sırasını `waitlist` tablosundan yeniden kurar (açılışta)."""
+        drops: Dict[int, DropWaitlist] = {}
+        async with self._session_factory() as db:
+            rows = await db.stream(
+                select(models.Waitlist.drop_id, models.Waitlist.user_id, models.Waitlist.id)
+                .order_by(models.Waitlist.drop_id, models.Waitlist.id)
+            )
+            async for partition in rows.partitions(10_000):
+                for drop_id, user_id, waitlist_id in partition:
+                    waitlist = drops.get(drop_id)
+                    if waitlist is None:
+                        waitlist = drops[drop_id] = DropWaitlist()
+                    waitlist.add(user_id, waitlist_id)
+        now = time.monotonic()
+        self._drops = drops
+        self._refreshed_at = {drop_id: now for drop_id in drops}
+        self._resynced_at = dict(self._refreshed_at)
+
+    async def _sync(self, drop_id: int) -> None:
+        lock = self._locks.setdefault(drop_id, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            full = now - self._resynced_at.get(drop_id, 0) >= self.resync_interval
+            if not full and now - self._refreshed_at.get(drop_id, 0) < self.refresh_interval:
+                return  # bekleyen başka istek az önce tazeledi
+            waitlist = DropWaitlist() if full else self._drop(drop_id)
+            query = (
+                select(models.Waitlist.user_id, models.Waitlist.id)
+                .where(models.Waitlist.drop_id == drop_id, models.Waitlist.id > waitlist.last_id)
+                .order_by(models.Waitlist.id)
+            )
+            async with self._session_factory() as db:
+                rows = (await db.execute(query)).all()
+            if full:
+                # Sorgu sırasında gelen join'ler (id > last_id) sonraki artımlı tazelemede eklenir
+                for user_id, waitlist_id in rows:
+                    waitlist.add(user_id, waitlist_id)
+                self._drops[drop_id] = waitlist
+                self._resynced_at[drop_id] = now
+            else:
+                for user_id, waitlist_id in rows:
+                    waitlist.add(user_id, waitlist_id)
+            self._refreshed_at[drop_id] = now
+
+    async def lookup(self, drop_id: int, user_id: int) -> Tuple[Optional[int], int]:
+        """(kullanıcının 1'den başlayan sırası veya None, waitlist boyutu)."""
+        now = time.monotonic()
+        if (now - self._refreshed_at.get(drop_id, 0) >= self.refresh_interval
+                or now - self._resynced_at.get(drop_id, 0) >= self.resync_interval):
+            await self._sync(drop_id)
+        waitlist = self._drops.get(drop_id)
+        if waitlist is None:
+            return None, 0
+        return waitlist.position(user_id), len(waitlist)
+
+
+waitlist_index = WaitlistIndex(
+    SessionLocal,
+    refresh_interval=settings.waitlist_index_refresh_ms / 1000,
+    resync_interval=settings.waitlist_index_resync_seconds,
+)
@@ -0,0 +1,224 @@
+"""
+Claim penceresi zamanlayıcısı: drop'ların upcoming -> active -> ended
+geçişlerini sınır anlarında, istek beklemeden yapar.
+
+Her drop'un pencere sınırları bellekte epoch saniye olarak tutulur
+(`crud.create_drop`/`update_drop` ile güncellenir, `delete_drop` ile silinir):
+
+- `state(drop_id)`: O(1) pencere durumu; claim isteği DB'ye gitmeden önce
+  kapalı pencereyi reddeder (bkz. `routers/drops.reject_closed_window`).
+  Bilinmeyen drop için None döner ve karar DB'ye bırakılır.
+- Sınır anlarında `loop.call_at` zamanlayıcıları geçişi yayınlar:
+  SSE abonelerine `window` olayı (`event_hub`) ve drop listesi önbelleğinin
+  temizlenmesi (`?status=active` sonuçları TTL beklemeden değişir).
+- Pencere açılmadan `prewarm_seconds` önce drop'un stoğu okunup stok kapısı
+  tohumlanır; açılıştaki ilk claim dalgası soğuk kapıya çarpmaz.
+
+- Süreç içi (`memory`) stok kapısı başka worker'ın yeniden stoklamasını
+  görmez; her senkronizasyonda DB'de stoğu olduğu halde "tükendi" diyen kapı
+  DB'deki stokla yeniden tohumlanır.
+
+Durum sınırlardan hesaplanır; zamanlayıcı gecikse bile `state` doğru kalır.
+Gerçek pencere kontrolü her zaman claim'in koşullu UPDATE'indedir, buradaki
+durum yalnızca erken reddetmek içindir. Çoklu worker'da başka worker'ın
+yaptığı pencere değişiklikleri `resync_interval` saniyede bir DB'den okunur;
+bu arada bellekteki sınırlar eski olabileceğinden kapalı pencere reddi
+`confirm_state` ile verilir: sınırlar `recheck_interval` saniyeden eskiyse
+drop'un satırı DB'den yeniden okunur (drop başına en fazla bir eşzamanlı sorgu).
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from . import models
+from .cache import drop_list_cache
+from .config import settings
+from .database import SessionLocal
+from .events import event_hub
+from .stock_gate import stock_gate
+
+
+class WindowScheduler:
+    def __init__(
+        self,
+        session_factory,
+        prewarm_seconds: float = 2.0,
+        resync_interval: float = 10.0,
+        recheck_interval: float = 1.0,
+    ):
+        self._session_factory = session_factory
+        self.prewarm_seconds = prewarm_seconds
+        self.resync_interval = resync_interval
+        self.recheck_interval = recheck_interval
+        self._windows: Dict[int, Tuple[float, float]] = {}
+        # drop_id -> sınırların DB'den / bu worker'ın yazmasından öğrenildiği an (monotonic)
+        self._confirmed_at: Dict[int, float] = {}
+        self._recheck_locks: Dict[int, asyncio.Lock] = {}
+        self._states: Dict[int, str] = {}
+        self._timers: Dict[int, List[asyncio.TimerHandle]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._resync_task: Optional[asyncio.Task] = None
+        self.transitions = 0
+
+    def state(self, drop_id: int, now: Optional[float] = None) -> Optional[str]:
+        window = self._windows.get(drop_id)
+        if window is None:
+            return None
+        now = time.time() if now is None else now
+        if now < window[0]:
+            return "upcoming"
+        if now > window[1]:
+            return "ended"
+        return "active"
+
+    async def confirm_state(self, drop_id: int) -> Optional[str]:
+        """
+        `state` ile aynı, ama sınırlar `recheck_interval` saniyeden eskiyse önce
+        drop'un satırını DB'den yeniden okur (başka worker pencereyi değiştirmiş olabilir).
+        """
+        if time.monotonic() - self._confirmed_at.get(drop_id, float("-inf")) >= self.recheck_interval:
+            lock = self._recheck_locks.setdefault(drop_id, asyncio.Lock())
+            async with lock:
+                # Bekleyen başka istek az önce okuduysa tekrar sorgulanmaz
+                if time.monotonic() - self._confirmed_at.get(drop_id, float("-inf")) >= self.recheck_interval:
+                    async with self._session_factory() as db:
+                        row = (await db.execute(
+                            select(models.Drop.claim_window_start, models.Drop.claim_window_end)
+                            .where(models.Drop.id == drop_id)
+                        )).first()
+                    if row is None:
+                        self.forget(drop_id)
+                    else:
+                        self.track(drop_id, *row)
+        return self.state(drop_id)
+
+    def track(self, drop_id: int, start: datetime, end: datetime) -> None:
+        """Drop'un pencere sınırlarını kaydeder ve zamanlayıcılarını yeniden kurar."""
+        window = (models.as_utc(start).timestamp(), models.as_utc(end).timestamp())
+        self._confirmed_at[drop_id] = time.monotonic()
+        if self._windows.get(drop_id) == window:
+            return
+        self._cancel(drop_id)
+        self._windows[drop_id] = window
+        previous, state = self._states.get(drop_id), self.state(drop_id)
+        self._states[drop_id] = state
+        if previous is not None and previous != state:
+            self._emit(drop_id, state)  # pencere değişikliği durumu hemen değiştirdi
+        if self._loop is None:
+            return
+
+        # call_at monotonic saat ister: duvar saatiyle farkı bir kez hesaplanır
+        offset = self._loop.time() - time.time()
+        handles = []
+        prewarm_at = window[0] - self.prewarm_seconds
+        if prewarm_at > time.time():
+            handles.append(self._loop.call_at(prewarm_at + offset, self._start_prewarm, drop_id))
+        for boundary in window:
+            if boundary >= time.time():
+                # Sınırın hemen sonrası: `state` yeni durumu görsün
+                handles.append(self._loop.call_at(boundary + offset + 0.001, self._transition, drop_id))
+        self._timers[drop_id] = handles
+
+    def forget(self, drop_id: int) -> None:
+        self._cancel(drop_id)
+        self._windows.pop(drop_id, None)
+        self._states.pop(drop_id, None)
+        self._confirmed_at.pop(drop_id, None)
+        self._recheck_locks.pop(drop_id, None)
+
+    def _cancel(self, drop_id: int) -> None:
+        for handle in self._timers.pop(drop_id, []):
+            handle.cancel()
+
+    def _transition(self, drop_id: int) -> None:
+        state = self.state(drop_id)
+        if state is None or self._states.get(drop_id) == state:
+            return
+        self._states[drop_id] = state
+        self._emit(drop_id, state)
+
+    def _emit(self, drop_id: int, state: str) -> None:
+        self.transitions += 1
+        event_hub.publish(drop_id, window=state)
+        drop_list_cache.invalidate()
+
+    def _start_prewarm(self, drop_id: int) -> None:
+        asyncio.ensure_future(self._prewarm(drop_id))
+
+    async def _prewarm(self, drop_id: int) -> None:
+        generation = stock_gate.generation(drop_id)
+        try:
+            async with self._session_factory() as db:
+                stock = await db.scalar(select(models.Drop.stock).where(models.Drop.id == drop_id))
+        except Exception as e:
+            print(f"Pencere ön ısıtma hatası (drop {drop_id}): {e}")
+            return
+        if stock is not None:
+            stock_gate.seed(drop_id, stock, generation)
+
+    async def load(self, seed_stock: bool = False) -> None:
+        """
+        Tüm drop'ların pencerelerini DB'den okur; silinmiş drop'lar unutulur.
+        `seed_stock`: penceresi açık veya ön ısıtma aralığındaki drop'ların stok
+        kapısı aynı sorgudan tohumlanır (açılışta; zamanlayıcı bunlar için kurulmaz).
+        """
+        # Sorgudan ÖNCE okunan nesil: sorgu sırasında yapılan yeniden stoklama eski değerle ezilmesin
+        generations = {}
+        if not seed_stock and not stock_gate.backend.shared:
+            generations = {drop_id: stock_gate.generation(drop_id) for drop_id in self._windows}
+        async with self._session_factory() as db:
+            rows = (await db.execute(select(
+                models.Drop.id, models.Drop.claim_window_start, models.Drop.claim_window_end, models.Drop.stock
+            ))).all()
+        for drop_id in set(self._windows) - {row[0] for row in rows}:
+            self.forget(drop_id)
+        now = time.time()
+        for drop_id, start, end, stock in rows:
+            self.track(drop_id, start, end)
+            window = self._windows[drop_id]
+            if seed_stock and window[0] - self.prewarm_seconds <= now <= window[1]:
+                stock_gate.seed(drop_id, stock)
+            elif drop_id in generations and stock > 0 and stock_gate.is_sold_out(drop_id):
+                stock_gate.seed(drop_id, stock, generations[drop_id])
+
+    async def _resync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.resync_interval)
+            try:
+                await self.load()
+            except Exception as e:
+                print(f"Pencere zamanlayıcısı senkronizasyon hatası: {e}")
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self.load(seed_stock=True)
+        if self.resync_interval > 0:
+            self._resync_task = asyncio.create_task(self._resync_loop())
+
+    async def stop(self) -> None:
+        if self._resync_task is not None:
+            self._resync_task.cancel()
+            try:
+                await self._resync_task
+            except asyncio.CancelledError:
+                pass
+            self._resync_task = None
+        for drop_id in list(self._timers):
+            self._cancel(drop_id)
+        self._windows.clear()
+        self._states.clear()
+        self._confirmed_at.clear()
+        self._recheck_locks.clear()
+        self._loop = None
+
+
+window_scheduler = WindowScheduler(
+    SessionLocal,
+    prewarm_seconds=settings.window_prewarm_seconds,
+    resync_interval=settings.window_resync_seconds,
+    recheck_interval=settings.window_recheck_ms / 1000,
+)
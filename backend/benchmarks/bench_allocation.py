@@ -0,0 +1,68 @@
+"""
+Toplu dağıtım testi: N kullanıcılık bir waitlist'e sahip drop için
+`crud.allocate_drop` çalıştırır ve satır/saniye raporlar. İkinci çalıştırma
+idempotent olmalı (hiç satır eklememeli).
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_allocation --waitlist 100000 --stock 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp(prefix="dropspot-allocation-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/allocation.db")
+
+from sqlalchemy import create_engine, insert
+
+from app import crud, models
+from app.database import SessionLocal, engine as app_engine
+
+
+def seed(waitlist, stock):
+    engine = create_engine(os.environ["DATABASE_URL"].replace("+aiosqlite", ""))
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"email": f"lottery{i}@test.com", "password_hash": "x"} for i in range(waitlist)
+        ])
+        conn.execute(insert(models.Drop), [{
+            "title": "Lottery Drop",
+            "claim_window_start": now,
+            "claim_window_end": now + timedelta(hours=1),
+            "stock": stock,
+        }])
+        conn.execute(insert(models.Waitlist), [
+            {"user_id": i + 1, "drop_id": 1, "created_at": now - timedelta(milliseconds=37 * i)}
+            for i in range(waitlist)
+        ])
+    engine.dispose()
+
+
+async def run(waitlist, stock):
+    seed(waitlist, stock)
+    reports = []
+    for _ in range(2):
+        async with SessionLocal() as db:
+            reports.append((await crud.allocate_drop(db, 1)).model_dump())
+    await app_engine.dispose()
+    return {"first_run": reports[0], "rerun": reports[1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--waitlist", type=int, default=100_000)
+    parser.add_argument("--stock", type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.waitlist, args.stock)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Yük testi: tek bir uygulama örneğine (tek worker) çok sayıda eşzamanlı
+join/claim isteği gönderir ve istek/saniye ile gecikme yüzdeliklerini ölçer.
+
+İstekler uygulamaya ASGI üzerinden (ağ olmadan) gider; böylece ölçülen şey
+sunucunun kendi eşzamanlılık davranışıdır (event loop / thread pool).
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_async_load --clients 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp(prefix="dropspot-load-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/load.db")
+os.environ.setdefault("JOIN_JOURNAL_PATH", f"{_tmp}/waitlist.journal")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+# Tüm sanal istemciler aynı adresten gelir: IP ve drop kovaları kapalı, kullanıcı kovası açık
+os.environ.setdefault("RATE_LIMIT_IP_PER_SECOND", "0")
+os.environ.setdefault("RATE_LIMIT_DROP_PER_SECOND", "0")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+import httpx
+from sqlalchemy import create_engine, event, insert
+
+from app import models, security
+from app.database import engine as app_engine
+from app.main import app
+
+
+def seed(n_users, stock):
+    # Kurulum senkron sürücüyle yapılır; ölçüm sadece HTTP istekleridir
+    engine = create_engine(os.environ["DATABASE_URL"].replace("+aiosqlite", ""))
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"email": f"load{i}@test.com", "password_hash": "x"} for i in range(n_users)
+        ])
+        conn.execute(insert(models.Drop), [{
+            "title": "Load Drop",
+            "claim_window_start": now - timedelta(hours=1),
+            "claim_window_end": now + timedelta(hours=1),
+            "stock": stock,
+        }])
+    engine.dispose()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(clients, action, stock):
+    seed(clients, stock)
+    tokens = [
+        security.create_access_token({"sub": f"load{i}@test.com", "user_id": i + 1, "is_admin": False})
+        for i in range(clients)
+    ]
+    latencies, statuses = [], {}
+    queries = [0]
+
+    def count_query(*args):
+        queries[0] += 1
+
+    event.listen(app_engine.sync_engine, "before_cursor_execute", count_query)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start_gate = asyncio.Event()
+
+        async def one(token):
+            await start_gate.wait()
+            t0 = time.perf_counter()
+            res = await client.post(f"/drops/1/{action}", headers={"Authorization": f"Bearer {token}"})
+            latencies.append(time.perf_counter() - t0)
+            statuses[res.status_code] = statuses.get(res.status_code, 0) + 1
+
+        tasks = [asyncio.create_task(one(token)) for token in tokens]
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        start_gate.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "action": action,
+        "clients": clients,
+        "requests_per_s": round(clients / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1),
+        "db_queries_per_request": round(queries[0] / clients, 2),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--action", choices=["join", "claim"], default="join")
+    parser.add_argument("--stock", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.clients, args.action, args.stock)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Katalog yükleme: tek tek POST /admin/drops ile toplu POST/PATCH /admin/drops/bulk.
+
+İstekler uygulamaya ASGI üzerinden (ağ olmadan) gider. Her yol için süre,
+drop/sn ve çalışan SQL ifadesi sayısı raporlanır. Tek tek yol uzun sürdüğü
+için daha az satırla (`--single`) ölçülür.
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_bulk_import --drops 50000
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp(prefix="dropspot-bulk-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bulk.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+import httpx
+from sqlalchemy import create_engine, event, insert
+
+from app import models, security
+from app.database import engine as app_engine
+from app.main import app
+
+COLUMNS = ["title", "description", "claim_window_start", "claim_window_end", "stock"]
+
+
+def seed():
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"email": "admin@test.com", "password_hash": "x", "is_admin": True}])
+    engine.dispose()
+
+
+def catalogue(n, prefix):
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    return [{
+        "title": f"{prefix} {i}",
+        "description": "Sezon kataloğu",
+        "claim_window_start": (start + timedelta(minutes=i)).isoformat(),
+        "claim_window_end": (start + timedelta(minutes=i, hours=1)).isoformat(),
+        "stock": 100,
+    } for i in range(n)]
+
+
+def as_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def as_ndjson(rows):
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+async def measure(name, rows, send):
+    queries = [0]
+
+    def count_query(*args):
+        queries[0] += 1
+
+    event.listen(app_engine.sync_engine, "before_cursor_execute", count_query)
+    started = time.perf_counter()
+    try:
+        succeeded = await send()
+    finally:
+        event.remove(app_engine.sync_engine, "before_cursor_execute", count_query)
+    elapsed = time.perf_counter() - started
+    return {
+        "path": name,
+        "rows": rows,
+        "succeeded": succeeded,
+        "seconds": round(elapsed, 2),
+        "drops_per_s": round(rows / elapsed),
+        "sql_statements": queries[0],
+    }
+
+
+async def run(n_drops, n_single):
+    seed()
+    token = security.create_access_token({"sub": "admin@test.com", "user_id": 1, "is_admin": True})
+    headers = {"Authorization": f"Bearer {token}"}
+    results = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def single():
+            ok = 0
+            for row in catalogue(n_single, "Tek"):
+                response = await client.post("/admin/drops", json=row, headers=headers)
+                ok += response.status_code == 201
+            return ok
+
+        async def bulk(prefix, content_type, encode):
+            rows = catalogue(n_drops, prefix)
+            response = await client.post(
+                "/admin/drops/bulk", content=encode(rows), headers={**headers, "Content-Type": content_type}
+            )
+            body = response.json()
+            bulk.ids = [item["id"] for item in body["results"]]
+            return body["succeeded"]
+
+        async def patch():
+            updates = [{"id": drop_id, "stock": 50} for drop_id in bulk.ids]
+            response = await client.patch("/admin/drops/bulk", json=updates, headers=headers)
+            return response.json()["succeeded"]
+
+        results.append(await measure("single POST /admin/drops", n_single, single))
+        results.append(await measure("bulk json", n_drops, lambda: bulk("JSON", "application/json", lambda rows: json.dumps(rows).encode())))
+        results.append(await measure("bulk ndjson", n_drops, lambda: bulk("NDJSON", "application/x-ndjson", as_ndjson)))
+        results.append(await measure("bulk csv", n_drops, lambda: bulk("CSV", "text/csv", as_csv)))
+        results.append(await measure("bulk patch (stock)", n_drops, patch))
+
+    await app_engine.dispose()
+    print(json.dumps({"drops": n_drops, "results": results}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drops", type=int, default=50_000)
+    parser.add_argument("--single", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.drops, args.single))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Claim kodu biçimlerinin indeks boyutu ve arama hızı (varsayılan 1M claim).
+
+Aynı `claims` şeması üç kod biçimiyle ayrı SQLite dosyalarına yazılır:
+
+- uuid  : eski `str(uuid.uuid4())` (36 karakter TEXT)
+- short : `app/claim_codes.py` (12 karakter TEXT, şu anki biçim)
+- int   : kısa kodun 60 bitlik tamsayı hali (INTEGER, karşılaştırma için)
+
+Her biri için kod üretme + ekleme süresi, `code` indeksinin boyutu (dbstat),
+rastgele mevcut kod aramaları/sn ve kontrol karakterleri sayesinde DB'ye hiç
+gitmeden reddedilen uydurma kodlar/sn raporlanır.
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_claim_codes --claims 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from app.claim_codes import ALPHABET, CODE_LENGTH, ClaimCodec
+
+codec = ClaimCodec("benchmark")
+
+
+def short_code_int(code):
+    value = 0
+    for char in code:
+        value = (value << 5) | ALPHABET.index(char)
+    return value
+
+
+FORMATS = {
+    "uuid": ("TEXT", lambda drop_id, user_id: str(uuid.uuid4())),
+    "short": ("TEXT", codec.encode),
+    "int": ("INTEGER", lambda drop_id, user_id: short_code_int(codec.encode(drop_id, user_id))),
+}
+
+
+def pairs(n_claims, users_per_drop=1000):
+    for i in range(n_claims):
+        yield i // users_per_drop + 1, i % users_per_drop + 1
+
+
+def run_format(name, n_claims, lookups, directory):
+    column_type, make_code = FORMATS[name]
+    path = os.path.join(directory, f"{name}.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        f"CREATE TABLE claims (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, drop_id INTEGER NOT NULL,"
+        f" code {column_type} NOT NULL, created_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.execute("CREATE UNIQUE INDEX ix_claims_code ON claims (code)")
+
+    started = time.perf_counter()
+    rows = [(user_id, drop_id, make_code(drop_id, user_id)) for drop_id, user_id in pairs(n_claims)]
+    generate_seconds = time.perf_counter() - started
+    with conn:
+        conn.executemany("INSERT INTO claims (user_id, drop_id, code) VALUES (?, ?, ?)", rows)
+    insert_seconds = time.perf_counter() - started - generate_seconds
+
+    index_bytes = conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = 'ix_claims_code'").fetchone()[0]
+
+    sample = random.Random(7).sample(rows, min(lookups, len(rows)))
+    started = time.perf_counter()
+    for _, _, code in sample:
+        assert conn.execute("SELECT id FROM claims WHERE code = ?", (code,)).fetchone() is not None
+    lookup_seconds = time.perf_counter() - started
+    conn.close()
+
+    return {
+        "format": name,
+        "code_example": rows[-1][2],
+        "generate_seconds": round(generate_seconds, 2),
+        "insert_seconds": round(insert_seconds, 2),
+        "code_index_mb": round(index_bytes / 1e6, 1),
+        "db_file_mb": round(os.path.getsize(path) / 1e6, 1),
+        "lookups_per_s": round(len(sample) / lookup_seconds),
+    }
+
+
+def reject_rate(n):
+    rng = random.Random(11)
+    forged = ["".join(rng.choice(ALPHABET) for _ in range(CODE_LENGTH)) for _ in range(n)]
+    started = time.perf_counter()
+    accepted = sum(1 for code in forged if codec.decode(code) is not None)
+    elapsed = time.perf_counter() - started
+    return {
+        "forged_codes": n,
+        "rejected_without_db": n - accepted,
+        "decode_per_s": round(n / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS))
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="dropspot-codes-")
+    results = [run_format(name, args.claims, args.lookups, directory) for name in args.formats]
+    print(json.dumps({"claims": args.claims, "formats": results, "verification": reject_rate(100_000)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Canlı olay yayını testi: çok sayıda aboneyi tek bir drop'a bağlar, art arda
+claim'ler yapar ve her abonenin güncellemeyi ne kadar sürede aldığını ölçer
+(gecikme = mesajın alındığı an - mesajdaki "ts").
+
+İki mod vardır:
+
+- `--transport hub`: abonelikler doğrudan süreç içi hub'a (ağ yok); yayın
+  ve birleştirme maliyetini ölçer.
+- `--transport http`: uygulama süreç içinde uvicorn ile ayağa kalkar ve her
+  istemci `GET /drops/1/events` akışına gerçek bir TCP bağlantısı açar.
+  Binlerce bağlantı için dosya tanımlayıcı sınırı (`ulimit -n`) yükseltilmelidir.
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_events --clients 5000
+    python -m benchmarks.bench_events --transport http --clients 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="dropspot-events-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/events.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+import httpx
+
+from app import crud
+from app.database import SessionLocal
+from app.events import event_hub
+from app.main import app
+from benchmarks.bench_async_load import percentile, seed
+
+
+async def claim_burst(claims, spacing):
+    """Her claim ayrı session ile; `spacing` saniye arayla."""
+    for user_id in range(1, claims + 1):
+        async with SessionLocal() as db:
+            await crud.create_claim(db, user_id=user_id, drop_id=1)
+        await asyncio.sleep(spacing)
+
+
+async def run_hub(clients, claims, spacing):
+    subscriptions = [event_hub.subscribe(1) for _ in range(clients)]
+    latencies = []
+
+    async def listen(subscription):
+        while True:
+            message = await subscription.get(timeout=1.0)
+            if message is None:
+                return
+            payload = json.loads(message.decode().split("data: ", 1)[1])
+            latencies.append(time.time() - payload["ts"])
+
+    listeners = [asyncio.create_task(listen(s)) for s in subscriptions]
+    await claim_burst(claims, spacing)
+    await asyncio.gather(*listeners)
+    for subscription in subscriptions:
+        subscription.close()
+    return latencies
+
+
+async def run_http(clients, claims, spacing, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    latencies = []
+    connected = asyncio.Semaphore(0)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None) as client:
+
+        async def listen():
+            async with client.stream("GET", "/drops/1/events") as response:
+                first = True
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    if first:  # anlık durum
+                        first = False
+                        connected.release()
+                        continue
+                    payload = json.loads(line[len("data: "):])
+                    latencies.append(time.time() - payload["ts"])
+                    if payload.get("stock") == 0 or len(latencies) >= clients * claims:
+                        return
+
+        listeners = [asyncio.create_task(listen()) for _ in range(clients)]
+        for _ in range(clients):
+            await connected.acquire()
+        await claim_burst(claims, spacing)
+        await asyncio.sleep(1.0)
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+    server.should_exit = True
+    await serve_task
+    return latencies
+
+
+async def run(transport, clients, claims, spacing, port):
+    seed(claims, claims)
+    started = time.perf_counter()
+    if transport == "hub":
+        latencies = await run_hub(clients, claims, spacing)
+    else:
+        latencies = await run_http(clients, claims, spacing, port)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "transport": transport,
+        "clients": clients,
+        "claims": claims,
+        "messages_delivered": len(latencies),
+        # Birleştirme sayesinde abone başına mesaj sayısı claim sayısından az olabilir
+        "messages_per_client": round(len(latencies) / clients, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else None,
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=["hub", "http"], default="hub")
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--claims", type=int, default=50)
+    parser.add_argument("--spacing", type=float, default=0.01, help="claim'ler arası bekleme (s)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.transport, args.clients, args.claims, args.spacing, args.port))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Claim dışa aktarımı (GET /admin/drops/{id}/claims.csv | .ndjson) ölçümü.
+
+Tek drop'a N claim yazılır, ardından dışa aktarım akışı tüketilir:
+
+- stream      : `app/exports.stream_export` (sunucu tarafı cursor, yield_per)
+- materialize : karşılaştırma için tüm satırları önce listeye alıp kodlayan yol
+
+Her boyut ayrı bir alt süreçte çalışır; böylece tepe RSS (ru_maxrss) o
+boyuta aittir. Raporlanan: satır/sn, üretilen MB, başlangıç ve tepe RSS.
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_export --rows 100 100000 1000000
+    python -m benchmarks.bench_export --rows 5000000 --modes stream --format ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def rss_mb():
+    # Linux'ta ru_maxrss KB cinsindendir
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(path, rows):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "INSERT INTO drops (id, title, claim_window_start, claim_window_end, stock)"
+            " VALUES (1, 'Export', '2025-01-01 00:00:00', '2025-01-02 00:00:00', 0)"
+        )
+        conn.executemany(
+            "INSERT INTO users (id, email, password_hash, is_admin) VALUES (?, ?, 'x', 0)",
+            ((i, f"user{i}@example.com") for i in range(1, rows + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO claims (user_id, drop_id, code) VALUES (?, 1, ?)",
+            ((i, f"C{i:011d}") for i in range(1, rows + 1)),
+        )
+    conn.close()
+
+
+async def run(rows, mode, export_format):
+    from app import crud, models, schemas
+    from app.database import SessionLocal, engine
+    from app.exports import CLAIM_COLUMNS, ENCODERS, stream_export
+
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    seed(os.environ["DATABASE_URL"][len("sqlite:///"):], rows)
+    export_format = schemas.ExportFormat(export_format)
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    produced = 0
+    if mode == "stream":
+        async for chunk in stream_export(crud.stream_claim_export, 1, CLAIM_COLUMNS, export_format):
+            produced += len(chunk)
+    else:
+        async with SessionLocal() as db:
+            everything = [row async for partition in crud.stream_claim_export(db, 1) for row in partition]
+        produced = len(ENCODERS[export_format](CLAIM_COLUMNS, everything))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    return {
+        "rows": rows,
+        "mode": mode,
+        "format": export_format.value,
+        "rows_per_s": round(rows / elapsed) if elapsed else None,
+        "seconds": round(elapsed, 2),
+        "output_mb": round(produced / 1e6, 1),
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(rss_mb(), 1),
+    }
+
+
+def child(rows, mode, export_format):
+    directory = tempfile.mkdtemp(prefix="dropspot-export-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory}/export.db"
+    print(json.dumps(asyncio.run(run(rows, mode, export_format))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 100_000, 1_000_000])
+    parser.add_argument("--modes", nargs="+", default=["stream", "materialize"], choices=["stream", "materialize"])
+    parser.add_argument("--format", default="csv", choices=["csv", "ndjson"])
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        rows, mode, export_format = args.child
+        return child(int(rows), mode, export_format)
+
+    results = []
+    for rows in args.rows:
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_export", "--child", str(rows), mode, args.format],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
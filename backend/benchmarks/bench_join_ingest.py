@@ -0,0 +1,103 @@
+"""
+Waitlist join alımı karşılaştırması (HTTP katmanı olmadan):
+
+- direct:   her join kendi transaction'ı (`crud.join_waitlist`)
+- buffered: günlük + toplu yazım (`app/join_buffer.py`)
+
+N eşzamanlı join gönderir; onay (ack) gecikmesini ve saniyedeki join
+sayısını, buffered modda ayrıca tüm join'lerin DB'ye inme süresini ölçer.
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_join_ingest --joins 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="dropspot-ingest-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/ingest.db")
+
+from sqlalchemy import func, select
+
+from app import crud, models
+from app.database import SessionLocal, engine
+from app.join_buffer import WaitlistJoinBuffer
+from benchmarks.bench_async_load import percentile, seed
+
+
+async def measure(joins, join_one):
+    latencies = []
+
+    async def one(user_id):
+        t0 = time.perf_counter()
+        result = await join_one(user_id)
+        latencies.append(time.perf_counter() - t0)
+        return result
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(user_id) for user_id in range(1, joins + 1)))
+    elapsed = time.perf_counter() - started
+    assert all(result == "SUCCESS" for result in results), set(results)
+    return elapsed, latencies
+
+
+async def waitlist_rows():
+    async with SessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(models.Waitlist))
+
+
+async def run_direct(joins):
+    async def join_one(user_id):
+        async with SessionLocal() as db:
+            return await crud.join_waitlist(db, user_id, 1)
+
+    return await measure(joins, join_one)
+
+
+async def run_buffered(joins, fsync):
+    buffer = WaitlistJoinBuffer(SessionLocal, f"{_tmp}/waitlist.journal", flush_interval=0.005, fsync=fsync)
+    await buffer.start()
+    elapsed, latencies = await measure(joins, lambda user_id: buffer.join(user_id, 1))
+    await buffer.stop()
+    return elapsed, latencies
+
+
+async def run(mode, joins, fsync):
+    seed(joins, 1)
+    started = time.perf_counter()
+    if mode == "direct":
+        elapsed, latencies = await run_direct(joins)
+    else:
+        elapsed, latencies = await run_buffered(joins, fsync)
+    durable = time.perf_counter() - started  # buffered: stop() tüm tamponu DB'ye boşaltır
+    rows = await waitlist_rows()
+    await engine.dispose()
+
+    return {
+        "mode": mode,
+        "joins": joins,
+        "acks_per_s": round(joins / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "all_rows_in_db_s": round(durable, 2),
+        "rows_in_db": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--joins", type=int, default=20000)
+    parser.add_argument("--mode", choices=["direct", "buffered", "both"], default="both")
+    parser.add_argument("--no-fsync", action="store_true", help="buffered: günlükte fsync yapma")
+    args = parser.parse_args()
+    modes = ["direct", "buffered"] if args.mode == "both" else [args.mode]
+    print(json.dumps([asyncio.run(run(mode, args.joins, not args.no_fsync)) for mode in modes], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Drop listesi serileştirme maliyeti (1000 drop başına µs).
+
+Aynı N drop için karşılaştırılan yollar:
+
+- fetch orm / fetch rows      : SQLite'tan ORM nesnesi vs sütun tuple'ı okuma
+- response_model + json       : FastAPI'nin `response_model` yolu (doğrulama,
+                                `mode="json"` dump, stdlib `json.dumps`)
+- typeadapter dump_json       : varsayılan `GET /drops` yolu (from_attributes + pydantic-core)
+- rows + orjson               : `FAST_SERIALIZATION=1` yolu (`app/serialization.encode_drops`)
+- rows + stdlib json          : aynı tuple yolu stdlib ile (orjson yoksa neden
+                                varsayılan yola düşüldüğünü gösterir)
+- cache hit                   : `drop_list_cache`'ten hazır baytlar
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_serialization --drops 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp(prefix="dropspot-serialization-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/serialization.db")
+
+from sqlalchemy import delete, insert, select
+
+from app import models, serialization
+from app.cache import CachedResponse, ResponseCache
+from app.database import SessionLocal, engine
+from app.routers.drops import drop_list_adapter
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None).isoformat() + "Z"  # değerler UTC
+    raise TypeError(type(value).__name__)
+
+
+def per_1k(fn, n, min_seconds=0.5):
+    """`fn`'i en az `min_seconds` boyunca çalıştırır; 1000 drop başına µs döner."""
+    fn()
+    loops, started = 0, time.perf_counter()
+    while True:
+        fn()
+        loops += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return round(elapsed / loops / n * 1000 * 1e6, 1)
+
+
+async def measure(n):
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    async with SessionLocal() as db:
+        await db.execute(delete(models.Drop))
+        await db.execute(insert(models.Drop), [{
+            "title": f"Drop {i}",
+            "description": "Sınırlı sayıda üretim",
+            "claim_window_start": start + timedelta(minutes=i, microseconds=i),
+            "claim_window_end": start + timedelta(minutes=i, hours=1),
+            "stock": 100,
+        } for i in range(n)])
+        await db.commit()
+
+    columns = [getattr(models.Drop, field) for field in serialization.DROP_FIELDS]
+
+    async def fetch(query, scalars):
+        started = time.perf_counter()
+        loops = 0
+        while time.perf_counter() - started < 0.5 or loops < 2:
+            async with SessionLocal() as db:
+                result = await db.execute(query)
+                fetched = result.scalars().all() if scalars else result.all()
+            loops += 1
+        return round((time.perf_counter() - started) / loops / n * 1000 * 1e6, 1), fetched
+
+    fetch_orm, drops = await fetch(select(models.Drop).order_by(models.Drop.id), scalars=True)
+    fetch_rows, rows = await fetch(select(*columns).order_by(models.Drop.id), scalars=False)
+
+    def response_model_json():
+        validated = drop_list_adapter.validate_python(drops, from_attributes=True)
+        content = drop_list_adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def typeadapter_dump_json():
+        return drop_list_adapter.dump_json(drop_list_adapter.validate_python(drops, from_attributes=True))
+
+    def rows_stdlib_json():
+        return json.dumps(
+            [dict(zip(serialization.DROP_FIELDS, row)) for row in rows],
+            ensure_ascii=False, separators=(",", ":"), default=_default,
+        ).encode()
+
+    assert serialization.encode_drops(rows) == typeadapter_dump_json()
+    assert rows_stdlib_json() == typeadapter_dump_json()
+
+    cache = ResponseCache(ttl_seconds=3600)
+    body = typeadapter_dump_json()
+
+    async def cached_body():
+        return CachedResponse(etag="", body=body, headers={})
+
+    await cache.get_or_build("list", cached_body)
+    loop_started, loops = time.perf_counter(), 0
+    while time.perf_counter() - loop_started < 0.5:
+        await cache.get_or_build("list", cached_body)
+        loops += 1
+    cache_hit = round((time.perf_counter() - loop_started) / loops / n * 1000 * 1e6, 2)
+
+    return {
+        "drops": n,
+        "body_kb": round(len(body) / 1024, 1),
+        "us_per_1k_drops": {
+            "fetch orm": fetch_orm,
+            "fetch rows": fetch_rows,
+            "response_model + json": per_1k(response_model_json, n),
+            "typeadapter dump_json": per_1k(typeadapter_dump_json, n),
+            "rows + orjson": per_1k(lambda: serialization.encode_drops(rows), n) if serialization.AVAILABLE else None,
+            "rows + stdlib json": per_1k(rows_stdlib_json, n),
+            "cache hit": cache_hit,
+        },
+    }
+
+
+async def run(sizes):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    results = [await measure(n) for n in sizes]
+    await engine.dispose()
+    print(json.dumps({"orjson": serialization.AVAILABLE, "results": results}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drops", type=int, nargs="+", default=[100, 1000, 10_000])
+    args = parser.parse_args()
+    asyncio.run(run(args.drops))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Worker açılış süresi: import, lifespan ve ilk istek.
+
+Önce tohumlanmış bir SQLite DB hazırlanır (drop, waitlist, claim). Ardından
+her mod ayrı bir alt süreçte ölçülür:
+
+- cold : `import app.main` + tam lifespan (şema kontrolü, havuz ısıtma,
+         filtre/indeks kurulumu, zamanlayıcı, liste önbelleği)
+- fork : ana süreç import eder ve `startup.preload_for_fork(app)` çalıştırır,
+         sonra `os.fork()`; raporlanan, çatallanan worker'ın fork anından
+         hazır olana kadar geçen süredir (gunicorn `--preload` benzeri)
+
+Raporlanan: import süresi, ön yükleme süresi, lifespan (hazır) süresi ve
+ilk `GET /drops/` gecikmesi (önbellek ısıtıldığı için DB'ye gitmez).
+
+Kullanım (backend klasöründen):
+
+    python -m benchmarks.bench_startup --drops 2000 --waitlist 200000 --claims 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def seed(path, drops, waitlist, claims):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO drops (id, title, claim_window_start, claim_window_end, stock) VALUES (?, ?, ?, ?, 100)",
+            ((i, f"Drop {i}", "2025-01-01 00:00:00.000000", "2099-01-01 00:00:00.000000") for i in range(1, drops + 1)),
+        )
+        users = max(waitlist, claims) // drops + 1
+        conn.executemany(
+            "INSERT INTO users (id, email, password_hash, is_admin) VALUES (?, ?, 'x', 0)",
+            ((i, f"user{i}@example.com") for i in range(1, users + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO waitlist (user_id, drop_id) VALUES (?, ?)",
+            ((i // drops + 1, i % drops + 1) for i in range(waitlist)),
+        )
+        conn.executemany(
+            "INSERT INTO claims (user_id, drop_id, code) VALUES (?, ?, ?)",
+            ((i // drops + 1, i % drops + 1, f"C{i:011d}") for i in range(claims)),
+        )
+    conn.close()
+
+
+async def serve_once(app):
+    import httpx
+
+    started = time.perf_counter()
+    # Sunucular lifespan'i uygulamanın kendisinden geçirir; ara katman yığını da o anda kurulur
+    app.middleware_stack = app.build_middleware_stack()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter() - started
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            request_started = time.perf_counter()
+            response = await client.get("/drops/")
+            first_request = time.perf_counter() - request_started
+    assert response.status_code == 200
+    return ready, first_request
+
+
+def child(mode):
+    started = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter() - started
+    result = {"mode": mode, "import_ms": round(imported * 1000, 1)}
+
+    if mode == "cold":
+        ready, first_request = asyncio.run(serve_once(app))
+    else:
+        from app import startup
+        result["preload_ms"] = round(startup.preload_for_fork(app) * 1000, 1)
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            with os.fdopen(write_end, "w") as pipe:
+                pipe.write(json.dumps(asyncio.run(serve_once(app))))
+            os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            ready, first_request = json.loads(pipe.read())
+        os.waitpid(pid, 0)
+
+    result["lifespan_ms"] = round(ready * 1000, 1)
+    result["first_request_ms"] = round(first_request * 1000, 2)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drops", type=int, default=2000)
+    parser.add_argument("--waitlist", type=int, default=200_000)
+    parser.add_argument("--claims", type=int, default=100_000)
+    parser.add_argument("--modes", nargs="+", default=["cold", "fork"], choices=["cold", "fork"])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child)
+
+    directory = tempfile.mkdtemp(prefix="dropspot-startup-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{directory}/startup.db",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+    }
+    # Şema uygulamanın kendi açılışıyla oluşturulur, sonra tohumlanır
+    subprocess.run([sys.executable, "-m", "app.startup"], check=True, env=env, capture_output=True)
+    seed(f"{directory}/startup.db", args.drops, args.waitlist, args.claims)
+
+    results = []
+    for mode in args.modes:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps({"drops": args.drops, "waitlist": args.waitlist, "claims": args.claims, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
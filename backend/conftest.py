@@ -1,48 +1,58 @@
+import asyncio
+import os
+
+# TEST veritabanı (kalıcı değil). Uygulama import edilmeden ÖNCE ayarlanmalı,
+# böylece app.database.engine de aynı dosyayı kullanır.
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+# Testlerde parola hash'leri süreç havuzu yerine thread'de çalışır
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, SessionLocal, engine, get_db
 
-# TEST veritabanı (kalıcı değil)
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+TestingSessionLocal = SessionLocal
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async def _reset_schema(create: bool):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        if create:
+            await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
 
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_database():
     # Tüm tabloları oluştur
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(_reset_schema(create=True))
     yield
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(_reset_schema(create=False))
 
 
 @pytest.fixture()
 def db_session():
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    # AsyncSession: testler kendi event loop'larında kullanır
+    return TestingSessionLocal()
+
+
+@pytest.fixture()
+def session_factory():
+    # Paralel testler her eşzamanlı görev için ayrı session açabilsin diye
+    return TestingSessionLocal
 
 
 # FastAPI dependency override
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 app.dependency_overrides[get_db] = override_get_db
 
 
 @pytest.fixture()
 def client():
-    return TestClient(app)
+    # Context manager: tüm test tek bir event loop'ta ve lifespan ile çalışır
+    with TestClient(app) as test_client:
+        yield test_client